@@ -1,35 +1,30 @@
-import pyomo.environ as pm
-import pandas as pd
+import argparse
+import json
 import os
-import numpy as np
-import math
+import sys
 import time
-import matplotlib.pyplot as plt
 import pickle
 from datetime import datetime
 from pathlib import Path
-from functions import optimisation_run_PI_CHP, optimisation_run_benchmark_CHP
 
+# The model code (functions.py) and the input data are only imported and loaded when the script runs, after the
+# command line is read (python Modelruns.py --help), and only the price data and demand file of the selected
+# scenarios are loaded. Without command line arguments, the settings below are used.
 
 # IMPORT INPUT DATA
 reporoot_dir = Path(__file__).resolve().parent
-# heat demand data
-heat_demand_orig = pd.read_csv(os.path.join(reporoot_dir, r'input_data/demand_data/Steamconsumption_15122023.csv'))
-heat_demand_data_dict = {'110': pd.read_csv(os.path.join(reporoot_dir, r'input_data/demand_data'
-                                                                       r'/Steamconsumption_110_20122023.csv')),
-                         '120': pd.read_csv(os.path.join(reporoot_dir, r'input_data/demand_data'
-                                                                       r'/Steamconsumption_120_20122023.csv')),
-                         '130': pd.read_csv(os.path.join(reporoot_dir, r'input_data/demand_data'
-                                                                       r'/Steamconsumption_130_20122023.csv')),
-                         '140': pd.read_csv(os.path.join(reporoot_dir, r'input_data/demand_data'
-                                                                       r'/Steamconsumption_140_20122023.csv')),
-                         '150': pd.read_csv(os.path.join(reporoot_dir, r'input_data/demand_data'
-                                                                       r'/Steamconsumption_150_20122023.csv')),
-                         '160': pd.read_csv(os.path.join(reporoot_dir, r'input_data/demand_data'
-                                                                       r'/Steamconsumption_160_20122023.csv')),
-                         'sum': pd.read_csv(
-                             os.path.join(reporoot_dir, r'input_data/demand_data/Steamconsumption_15122023'
-                                                        r'.csv'))}
+# input data files, parsed once and cached as arrays in "input_data/cache" (see input_cache.py)
+price_workbook = os.path.join(reporoot_dir, r'input_data/Model_price_data_python_final.xlsx')
+demand_data_dir = os.path.join(reporoot_dir, r'input_data/demand_data')
+# heat demand data files and the file of the heat demand used in the runs
+heat_demand_files = {'110': os.path.join(demand_data_dir, 'Steamconsumption_110_20122023.csv'),
+                     '120': os.path.join(demand_data_dir, 'Steamconsumption_120_20122023.csv'),
+                     '130': os.path.join(demand_data_dir, 'Steamconsumption_130_20122023.csv'),
+                     '140': os.path.join(demand_data_dir, 'Steamconsumption_140_20122023.csv'),
+                     '150': os.path.join(demand_data_dir, 'Steamconsumption_150_20122023.csv'),
+                     '160': os.path.join(demand_data_dir, 'Steamconsumption_160_20122023.csv'),
+                     'sum': os.path.join(demand_data_dir, 'Steamconsumption_15122023.csv')}
+heat_demand_file = 'sum'
 
 # define factor by which volatility should be amplified
 amp_values = []  # , 1.3, 1.4
@@ -40,6 +35,65 @@ hours = 8000
 # define minimal load factor of CHP
 GT_min_load = 0.3  # minimal load factor, [% of Pnom]
 
+# define whether the products of capacity and binary variables are replaced by big-M constraints (MILP instead of MIQP)
+linearize = False
+# define whether the (linearised) PI and benchmark models are assembled as sparse matrices and passed to the solver
+# without Pyomo (only gurobi or highs, requires linearize = True), which saves memory and build time for long horizons
+matrix_model = False
+# define whether the benchmark system is dispatched in merit order without a solver (exact optimum, all time steps at
+# once, see dispatch_benchmark_CHP) instead of solving its MILP; these results have the solver status 'closed form'
+benchmark_merit_order = True
+# define whether the PI model is first solved without binaries, which are then only added at the time steps where
+# storages charge and discharge simultaneously or the grid connection is used in both directions
+lazy_binaries = False
+# define whether the benchmark system is solved first for every price scenario and its dispatch and objective are
+# passed to the PI runs as MIP start and cutoff
+benchmark_mip_start = False
+# define whether the PI model is built once and only its prices and CAPEX are updated for the following scenarios,
+# re-solving with a persistent solver, gurobi or highs (warm start from the previous scenario)
+persistent_solver = False
+# define the number of representative periods of period_hours hours on which the PI capacities are planned before the
+# dispatch of the full year is optimised with these capacities (None: plan on the full year)
+representative_periods = None
+period_hours = 24
+# define the length of the windows [h] in which the full-year dispatch with the planned capacities is solved one after
+# another, overlapping by dispatch_overlap_hours (see dispatch_PI_rolling_horizon; None: one model of the full year
+# with lazy binaries)
+dispatch_window_hours = 168
+dispatch_overlap_hours = 24
+# define the number of worker processes that run the scenarios in parallel (1: one scenario after another) and the
+# maximum number of solver threads per worker (None: solver default, in the parallel sweep the cores divided between
+# the workers), e.g. 8 workers with 8 threads on 64 cores; workers times threads must not exceed the number of cores
+parallel_workers = 1
+solver_threads_per_worker = None
+# define the solver and its settings: 'gurobi', 'highs', 'cbc' or 'glpk' (the open-source solvers require
+# linearize = True), threads, time limit [s], relative MIP gap, presolve level ('off', 'on', 'aggressive') and solver
+# log output; None keeps the solver default, solver_threads_per_worker replaces the threads if it is not None
+solver_settings = {'solver': 'gurobi', 'threads': None, 'time_limit': None, 'mip_gap': 0.0005, 'presolve': None,
+                   'tee': True}
+# define the folder of the result store (energy flows of every run as compressed file, scalar results in a table per
+# scenario, see result_store.py) and whether the results are additionally saved as pickle files
+result_store_dir = 'result_store'
+save_pickles = False
+# define whether the energy flows are stored compact in the result store (None: double precision, 'float32': single
+# precision, a number: quantised to multiples of this step, e.g. 1e-4 MW); columns that are zero in all or most time
+# steps are then stored without their zeros and restored when the results are loaded
+compact_results = None
+# define whether scenarios that are already in the result store are skipped. The manifest of the store records every
+# finished scenario with the hash of its inputs and settings; a restarted sweep loads the results of these scenarios
+# from the store instead of running them again, scenarios with changed inputs or settings are run again
+resume_sweep = True
+# define the folder of the run cache (None: no cache) and its maximum size [GB]. The results of every optimisation run
+# are stored under the hash of its input data, settings and model code, so that a run with the same inputs (e.g. when
+# only another parameter is changed) returns the stored results; the least recently used results are removed first
+run_cache_dir = 'run_cache'
+run_cache_size_gb = 10
+# define the KPI catalog (SQLite database in which every run registers its scalar results, statistics and timings with
+# its scenario keys and the settings of the sweep, see kpi_catalog.py; None: no catalog) and the name of the sweep in
+# the catalog (None: the name of the result store folder and the start time of the sweep)
+kpi_catalog_file = 'kpi_catalog.sqlite'
+sweep_name = None
+
 # define scenarios:
 HP_integration_scenarios = ['PlugIn']
 el_price_scenarios = [
@@ -58,66 +112,28 @@ gas_use_cost_scenarios = [
     'MeanHigh-VarHigh-EGR1'
 ]
 capex_scenarios = ['HighHP-LowRest', 'LowHP-HighRest']
+# define whether the PI scenarios and the benchmark scenarios are run
+run_PI = True
+run_benchmark = True
 
-# load required energy price data:
-all_electricity_prices = {
-    'MeanLow-VarLow': pd.read_excel(os.path.join(reporoot_dir,
-                                                 r'input_data/Model_price_data_python_v5.xlsx'),
-                                    sheet_name='MEANlow_VARlow', header=0, index_col=0,
-                                    usecols='A,F'),
-    'MeanHigh-VarLow': pd.read_excel(os.path.join(reporoot_dir,
-                                                  r'input_data/Model_price_data_python_v5.xlsx'),
-                                     sheet_name='MEANhigh_VARlow', header=0, index_col=0,
-                                     usecols='A,F'),
-    'MeanLow-VarHigh': pd.read_excel(os.path.join(reporoot_dir,
-                                                  r'input_data/Model_price_data_python_v5.xlsx'),
-                                     sheet_name='MEANlow_VARhigh', header=0, index_col=0,
-                                     usecols='A,F'),
-    'MeanHigh-VarHigh': pd.read_excel(os.path.join(reporoot_dir,
-                                                   r'input_data/Model_price_data_python_v5.xlsx'),
-                                      sheet_name='MEANhigh_VARhigh', header=0, index_col=0,
-                                      usecols='A,F')
+# energy price data of the scenarios (sheet and column of the price workbook), loaded for the selected scenarios:
+electricity_price_data = {
+    'MeanLow-VarLow': ('MEANlow_VARlow', 'F'),
+    'MeanHigh-VarLow': ('MEANhigh_VARlow', 'F'),
+    'MeanLow-VarHigh': ('MEANlow_VARhigh', 'F'),
+    'MeanHigh-VarHigh': ('MEANhigh_VARhigh', 'F')
 }
 
-all_gas_prices = {
-    'MeanLow-VarLow-EGR1.6': pd.read_excel(os.path.join(reporoot_dir,
-                                                         r'input_data/Model_price_data_python_v5.xlsx'),
-                                            sheet_name='MEANlow_VARlow', header=0, index_col=0,
-                                            usecols='A,K'),
-    'MeanLow-VarLow-EGR1': pd.read_excel(os.path.join(reporoot_dir,
-                                                       r'input_data/Model_price_data_python_v5.xlsx'),
-                                          sheet_name='MEANlow_VARlow', header=0, index_col=0,
-                                          usecols='A,L'),
-    'MeanHigh-VarLow-EGR1.6': pd.read_excel(os.path.join(reporoot_dir,
-                                                          r'input_data/Model_price_data_python_v5.xlsx'),
-                                             sheet_name='MEANhigh_VARlow', header=0, index_col=0,
-                                             usecols='A,K'),
-    'MeanHigh-VarLow-EGR1': pd.read_excel(os.path.join(reporoot_dir,
-                                                        r'input_data/Model_price_data_python_v5.xlsx'),
-                                           sheet_name='MEANhigh_VARlow', header=0, index_col=0,
-                                           usecols='A,L'),
-    'MeanLow-VarHigh-EGR1.6': pd.read_excel(os.path.join(reporoot_dir,
-                                                           r'input_data/Model_price_data_python_v5.xlsx'),
-                                              sheet_name='MEANlow_VARhigh', header=0, index_col=0,
-                                              usecols='A,K'),
-    'MeanLow-VarHigh-EGR1': pd.read_excel(os.path.join(reporoot_dir,
-                                                         r'input_data/Model_price_data_python_v5.xlsx'),
-                                            sheet_name='MEANlow_VARhigh', header=0, index_col=0,
-                                            usecols='A,L'),
-    'MeanHigh-VarHigh-EGR1.6': pd.read_excel(os.path.join(reporoot_dir,
-                                                           r'input_data/Model_price_data_python_v5.xlsx'),
-                                              sheet_name='MEANhigh_VARhigh', header=0, index_col=0,
-                                              usecols='A,K'),
-    'MeanHigh-VarHigh-EGR1': pd.read_excel(os.path.join(reporoot_dir,
-                                                         r'input_data/Model_price_data_python_v5.xlsx'),
-                                            sheet_name='MEANhigh_VARhigh', header=0, index_col=0,
-                                            usecols='A,L')
+gas_price_data = {
+    'MeanLow-VarLow-EGR1.6': ('MEANlow_VARlow', 'K'),
+    'MeanLow-VarLow-EGR1': ('MEANlow_VARlow', 'L'),
+    'MeanHigh-VarLow-EGR1.6': ('MEANhigh_VARlow', 'K'),
+    'MeanHigh-VarLow-EGR1': ('MEANhigh_VARlow', 'L'),
+    'MeanLow-VarHigh-EGR1.6': ('MEANlow_VARhigh', 'K'),
+    'MeanLow-VarHigh-EGR1': ('MEANlow_VARhigh', 'L'),
+    'MeanHigh-VarHigh-EGR1.6': ('MEANhigh_VARhigh', 'K'),
+    'MeanHigh-VarHigh-EGR1': ('MEANhigh_VARhigh', 'L')
 }
-# converting index into Datetime index
-for gas_use_cost_scenario in gas_use_cost_scenarios:
-    all_gas_prices[gas_use_cost_scenario].index = pd.to_datetime(all_gas_prices[gas_use_cost_scenario].index,
-                                                                 dayfirst=True,
-                                                                 format='mixed')  # format='%d.%m.%Y %H:%M'
 
 # define technology cost data
 all_capex_data = {
@@ -126,129 +142,351 @@ all_capex_data = {
            'LowHP-HighRest': {'ElB': 30000, 'Bat': 320e3, 'TES': 40000, 'HP': 300e3, 'H2E': 980e3, 'H2B': 35000,
                               'H2S': 10000}}}
 
-# define dict for looping scenario runs and storing results:
-scenario_dict = {HP_integration_scenario: {el_price_scenario: {gas_price_scenario: {capex_scenario: {}
-                                                                                    for capex_scenario in
-                                                                                    capex_scenarios}
-                                                               for gas_price_scenario in gas_use_cost_scenarios}
-                                           for el_price_scenario in el_price_scenarios}
-                 for HP_integration_scenario in HP_integration_scenarios}
+# settings that can be replaced with a configuration file (json file with {setting: value}, see command_line)
+config_settings = ['heat_demand_file', 'amp_values', 'variability_values', 'hours', 'GT_min_load', 'linearize',
+                   'matrix_model', 'benchmark_merit_order', 'lazy_binaries', 'benchmark_mip_start', 'persistent_solver',
+                   'representative_periods', 'period_hours', 'dispatch_window_hours', 'dispatch_overlap_hours',
+                   'parallel_workers', 'solver_threads_per_worker', 'solver_settings', 'result_store_dir',
+                   'save_pickles', 'compact_results', 'resume_sweep', 'run_cache_dir', 'run_cache_size_gb',
+                   'kpi_catalog_file', 'sweep_name', 'HP_integration_scenarios', 'el_price_scenarios',
+                   'gas_use_cost_scenarios', 'capex_scenarios', 'run_PI', 'run_benchmark']
+
+
+def paired_price_scenarios(el_price_scenarios, gas_use_cost_scenarios):
+    # gas price scenarios of every electricity price scenario: a gas price scenario belongs to the electricity price
+    # scenario with the same mean and variability (e.g. 'MeanLow-VarLow-EGR1.6' to 'MeanLow-VarLow')
+    return {el_price_scenario: [gas_use_cost_scenario for gas_use_cost_scenario in gas_use_cost_scenarios
+                                if gas_use_cost_scenario.startswith(el_price_scenario + '-')]
+            for el_price_scenario in el_price_scenarios}
+
+
+def command_line():
+    # command line arguments of the script, all optional: they replace the settings above for one run of the script
+    parser = argparse.ArgumentParser(description="Optimisation runs of the PI and benchmark scenarios. Settings that "
+                                                 "are not given keep their values in Modelruns.py.")
+    parser.add_argument('--config', help="json file with settings that replace the settings in Modelruns.py, e.g. "
+                                         "{\"hours\": 168, \"solver_settings\": {\"solver\": \"highs\"}} "
+                                         "(settings: " + ", ".join(config_settings) + ")")
+    parser.add_argument('--el-price', nargs='+', choices=list(electricity_price_data), metavar='SCENARIO',
+                        help="electricity price scenarios that are run: " + ", ".join(electricity_price_data))
+    parser.add_argument('--gas-price', nargs='+', choices=list(gas_price_data), metavar='SCENARIO',
+                        help="gas price scenarios that are run: " + ", ".join(gas_price_data))
+    parser.add_argument('--capex', nargs='+', choices=list(all_capex_data['PI']), metavar='SCENARIO',
+                        help="CAPEX scenarios of the PI runs: " + ", ".join(all_capex_data['PI']))
+    parser.add_argument('--only', choices=['PI', 'benchmark'], help="run only the PI or only the benchmark scenarios")
+    parser.add_argument('--hours', type=int, help="operational hours (length of the optimisation)")
+    parser.add_argument('--workers', type=int, help="number of worker processes (parallel_workers)")
+    parser.add_argument('--demand', choices=list(heat_demand_files), help="heat demand file")
+    parser.add_argument('--list', action='store_true', help="print the selected scenarios without running them")
+    return parser
+
+
+def store_scenario(scenario, result):
+    # save the results of a scenario run in the result store, record the scenario as finished with the hash of its
+    # inputs and settings (see resume_sweep) and register its runs in the KPI catalog. Uses the settings of the sweep
+    # and the model code that are loaded when the script runs.
+    save_scenario_result(result_store_dir, *scenario, result, compact=compact_results)
+    record_finished_scenario(result_store_dir, *scenario, scenario_input_hash(scenario, sweep_inputs))
+    register_runs(kpi_catalog_file, sweep_name, *scenario, result, settings=sweep_settings)
 
-# starting the model runs
-for HP_integration_scenario in ['PlugIn']:
-    print("Started: " + HP_integration_scenario)
-    for i, el_price_scenario in enumerate(el_price_scenarios):
-        print("Started: " + el_price_scenario)
-        price_el_hourly = all_electricity_prices[el_price_scenario]
-        for j in [2 * i, 2 * i + 1]:
-            gas_use_cost_scenario = gas_use_cost_scenarios[j]
-            print("Started: " + gas_use_cost_scenario)
-            price_NG_use = all_gas_prices[gas_use_cost_scenario]
-            for capex_scenario in capex_scenarios:
-                print("Started: " + capex_scenario)
-                # store starting time
-                begin = time.time()
-                if HP_integration_scenario == 'PlugIn':
-                    capex_data = all_capex_data['PI'][capex_scenario]
-                    scenario_dict[HP_integration_scenario][el_price_scenario][gas_use_cost_scenario][capex_scenario] = \
-                        optimisation_run_PI_CHP(heat_demand_orig, price_el_hourly, price_NG_use, amp_values,
-                                                variability_values, GT_min_load, hours, capex_data)
-                    # storing the results of the individual scenario run
-                    prefix = 'PI_' + gas_use_cost_scenario + '_' + capex_scenario + '_minload30%_opt005'
-                    timestamp_format = "{:%Y%m%dT%H%M}"
-                    timestamp = timestamp_format.format(datetime.now())
-                    output_filename = f"{prefix}__{timestamp}.pickle"
-                    with open(output_filename, 'wb') as handle:
-                        pickle.dump(scenario_dict[HP_integration_scenario][el_price_scenario][gas_use_cost_scenario]
-                                    [capex_scenario], handle, protocol=pickle.HIGHEST_PROTOCOL)
-                    print("Finished saving the individual scenario run")
-                    # stop counting the time
-                    time.sleep(1)
-                    # store end time
-                    end = time.time()
-
-                    # total time taken
-                    print(f"Total runtime of the program is {end - begin}")
-
-                else:
-                    print("Invalid HP integration scenario.")
-
-
-# save the results of all model runs
-prefix = 'outputs_with_CHP_minload30%_opt005'
-timestamp_format = "{:%Y%m%dT%H%M}"
-timestamp = timestamp_format.format(datetime.now())
-output_filename = f"{prefix}__{timestamp}.pickle"
-with open(output_filename, 'wb') as handle:
-    pickle.dump(scenario_dict, handle, protocol=pickle.HIGHEST_PROTOCOL)
-print("Finished saving complete scenario dict")
-
-# save the input data
-prefix = 'elprices'
-timestamp_format = "{:%Y%m%dT%H%M}"
-timestamp = timestamp_format.format(datetime.now())
-output_filename = f"{prefix}__{timestamp}.pickle"
-with open(output_filename, 'wb') as handle:
-    pickle.dump(all_electricity_prices, handle, protocol=pickle.HIGHEST_PROTOCOL)
-print("Finished saving el prices")
-
-prefix = 'NGprices'
-timestamp_format = "{:%Y%m%dT%H%M}"
-timestamp = timestamp_format.format(datetime.now())
-output_filename = f"{prefix}__{timestamp}.pickle"
-with open(output_filename, 'wb') as handle:
-    pickle.dump(all_gas_prices, handle, protocol=pickle.HIGHEST_PROTOCOL)
-print("Finished saving NG prices")
-
-prefix = 'technologycostdata'
-timestamp_format = "{:%Y%m%dT%H%M}"
-timestamp = timestamp_format.format(datetime.now())
-output_filename = f"{prefix}__{timestamp}.pickle"
-with open(output_filename, 'wb') as handle:
-    pickle.dump(all_capex_data, handle, protocol=pickle.HIGHEST_PROTOCOL)
-print("Finished saving TC data")
-
-# Run benchmark system optimisation
-benchmark_scenario_dict = {el_price_scenario: {gas_price_scenario: {} for gas_price_scenario in gas_use_cost_scenarios}
-                           for el_price_scenario in el_price_scenarios}
 
 # starting the model runs
-for i, el_price_scenario in enumerate(el_price_scenarios):
-    print("Started: " + el_price_scenario)
-    price_el_hourly = all_electricity_prices[el_price_scenario]
-    for j in [2 * i, 2 * i + 1]:
-        gas_use_cost_scenario = gas_use_cost_scenarios[j]
-        print("Started: " + gas_use_cost_scenario)
-        price_NG_use = all_gas_prices[gas_use_cost_scenario]
-        benchmark_scenario_dict[el_price_scenario][gas_use_cost_scenario] = \
-            optimisation_run_benchmark_CHP(heat_demand_orig, price_el_hourly, price_NG_use, amp_values,
-                                           variability_values, GT_min_load, hours)
-
-# save the results
-prefix = 'outputs_benchmark_with_CHP_minload30%'
-timestamp_format = "{:%Y%m%dT%H%M}"
-timestamp = timestamp_format.format(datetime.now())
-output_filename = f"{prefix}__{timestamp}.pickle"
-with open(output_filename, 'wb') as handle:
-    pickle.dump(benchmark_scenario_dict, handle, protocol=pickle.HIGHEST_PROTOCOL)
-print("Finished saving complete scenario dict")
-
-# save the input data
-prefix = 'elprices_benchmark'
-timestamp_format = "{:%Y%m%dT%H%M}"
-timestamp = timestamp_format.format(datetime.now())
-output_filename = f"{prefix}__{timestamp}.pickle"
-with open(output_filename, 'wb') as handle:
-    pickle.dump(all_electricity_prices, handle, protocol=pickle.HIGHEST_PROTOCOL)
-print("Finished saving el prices")
-
-prefix = 'NGprices_benchmark'
-timestamp_format = "{:%Y%m%dT%H%M}"
-timestamp = timestamp_format.format(datetime.now())
-output_filename = f"{prefix}__{timestamp}.pickle"
-with open(output_filename, 'wb') as handle:
-    pickle.dump(all_gas_prices, handle, protocol=pickle.HIGHEST_PROTOCOL)
-print("Finished saving NG prices")
-
-# ------------------------------------ END of script -------------------------------------------------------------------
-print("End of the script")
+# the guard is required because the worker processes of the parallel sweep may import this script
+if __name__ == '__main__':
+    arguments = command_line().parse_args()
+    if arguments.config is not None:
+        with open(arguments.config) as handle:
+            config = json.load(handle)
+        unknown_settings = [setting for setting in config if setting not in config_settings]
+        if unknown_settings:
+            raise ValueError("Unknown settings in " + arguments.config + ": " + ", ".join(unknown_settings))
+        globals().update(config)
+    if arguments.el_price is not None:
+        el_price_scenarios = arguments.el_price
+    if arguments.gas_price is not None:
+        gas_use_cost_scenarios = arguments.gas_price
+    if arguments.capex is not None:
+        capex_scenarios = arguments.capex
+    if arguments.only is not None:
+        run_PI, run_benchmark = arguments.only == 'PI', arguments.only == 'benchmark'
+    if arguments.hours is not None:
+        hours = arguments.hours
+    if arguments.workers is not None:
+        parallel_workers = arguments.workers
+    if arguments.demand is not None:
+        heat_demand_file = arguments.demand
+    benchmark_build = 'merit_order' if benchmark_merit_order else 'matrix' if matrix_model else 'rules'
+    persistent_PI_model = {} if persistent_solver else None
+    if sweep_name is None:
+        sweep_name = os.path.basename(os.path.normpath(result_store_dir)) + '__' + \
+                     "{:%Y%m%dT%H%M}".format(datetime.now())
+    # settings of the sweep, registered with its runs in the KPI catalog
+    sweep_settings = {setting: globals()[setting] for setting in config_settings}
+
+    # selected scenarios: tuples of HP integration ('PlugIn' or 'Benchmark'), electricity price, gas price and CAPEX
+    # scenario (None for the benchmark system)
+    price_scenarios = paired_price_scenarios(el_price_scenarios, gas_use_cost_scenarios)
+    scenarios = [(HP_integration_scenario, el_price_scenario, gas_use_cost_scenario, capex_scenario)
+                 for HP_integration_scenario in (HP_integration_scenarios if run_PI else [])
+                 for el_price_scenario in price_scenarios
+                 for gas_use_cost_scenario in price_scenarios[el_price_scenario]
+                 for capex_scenario in capex_scenarios] + \
+                [('Benchmark', el_price_scenario, gas_use_cost_scenario, None)
+                 for el_price_scenario in price_scenarios
+                 for gas_use_cost_scenario in price_scenarios[el_price_scenario] if run_benchmark]
+    if arguments.list:
+        for scenario in scenarios:
+            print(*scenario)
+        sys.exit()
+
+    # import the model code and load the input data of the selected scenarios
+    from functions import optimisation_run_PI_CHP, optimisation_run_benchmark_CHP, prepare_inputs
+    from sweep import run_scenarios_parallel, scenario_input_hash
+    from input_cache import load_price_data, load_demand_data
+    from result_store import save_scenario_result, scenario_finished, record_finished_scenario, load_scenario_result
+    from run_cache import cached_run
+    from kpi_catalog import register_runs
+    heat_demand_orig = load_demand_data(heat_demand_files[heat_demand_file])
+    all_electricity_prices = {el_price_scenario: load_price_data(price_workbook,
+                                                                 *electricity_price_data[el_price_scenario])
+                              for el_price_scenario in price_scenarios if price_scenarios[el_price_scenario]}
+    all_gas_prices = {gas_use_cost_scenario: load_price_data(price_workbook, *gas_price_data[gas_use_cost_scenario])
+                      for el_price_scenario in price_scenarios
+                      for gas_use_cost_scenario in price_scenarios[el_price_scenario]}
+
+    # define dict for looping scenario runs and storing results:
+    scenario_dict = {HP_integration_scenario: {el_price_scenario: {gas_price_scenario: {capex_scenario: {}
+                                                                                        for capex_scenario in
+                                                                                        capex_scenarios}
+                                                                   for gas_price_scenario in gas_use_cost_scenarios}
+                                               for el_price_scenario in el_price_scenarios}
+                     for HP_integration_scenario in HP_integration_scenarios}
+
+    # define dict for storing the results of the benchmark system optimisation runs
+    benchmark_scenario_dict = {el_price_scenario: {gas_price_scenario: {}
+                                                   for gas_price_scenario in gas_use_cost_scenarios}
+                               for el_price_scenario in el_price_scenarios}
+
+    # input data and settings of the sweep (sent to the worker processes of the parallel sweep and hashed for the
+    # manifest of the result store)
+    sweep_inputs = {'heat_demand_orig': heat_demand_orig, 'all_electricity_prices': all_electricity_prices,
+                    'all_gas_prices': all_gas_prices, 'all_capex_data': all_capex_data,
+                    'amp_values': amp_values, 'variability_values': variability_values,
+                    'GT_min_load': GT_min_load, 'hours': hours, 'linearize': linearize,
+                    'persistent_solver': persistent_solver, 'threads': solver_threads_per_worker,
+                    'representative_periods': representative_periods, 'period_hours': period_hours,
+                    'dispatch_window_hours': dispatch_window_hours, 'dispatch_overlap_hours': dispatch_overlap_hours,
+                    'lazy_binaries': lazy_binaries, 'benchmark_mip_start': benchmark_mip_start,
+                    'solver_settings': solver_settings, 'matrix_model': matrix_model,
+                    'benchmark_build': benchmark_build, 'run_cache_dir': run_cache_dir,
+                    'run_cache_size_gb': run_cache_size_gb}
+    if parallel_workers > 1:
+        # run the PI and benchmark scenarios on a pool of worker processes. The input data is sent once to every
+        # worker and the results are collected in scenario_dict and benchmark_scenario_dict.
+        # the results of the scenarios that are already finished are loaded from the result store
+        finished_scenarios = [scenario for scenario in scenarios if resume_sweep and
+                              scenario_finished(result_store_dir, *scenario,
+                                                scenario_input_hash(scenario, sweep_inputs))]
+        for scenario in finished_scenarios:
+            HP_integration_scenario, el_price_scenario, gas_use_cost_scenario, capex_scenario = scenario
+            print("Already finished: ", scenario)
+            if HP_integration_scenario == 'Benchmark':
+                benchmark_scenario_dict[el_price_scenario][gas_use_cost_scenario] = \
+                    load_scenario_result(result_store_dir, *scenario)
+            else:
+                scenario_dict[HP_integration_scenario][el_price_scenario][gas_use_cost_scenario][capex_scenario] = \
+                    load_scenario_result(result_store_dir, *scenario)
+        begin = time.time()
+        # the finished benchmark scenarios provide the MIP start of the PI runs of their price scenario
+        benchmark_starts = {(el_price_scenario, gas_use_cost_scenario): result
+                            for el_price_scenario, results in benchmark_scenario_dict.items()
+                            for gas_use_cost_scenario, result in results.items() if result}
+        for scenario, result in run_scenarios_parallel([scenario for scenario in scenarios
+                                                        if scenario not in finished_scenarios],
+                                                       sweep_inputs, parallel_workers, benchmark_starts):
+            HP_integration_scenario, el_price_scenario, gas_use_cost_scenario, capex_scenario = scenario
+            print("Finished: ", scenario)
+            store_scenario(scenario, result)
+            if HP_integration_scenario == 'Benchmark':
+                benchmark_scenario_dict[el_price_scenario][gas_use_cost_scenario] = result
+                continue
+            scenario_dict[HP_integration_scenario][el_price_scenario][gas_use_cost_scenario][capex_scenario] = result
+            # storing the results of the individual scenario run
+            if save_pickles:
+                prefix = 'PI_' + gas_use_cost_scenario + '_' + capex_scenario + '_minload30%_opt005'
+                timestamp_format = "{:%Y%m%dT%H%M}"
+                timestamp = timestamp_format.format(datetime.now())
+                output_filename = f"{prefix}__{timestamp}.pickle"
+                with open(output_filename, 'wb') as handle:
+                    pickle.dump(result, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            print("Finished saving the individual scenario run")
+        # total time taken
+        print(f"Total runtime of the parallel scenario runs is {time.time() - begin}")
+    else:
+        for HP_integration_scenario in HP_integration_scenarios if run_PI else []:
+            print("Started: " + HP_integration_scenario)
+            for el_price_scenario in all_electricity_prices:
+                print("Started: " + el_price_scenario)
+                price_el_hourly = all_electricity_prices[el_price_scenario]
+                for gas_use_cost_scenario in price_scenarios[el_price_scenario]:
+                    print("Started: " + gas_use_cost_scenario)
+                    price_NG_use = all_gas_prices[gas_use_cost_scenario]
+                    # the inputs of the price scenario are prepared once for all its runs
+                    prepared = prepare_inputs(heat_demand_orig, price_el_hourly, price_NG_use, amp_values, hours)
+                    for capex_scenario in capex_scenarios:
+                        print("Started: " + capex_scenario)
+                        scenario = (HP_integration_scenario, el_price_scenario, gas_use_cost_scenario, capex_scenario)
+                        if resume_sweep and scenario_finished(result_store_dir, *scenario,
+                                                              scenario_input_hash(scenario, sweep_inputs)):
+                            print("Already finished: ", scenario)
+                            scenario_dict[HP_integration_scenario][el_price_scenario][gas_use_cost_scenario][
+                                capex_scenario] = load_scenario_result(result_store_dir, *scenario)
+                            continue
+                        # store starting time
+                        begin = time.time()
+                        if HP_integration_scenario == 'PlugIn':
+                            capex_data = all_capex_data['PI'][capex_scenario]
+                            if benchmark_mip_start and not benchmark_scenario_dict[el_price_scenario][
+                                    gas_use_cost_scenario]:
+                                # the benchmark run of the price scenario provides the MIP start of the PI runs
+                                benchmark_scenario = ('Benchmark', el_price_scenario, gas_use_cost_scenario, None)
+                                if resume_sweep and scenario_finished(
+                                        result_store_dir, *benchmark_scenario,
+                                        scenario_input_hash(benchmark_scenario, sweep_inputs)):
+                                    benchmark_scenario_dict[el_price_scenario][gas_use_cost_scenario] = \
+                                        load_scenario_result(result_store_dir, *benchmark_scenario)
+                                else:
+                                    benchmark_scenario_dict[el_price_scenario][gas_use_cost_scenario] = \
+                                        cached_run(optimisation_run_benchmark_CHP, heat_demand_orig,
+                                                   price_el_hourly, price_NG_use, amp_values, variability_values,
+                                                   GT_min_load, hours, threads=solver_threads_per_worker,
+                                                   solver=solver_settings, build=benchmark_build, prepared=prepared,
+                                                   cache_dir=run_cache_dir, max_size_gb=run_cache_size_gb)
+                                    store_scenario(benchmark_scenario,
+                                                   benchmark_scenario_dict[el_price_scenario][gas_use_cost_scenario])
+                            scenario_dict[HP_integration_scenario][el_price_scenario][gas_use_cost_scenario][
+                                capex_scenario] = cached_run(
+                                    optimisation_run_PI_CHP, heat_demand_orig, price_el_hourly, price_NG_use,
+                                    amp_values, variability_values, GT_min_load, hours, capex_data, linearize=linearize,
+                                    persistent=persistent_PI_model, threads=solver_threads_per_worker,
+                                    representative_periods=representative_periods, period_hours=period_hours,
+                                    dispatch_window_hours=dispatch_window_hours,
+                                    dispatch_overlap_hours=dispatch_overlap_hours,
+                                    lazy_binaries=lazy_binaries,
+                                    benchmark_start=benchmark_scenario_dict[el_price_scenario][
+                                        gas_use_cost_scenario] if benchmark_mip_start else None,
+                                    solver=solver_settings, build='matrix' if matrix_model else 'arrays',
+                                    prepared=prepared, cache_dir=run_cache_dir, max_size_gb=run_cache_size_gb)
+                            # storing the results of the individual scenario run
+                            store_scenario(scenario, scenario_dict[HP_integration_scenario][el_price_scenario]
+                                           [gas_use_cost_scenario][capex_scenario])
+                            if save_pickles:
+                                prefix = 'PI_' + gas_use_cost_scenario + '_' + capex_scenario + '_minload30%_opt005'
+                                timestamp_format = "{:%Y%m%dT%H%M}"
+                                timestamp = timestamp_format.format(datetime.now())
+                                output_filename = f"{prefix}__{timestamp}.pickle"
+                                with open(output_filename, 'wb') as handle:
+                                    pickle.dump(scenario_dict[HP_integration_scenario][el_price_scenario]
+                                                [gas_use_cost_scenario][capex_scenario], handle,
+                                                protocol=pickle.HIGHEST_PROTOCOL)
+                            print("Finished saving the individual scenario run")
+                            # store end time
+                            end = time.time()
+
+                            # total time taken
+                            print(f"Total runtime of the program is {end - begin}")
+
+                        else:
+                            print("Invalid HP integration scenario.")
+
+
+    # save the results of all model runs (the result store already contains every run)
+    if save_pickles:
+        prefix = 'outputs_with_CHP_minload30%_opt005'
+        timestamp_format = "{:%Y%m%dT%H%M}"
+        timestamp = timestamp_format.format(datetime.now())
+        output_filename = f"{prefix}__{timestamp}.pickle"
+        with open(output_filename, 'wb') as handle:
+            pickle.dump(scenario_dict, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        print("Finished saving complete scenario dict")
+
+    # save the input data
+    prefix = 'elprices'
+    timestamp_format = "{:%Y%m%dT%H%M}"
+    timestamp = timestamp_format.format(datetime.now())
+    output_filename = f"{prefix}__{timestamp}.pickle"
+    with open(output_filename, 'wb') as handle:
+        pickle.dump(all_electricity_prices, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    print("Finished saving el prices")
+
+    prefix = 'NGprices'
+    timestamp_format = "{:%Y%m%dT%H%M}"
+    timestamp = timestamp_format.format(datetime.now())
+    output_filename = f"{prefix}__{timestamp}.pickle"
+    with open(output_filename, 'wb') as handle:
+        pickle.dump(all_gas_prices, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    print("Finished saving NG prices")
+
+    prefix = 'technologycostdata'
+    timestamp_format = "{:%Y%m%dT%H%M}"
+    timestamp = timestamp_format.format(datetime.now())
+    output_filename = f"{prefix}__{timestamp}.pickle"
+    with open(output_filename, 'wb') as handle:
+        pickle.dump(all_capex_data, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    print("Finished saving TC data")
+
+    # Run benchmark system optimisation (the parallel sweep already ran the benchmark scenarios)
+    if parallel_workers == 1 and run_benchmark:
+        # starting the model runs
+        for el_price_scenario in all_electricity_prices:
+            print("Started: " + el_price_scenario)
+            price_el_hourly = all_electricity_prices[el_price_scenario]
+            for gas_use_cost_scenario in price_scenarios[el_price_scenario]:
+                print("Started: " + gas_use_cost_scenario)
+                price_NG_use = all_gas_prices[gas_use_cost_scenario]
+                if benchmark_scenario_dict[el_price_scenario][gas_use_cost_scenario]:
+                    continue  # already solved for the MIP start of the PI runs
+                benchmark_scenario = ('Benchmark', el_price_scenario, gas_use_cost_scenario, None)
+                if resume_sweep and scenario_finished(result_store_dir, *benchmark_scenario,
+                                                      scenario_input_hash(benchmark_scenario, sweep_inputs)):
+                    print("Already finished: ", benchmark_scenario)
+                    benchmark_scenario_dict[el_price_scenario][gas_use_cost_scenario] = \
+                        load_scenario_result(result_store_dir, *benchmark_scenario)
+                    continue
+                prepared = prepare_inputs(heat_demand_orig, price_el_hourly, price_NG_use, amp_values, hours)
+                benchmark_scenario_dict[el_price_scenario][gas_use_cost_scenario] = \
+                    cached_run(optimisation_run_benchmark_CHP, heat_demand_orig, price_el_hourly, price_NG_use,
+                               amp_values, variability_values, GT_min_load, hours, threads=solver_threads_per_worker,
+                               solver=solver_settings, build=benchmark_build, prepared=prepared,
+                               cache_dir=run_cache_dir, max_size_gb=run_cache_size_gb)
+                store_scenario(benchmark_scenario, benchmark_scenario_dict[el_price_scenario][gas_use_cost_scenario])
+
+    # save the results
+    if save_pickles:
+        prefix = 'outputs_benchmark_with_CHP_minload30%'
+        timestamp_format = "{:%Y%m%dT%H%M}"
+        timestamp = timestamp_format.format(datetime.now())
+        output_filename = f"{prefix}__{timestamp}.pickle"
+        with open(output_filename, 'wb') as handle:
+            pickle.dump(benchmark_scenario_dict, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        print("Finished saving complete scenario dict")
+
+    # save the input data
+    prefix = 'elprices_benchmark'
+    timestamp_format = "{:%Y%m%dT%H%M}"
+    timestamp = timestamp_format.format(datetime.now())
+    output_filename = f"{prefix}__{timestamp}.pickle"
+    with open(output_filename, 'wb') as handle:
+        pickle.dump(all_electricity_prices, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    print("Finished saving el prices")
+
+    prefix = 'NGprices_benchmark'
+    timestamp_format = "{:%Y%m%dT%H%M}"
+    timestamp = timestamp_format.format(datetime.now())
+    output_filename = f"{prefix}__{timestamp}.pickle"
+    with open(output_filename, 'wb') as handle:
+        pickle.dump(all_gas_prices, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    print("Finished saving NG prices")
+
+    # ------------------------------------ END of script ---------------------------------------------------------------
+    print("End of the script")
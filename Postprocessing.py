@@ -1,132 +1,96 @@
 import pickle
 import matplotlib.pyplot as plt
-from pathlib import Path
 import pandas as pd
 import os
+from result_store import load_scenario_dict
+from result_export import scenario_runs, long_format, select_parameters, export_energy_flows, default_chunk_rows
+from kpi_catalog import register_scenario_dict
+from functions import run_statistics
 
-# load required energy price data:
-reporoot_dir = Path(__file__).resolve().parent
-all_electricity_prices = {
-    'MeanLow-VarLow': pd.read_excel(os.path.join(reporoot_dir,
-                                                 r'input_data/Model_price_data_python_v5.xlsx'),
-                                    sheet_name='MEANlow_VARlow', header=0, index_col=0,
-                                    usecols='A,F'),
-    'MeanHigh-VarLow': pd.read_excel(os.path.join(reporoot_dir,
-                                                  r'input_data/Model_price_data_python_v5.xlsx'),
-                                     sheet_name='MEANhigh_VARlow', header=0, index_col=0,
-                                     usecols='A,F'),
-    'MeanLow-VarHigh': pd.read_excel(os.path.join(reporoot_dir,
-                                                  r'input_data/Model_price_data_python_v5.xlsx'),
-                                     sheet_name='MEANlow_VARhigh', header=0, index_col=0,
-                                     usecols='A,F'),
-    'MeanHigh-VarHigh': pd.read_excel(os.path.join(reporoot_dir,
-                                                   r'input_data/Model_price_data_python_v5.xlsx'),
-                                      sheet_name='MEANhigh_VARhigh', header=0, index_col=0,
-                                      usecols='A,F')
-}
+# define the runs of which the hourly energy flows are exported (all price and CAPEX scenarios of these heat pump
+# integration scenarios, system and amplification of the electricity prices) and the end of their file names
+hourly_flows_HPtypes = ['PlugIn']
+hourly_flows_system = 'new system'
+hourly_flows_amp = 'original'
+hourly_flows_suffix = '_SAminload_20241129T0759'
+# define the file extension of the hourly energy flows ('.csv', '.csv.gz' for compressed csv files or '.npz' for
+# compressed numpy archives with one array per column, which are written several times faster), the number of worker
+# processes that write them (1: one file after another) and the number of time steps written at once
+hourly_flows_extension = '.csv'
+export_workers = 4
+export_chunk_rows = default_chunk_rows
 
-all_gas_prices = {
-    'MeanLow-VarLow-GP1.6to1': pd.read_excel(os.path.join(reporoot_dir,
-                                                          r'input_data/Model_price_data_python_v5.xlsx'),
-                                             sheet_name='MEANlow_VARlow', header=0, index_col=0,
-                                             usecols='A,K'),
-    'MeanLow-VarLow-GP1to1': pd.read_excel(os.path.join(reporoot_dir,
-                                                        r'input_data/Model_price_data_python_v5.xlsx'),
-                                           sheet_name='MEANlow_VARlow', header=0, index_col=0,
-                                           usecols='A,L'),
-    'MeanHigh-VarLow-GP1.6to1': pd.read_excel(os.path.join(reporoot_dir,
-                                                           r'input_data/Model_price_data_python_v5.xlsx'),
-                                              sheet_name='MEANhigh_VARlow', header=0, index_col=0,
-                                              usecols='A,K'),
-    'MeanHigh-VarLow-GP1to1': pd.read_excel(os.path.join(reporoot_dir,
-                                                         r'input_data/Model_price_data_python_v5.xlsx'),
-                                            sheet_name='MEANhigh_VARlow', header=0, index_col=0,
-                                            usecols='A,L'),
-    'MeanLow-VarHigh-GP1.6to1': pd.read_excel(os.path.join(reporoot_dir,
-                                                           r'input_data/Model_price_data_python_v5.xlsx'),
-                                              sheet_name='MEANlow_VARhigh', header=0, index_col=0,
-                                              usecols='A,K'),
-    'MeanLow-VarHigh-GP1to1': pd.read_excel(os.path.join(reporoot_dir,
-                                                         r'input_data/Model_price_data_python_v5.xlsx'),
-                                            sheet_name='MEANlow_VARhigh', header=0, index_col=0,
-                                            usecols='A,L'),
-    'MeanHigh-VarHigh-GP1.6to1': pd.read_excel(os.path.join(reporoot_dir,
-                                                            r'input_data/Model_price_data_python_v5.xlsx'),
-                                               sheet_name='MEANhigh_VARhigh', header=0, index_col=0,
-                                               usecols='A,K'),
-    'MeanHigh-VarHigh-GP1to1': pd.read_excel(os.path.join(reporoot_dir,
-                                                          r'input_data/Model_price_data_python_v5.xlsx'),
-                                             sheet_name='MEANhigh_VARhigh', header=0, index_col=0,
-                                             usecols='A,L')
-}
-# converting index into Datetime index
-for gas_use_cost_scenario in [
-    'MeanLow-VarLow-GP1.6to1', 'MeanLow-VarLow-GP1to1',
-    'MeanHigh-VarLow-GP1.6to1',
-    'MeanHigh-VarLow-GP1to1',
-    'MeanLow-VarHigh-GP1.6to1', 'MeanLow-VarHigh-GP1to1',
-    'MeanHigh-VarHigh-GP1.6to1', 'MeanHigh-VarHigh-GP1to1'
-]:
-    all_gas_prices[gas_use_cost_scenario].index = pd.to_datetime(all_gas_prices[gas_use_cost_scenario].index,
-                                                                 dayfirst=True,
-                                                                 format='mixed')  # format='%d.%m.%Y %H:%M'
-# define scenarios:
-HP_integration_scenarios = ['FullyIntegrated', 'PlugIn']
-el_price_scenarios = [
-    'MeanLow-VarLow',
-    'MeanHigh-VarLow',
-    'MeanLow-VarHigh',
-    'MeanHigh-VarHigh'
-]
-gas_use_cost_scenarios = [
-    'MeanLow-VarLow-GP1.6to1', 'MeanLow-VarLow-GP1to1',
-    'MeanHigh-VarLow-GP1.6to1', 'MeanHigh-VarLow-GP1to1',
-    'MeanLow-VarHigh-GP1.6to1',
-    'MeanLow-VarHigh-GP1to1',
-    'MeanHigh-VarHigh-GP1.6to1', 'MeanHigh-VarHigh-GP1to1'
-]
-capex_scenarios = ['HighHP-LowRest', 'LowHP-HighRest']
+# folder of the result store written by Modelruns.py (None: read the pickle file given below)
+result_store_dir = 'result_store'
+# KPI catalog of Modelruns.py (see kpi_catalog.py) in which the runs of the pickle file are registered under the name of
+# the file, so that their KPIs can be compared with other sweeps without loading the file again (None: not registered)
+kpi_catalog_file = 'kpi_catalog.sqlite'
 
-hours = 8000
+# parameters of the results, the run statistics and the aggregated energy flows csv files
+result_parameters = ['Optimal result', 'CAPEX', 'OPEX', 'scope 1 emissions', 'required space',
+                     'CHP excess heat gen [MWh]', 'Heat pump size [MW]', 'ElB size [MW]',
+                     'Battery size [MWh]', 'TES size [MWh]', 'electrolyser size [MW]',
+                     'Hydrogen boiler size [MW]', 'Hydrogen storage size [MWh]',
+                     'Simultaneous charging and discharging hours battery',
+                     'Simultaneous charging and discharging hours TES',
+                     'Simultaneous charging and discharging hours H2S',
+                     'GT excess electricity gen [MWh]', 'GT electricity gen to grid [MWh]',
+                     'total natural gas consumption [MWh]', 'grid to process [MWh]',
+                     ]
+statistics_parameters = ['build time [s]', 'solve time [s]', 'peak memory [MB]', 'from cache'] + run_statistics + \
+                        ['run statistics of', 'solve time representative periods [s]'] + \
+                        [name + ' representative periods' for name in run_statistics]
+flow_parameters = ['CHP heat gen to CP [MWh]', 'GT electricity gen to process [MWh]',
+                   'CHP heat gen to TES [MWh]', 'CHP excess heat gen [MWh]', 'GT electricity gen to HP [MWh]',
+                   'GT electricity gen to battery [MWh]', 'GT electricity gen to ElB [MWh]',
+                   'GT excess electricity gen [MWh]',
+                   'GT electricity gen to H2E [MWh]',
+                   'GT electricity gen to grid [MWh]',
+                   'total natural gas consumption [MWh]', 'grid to process [MWh]', 'grid to battery [MWh]',
+                   'grid to electric boiler [MWh]', 'grid to electrolyser [MWh]', 'grid to HP [MWh]',
+                   'ElB gen to CP [MWh]', 'ElB gen to TES [MWh]', 'battery to ElB [MWh]',
+                   'battery to electrolyser [MWh]', 'battery to HP [MWh]',
+                   'battery to grid [MWh]', 'battery to process [MWh]', 'TES to CP [MWh]',
+                   'H2 from electrolyser to boiler [MWh]',
+                   'H2 from electrolyser to storage [MWh]', 'Hydrogen boiler to CP [MWh]',
+                   'H2 from storage to boiler [MWh]', 'Heat from HP to CP [MWh]',
+                   'Heat from HP to TES [MWh]',
+                   ]
 
 # ---------------------- Access the results and export them to csv files (post processing) -----------------------------
-# open pickle file with results dictionary
-# insert name of pickle file which should be converted
-for filename in ['outputs_with_CHP_minload0%_opt005__20241129T0759']:
-    with open(filename + '.pickle', 'rb') as handle:
-        all_scenarios_dict = pickle.load(handle)
+# (the worker processes that write the hourly energy flows import this file, so the export only runs in the main
+# process)
+if __name__ == '__main__':
+    if result_store_dir is not None:
+        # rebuild the results dictionary of the plug-in runs from the result store (without the energy flows, which
+        # are read by the processes that write them)
+        filename = os.path.basename(os.path.normpath(result_store_dir))
+        all_scenarios_dict = load_scenario_dict(result_store_dir, energy_flows=False)[0]
+    else:
+        # open pickle file with results dictionary
+        # insert name of pickle file which should be converted
+        for filename in ['outputs_with_CHP_minload0%_opt005__20241129T0759']:
+            with open(filename + '.pickle', 'rb') as handle:
+                all_scenarios_dict = pickle.load(handle)
+            if kpi_catalog_file is not None:
+                register_scenario_dict(kpi_catalog_file, filename, all_scenarios_dict)
+
+    # flatten the results of all runs (both heat pump scenarios) into one long-format table, from which the results,
+    # the run statistics and the aggregated energy flows are selected
+    results_long_df = long_format(all_scenarios_dict)
+    results_df = select_parameters(results_long_df, result_parameters)
+    # the statistics of the runs (build and solve time, peak memory, model size, solver status, MIP gap and nodes) in
+    # the same format as the results, so that they can be joined with the KPIs
+    run_statistics_df = select_parameters(results_long_df, statistics_parameters)
+    run_statistics_df.to_csv('run_statistics_' + filename + '.csv', index=False)
+    print('Saved csv file containing the run statistics.')
 
-# create the dataframe for files containing both heat pump scenarios
-results_df = pd.DataFrame.from_records(
-    [
-        (HPtype, ELscenario, NGscenario, CAPEXscenario, system, amp, parameter, value)
-        for HPtype, ELscenario_dict in all_scenarios_dict.items()
-        for ELscenario, NGscenario_dict in ELscenario_dict.items()
-        for NGscenario, CAPEXscenario_dict in NGscenario_dict.items()
-        for CAPEXscenario, system_dict in CAPEXscenario_dict.items()
-        for system, amp_dict in system_dict.items()
-        for amp, parameter_dict in amp_dict.items()
-        for parameter, value in parameter_dict['results'].items()
-        if
-        parameter in ['Optimal result', 'CAPEX', 'OPEX', 'scope 1 emissions', 'required space',
-                      'CHP excess heat gen [MWh]', 'Heat pump size [MW]', 'ElB size [MW]',
-                      'Battery size [MWh]', 'TES size [MWh]', 'electrolyser size [MW]',
-                      'Hydrogen boiler size [MW]', 'Hydrogen storage size [MWh]',
-                      'Simultaneous charging and discharging hours battery',
-                      'Simultaneous charging and discharging hours TES',
-                      'Simultaneous charging and discharging hours H2S',
-                      'GT excess electricity gen [MWh]', 'GT electricity gen to grid [MWh]',
-                      'total natural gas consumption [MWh]', 'grid to process [MWh]',
-                      ]
-    ],
-    columns=(['HPtype', 'ELscenario', 'NGscenario', 'CAPEXscenario', 'system', 'amp', 'parameter', 'value'])
-)
-# store the dataframe as csv file
-filename = 'results_' + \
-           filename \
-           + '.csv'
-results_csv_data = results_df.to_csv(filename, index=False)
-print('Saved csv file containing the results.')
+    # store the dataframe as csv file
+    filename = 'results_' + \
+               filename \
+               + '.csv'
+    results_csv_data = results_df.to_csv(filename, index=False)
+    print('Saved csv file containing the results.')
 
 # create the dataframe for files containing just ONE SCENARIO
 # insert name of pickle file which should be converted
@@ -165,42 +129,14 @@ print('Saved csv file containing the results.')
 # results_csv_data = results_df.to_csv(filename, index=False)
 # print('Saved csv file containing the results.')
 
-# create the AGGREGATED ENERGY FLOWS dataframe
-results_flows_df = pd.DataFrame.from_records(
-    [
-        (HPtype, ELscenario, NGscenario, CAPEXscenario, system, amp, parameter, value)
-        for HPtype, ELscenario_dict in all_scenarios_dict.items()
-        for ELscenario, NGscenario_dict in ELscenario_dict.items()
-        for NGscenario, CAPEXscenario_dict in NGscenario_dict.items()
-        for CAPEXscenario, system_dict in CAPEXscenario_dict.items()
-        for system, amp_dict in system_dict.items()
-        for amp, parameter_dict in amp_dict.items()
-        for parameter, value in parameter_dict['results'].items()
-        if parameter in ['CHP heat gen to CP [MWh]', 'GT electricity gen to process [MWh]',
-                         'CHP heat gen to TES [MWh]', 'CHP excess heat gen [MWh]', 'GT electricity gen to HP [MWh]',
-                         'GT electricity gen to battery [MWh]', 'GT electricity gen to ElB [MWh]',
-                         'GT excess electricity gen [MWh]',
-                         'GT electricity gen to H2E [MWh]',
-                         'GT excess electricity gen [MWh]', 'GT electricity gen to grid [MWh]',
-                         'total natural gas consumption [MWh]', 'grid to process [MWh]', 'grid to battery [MWh]',
-                         'grid to electric boiler [MWh]', 'grid to electrolyser [MWh]', 'grid to HP [MWh]',
-                         'ElB gen to CP [MWh]', 'ElB gen to TES [MWh]', 'battery to ElB [MWh]',
-                         'battery to electrolyser [MWh]', 'battery to HP [MWh]',
-                         'battery to grid [MWh]', 'battery to process [MWh]', 'TES to CP [MWh]',
-                         'H2 from electrolyser to boiler [MWh]',
-                         'H2 from electrolyser to storage [MWh]', 'Hydrogen boiler to CP [MWh]',
-                         'H2 from storage to boiler [MWh]', 'Heat from HP to CP [MWh]',
-                         'Heat from HP to TES [MWh]',
-                         ]
-    ],
-    columns=(['HPtype', 'ELscenario', 'NGscenario', 'CAPEXscenario', 'system', 'amp', 'parameter', 'value'])
-)
-# print(results_flows_df)
-filename_flows = 'aggregated_energyflows_' + \
-                 filename \
-                 + '.csv'
-results_csv_data = results_flows_df.to_csv(filename_flows, index=False)
-print('Saved csv file containing the results.')
+    # create the AGGREGATED ENERGY FLOWS dataframe
+    results_flows_df = select_parameters(results_long_df, flow_parameters)
+    # print(results_flows_df)
+    filename_flows = 'aggregated_energyflows_' + \
+                     filename \
+                     + '.csv'
+    results_csv_data = results_flows_df.to_csv(filename_flows, index=False)
+    print('Saved csv file containing the results.')
 
 # create the AGGREGATED ENERGY FLOWS dataframe for ONE scenario
 # insert name of pickle file which should be converted
@@ -244,23 +180,20 @@ print('Saved csv file containing the results.')
 # results_csv_data = results_flows_df.to_csv(filename_flows, index=False)
 # print('Saved csv file containing the results.')
 
-# create the HOURLY ENERGY FLOWS dataframe for (plug in of fully integrated) heat pump scenarios
-for HP_integration_scenario in ['PlugIn']:
-    for i, el_price_scenario in enumerate(el_price_scenarios):
-        price_el_hourly = all_electricity_prices[el_price_scenario]
-        for j in [2 * i, 2 * i + 1]:
-            gas_use_cost_scenario = gas_use_cost_scenarios[j]
-            price_NG_use = all_gas_prices[gas_use_cost_scenario]
-            for capex_scenario in capex_scenarios:
-                hourly_energyflows = all_scenarios_dict[HP_integration_scenario][el_price_scenario][
-                    gas_use_cost_scenario][capex_scenario]['new system']['original']['energy flows']
-
-                filename_hourly_flows = 'hourly_enflows_' + HP_integration_scenario + gas_use_cost_scenario + \
-                                        capex_scenario + \
-                                        '_SAminload_20241129T0759' \
-                                        + '.csv'
-                results_csv_data = hourly_energyflows.to_csv(filename_hourly_flows, index=True)
-                print('Saved csv file containing the results.')
+    # export the HOURLY ENERGY FLOWS of the selected (plug in or fully integrated) heat pump scenarios
+    hourly_energyflows = {}
+    for keys, run in scenario_runs(all_scenarios_dict):
+        HP_integration_scenario, el_price_scenario, gas_use_cost_scenario, capex_scenario, system, amp = keys
+        if HP_integration_scenario in hourly_flows_HPtypes and system == hourly_flows_system and \
+                amp == hourly_flows_amp:
+            filename_hourly_flows = 'hourly_enflows_' + HP_integration_scenario + gas_use_cost_scenario + \
+                                    capex_scenario + \
+                                    hourly_flows_suffix \
+                                    + hourly_flows_extension
+            hourly_energyflows[filename_hourly_flows] = \
+                run['energy flows'] if result_store_dir is None else (result_store_dir, list(keys))
+    for filename_hourly_flows in export_energy_flows(hourly_energyflows, export_workers, export_chunk_rows):
+        print('Saved csv file containing the results.')
 
 # create the HOURLY ENERGY FLOWS dataframe for one (plug in of fully integrated) heat pump scenario
 # insert name of pickle file which should be converted
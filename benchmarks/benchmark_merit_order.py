@@ -0,0 +1,37 @@
+import pandas as pd
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import optimisation_run_benchmark_CHP
+from benchmarks.shipped_inputs import load_shipped_data
+
+# Compares the runtime and objective value of the benchmark system solved as MILP (build='rules') with its merit-order
+# dispatch without a solver (build='merit_order', dispatch_benchmark_CHP) for every price scenario of Modelruns.py.
+
+# define settings of the benchmark
+hours = 8000  # operational hours (=length of the optimisation)
+GT_min_load = 0.3  # minimal load factor, [% of Pnom]
+price_scenarios = {'MeanLow-VarLow-EGR1.6': ('MEANlow_VARlow', 'K'), 'MeanLow-VarLow-EGR1': ('MEANlow_VARlow', 'L'),
+                   'MeanHigh-VarLow-EGR1.6': ('MEANhigh_VARlow', 'K'), 'MeanHigh-VarLow-EGR1': ('MEANhigh_VARlow', 'L'),
+                   'MeanLow-VarHigh-EGR1.6': ('MEANlow_VARhigh', 'K'), 'MeanLow-VarHigh-EGR1': ('MEANlow_VARhigh', 'L'),
+                   'MeanHigh-VarHigh-EGR1.6': ('MEANhigh_VARhigh', 'K'),
+                   'MeanHigh-VarHigh-EGR1': ('MEANhigh_VARhigh', 'L')}
+
+benchmark = {}
+for price_scenario, sheet_and_column in price_scenarios.items():
+    heat_demand_orig, price_el_hourly, price_NG_use = load_shipped_data(*sheet_and_column)
+    for build in ['rules', 'merit_order']:
+        begin = time.time()
+        results = optimisation_run_benchmark_CHP(heat_demand_orig, price_el_hourly.copy(), price_NG_use, [],
+                                                 ['original'], GT_min_load, hours,
+                                                 build=build)['benchmark system']['original']['results']
+        benchmark[(price_scenario, build)] = {'runtime [s]': time.time() - begin,
+                                              'objective': results['Optimal result']}
+
+benchmark = pd.DataFrame(benchmark).T
+print(benchmark)
+objective = benchmark['objective'].unstack()
+print("Relative objective difference of the merit-order dispatch:")
+print(objective['merit_order'] / objective['rules'] - 1)
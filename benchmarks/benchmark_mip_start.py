@@ -0,0 +1,38 @@
+import pandas as pd
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import optimisation_run_PI_CHP, optimisation_run_benchmark_CHP
+from benchmarks.shipped_inputs import load_shipped_data
+
+# Compares the solve time of the plug-in model without and with the dispatch of the benchmark system as MIP start and
+# its objective as cutoff (benchmark_start), per price and CAPEX scenario.
+
+# define settings of the benchmark
+hours = 8000  # operational hours (=length of the optimisation)
+GT_min_load = 0.3  # minimal load factor, [% of Pnom]
+linearize = False
+price_scenarios = {'MeanLow-VarHigh-EGR1.6': ('MEANlow_VARhigh', 'K'), 'MeanHigh-VarLow-EGR1': ('MEANhigh_VARlow', 'L')}
+capex_scenarios = {
+    'HighHP-LowRest': {'ElB': 30000, 'Bat': 180e3, 'TES': 15000, 'HP': 500e3, 'H2E': 760e3, 'H2B': 35000, 'H2S': 10000},
+    'LowHP-HighRest': {'ElB': 30000, 'Bat': 320e3, 'TES': 40000, 'HP': 300e3, 'H2E': 980e3, 'H2B': 35000, 'H2S': 10000}}
+
+benchmark = {}
+for price_scenario, sheet_and_column in price_scenarios.items():
+    heat_demand_orig, price_el_hourly, price_NG_use = load_shipped_data(*sheet_and_column)
+    benchmark_result = optimisation_run_benchmark_CHP(heat_demand_orig, price_el_hourly.copy(), price_NG_use, [],
+                                                      ['original'], GT_min_load, hours)
+    for capex_scenario, capex_data in capex_scenarios.items():
+        for mode, benchmark_start in [('without start', None), ('benchmark start', benchmark_result)]:
+            results = optimisation_run_PI_CHP(heat_demand_orig, price_el_hourly.copy(), price_NG_use, [],
+                                              ['original'], GT_min_load, hours, capex_data, linearize=linearize,
+                                              benchmark_start=benchmark_start)['new system']['original']['results']
+            benchmark[(price_scenario, capex_scenario, mode)] = {'solve time [s]': results['solve time [s]'],
+                                                                 'objective': results['Optimal result']}
+
+benchmark = pd.DataFrame(benchmark).T
+print(benchmark)
+solve_time = benchmark['solve time [s]'].unstack()
+print("Solve time speedup per scenario:")
+print(solve_time['without start'] / solve_time['benchmark start'])
@@ -0,0 +1,62 @@
+import pandas as pd
+import numpy as np
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import optimisation_run_PI_CHP, optimisation_run_benchmark_CHP
+from benchmarks.shipped_inputs import load_shipped_data
+from result_store import save_scenario_result, load_energy_flows
+
+# Compares the file size, load time and memory of the energy flows in the result store stored in double precision
+# (default) with the compact storage (compact='float32' or a quantisation step, see compact_columns in
+# result_store.py), loaded as dense columns and with sparse=True, together with the largest deviation from the
+# original energy flows. The energy flows are those of one PI run and one benchmark run.
+
+# define settings of the benchmark
+PI_hours = 720  # operational hours of the PI run (matrix model, solved with highs)
+benchmark_hours = 8000  # operational hours of the benchmark run (merit-order dispatch)
+GT_min_load = 0.3  # minimal load factor, [% of Pnom]
+el_price_sheet, gas_price_column = 'MEANlow_VARhigh', 'K'
+capex_data = {'ElB': 30000, 'Bat': 180e3, 'TES': 15000, 'HP': 500e3, 'H2E': 760e3, 'H2B': 35000, 'H2S': 10000}
+solver = {'solver': 'highs', 'tee': False, 'time_limit': 300, 'mip_gap': 0.01}
+compact_options = [None, 'float32', 1e-4]
+
+heat_demand_orig, price_el_hourly, price_NG_use = load_shipped_data(el_price_sheet, gas_price_column)
+with contextlib.redirect_stdout(io.StringIO()):
+    runs = {'PlugIn': optimisation_run_PI_CHP(heat_demand_orig, price_el_hourly, price_NG_use, [], ['original'],
+                                              GT_min_load, PI_hours, capex_data, linearize=True, build='matrix',
+                                              solver=solver),
+            'Benchmark': optimisation_run_benchmark_CHP(heat_demand_orig, price_el_hourly, price_NG_use, [],
+                                                        ['original'], GT_min_load, benchmark_hours,
+                                                        build='merit_order')}
+
+benchmark = {}
+with tempfile.TemporaryDirectory() as store_dir:
+    for compact in compact_options:
+        for HPtype, run in runs.items():
+            system = list(run)[0]
+            keys = [HPtype, str(compact), '', '', system, 'original']
+            save_scenario_result(store_dir, *keys[:4], run, compact=compact)
+            original = run[system]['original']['energy flows']
+            begin = time.time()
+            energy_flows = load_energy_flows(store_dir, keys)
+            load_time = time.time() - begin
+            sparse_energy_flows = load_energy_flows(store_dir, keys, sparse=True)
+            filename = os.path.join(store_dir, 'energy_flows', '__'.join(keys) + '.npz')
+            benchmark[(HPtype, str(compact))] = {
+                'file size [kB]': os.path.getsize(filename) / 1e3, 'load time [s]': load_time,
+                'memory [MB]': energy_flows.memory_usage(index=False).sum() / 1e6,
+                'memory sparse [MB]': sparse_energy_flows.memory_usage(index=False).sum() / 1e6,
+                'max. deviation': np.abs(energy_flows.to_numpy(dtype=float) - original.to_numpy()).max()}
+            print(HPtype, compact, benchmark[(HPtype, str(compact))])
+
+benchmark = pd.DataFrame(benchmark).T
+benchmark.index.names = ['run', 'compact']
+pd.set_option('display.width', 200)
+print(benchmark)
@@ -0,0 +1,74 @@
+import pandas as pd
+import numpy as np
+import os
+import pickle
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from kpi_catalog import register_scenario_dict, query_kpis
+
+# Compares reading a few KPIs of all runs of several sweeps from the pickle files of the sweeps (scenario_dict with
+# the energy flows, as saved by Modelruns.py with save_pickles) with one query of the KPI catalog (query_kpis). The
+# results and energy flows are random; no solver is needed.
+
+# define settings of the benchmark
+sweep_counts = [2, 8, 32]  # number of sweeps
+el_price_scenarios = ['MeanLow-VarLow', 'MeanHigh-VarLow', 'MeanLow-VarHigh', 'MeanHigh-VarHigh']
+gas_price_ratios = ['EGR1.6', 'EGR1']
+capex_scenarios = ['HighHP-LowRest', 'LowHP-HighRest']
+n_steps = 16000  # number of time steps (half hours)
+n_columns = 20  # number of energy flows per run
+n_parameters = 80  # number of scalar results per run
+kpis = ['Optimal result', 'CAPEX', 'OPEX', 'scope 1 emissions', 'Battery size [MWh]', 'TES size [MWh]']
+
+
+def random_scenario_dict(rng, index):
+    # scenario_dict of a sweep with random results and energy flows
+    parameters = kpis + ['parameter ' + str(number) for number in range(n_parameters - len(kpis))]
+    return {'PlugIn': {el: {el + '-' + ratio: {capex: {'new system': {'original': {
+        'results': dict(zip(parameters, rng.uniform(0, 1e6, n_parameters))),
+        'energy flows': pd.DataFrame(rng.uniform(0, 10, (n_steps, n_columns)), index=index)}}}
+        for capex in capex_scenarios} for ratio in gas_price_ratios} for el in el_price_scenarios}}
+
+
+benchmark = {}
+rng = np.random.default_rng(0)
+index = pd.date_range('2019-01-01', periods=n_steps, freq='30min')
+with tempfile.TemporaryDirectory() as directory:
+    catalog_file = os.path.join(directory, 'kpi_catalog.sqlite')
+    sweeps = []
+    for n in sweep_counts:
+        while len(sweeps) < n:
+            sweep = 'outputs_with_CHP_minload30%_opt005__' + str(len(sweeps))
+            scenario_dict = random_scenario_dict(rng, index)
+            with open(os.path.join(directory, sweep + '.pickle'), 'wb') as handle:
+                pickle.dump(scenario_dict, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            register_scenario_dict(catalog_file, sweep, scenario_dict, settings={'hours': 8000})
+            sweeps.append(sweep)
+        begin = time.time()
+        rows = []
+        for sweep in sweeps:
+            with open(os.path.join(directory, sweep + '.pickle'), 'rb') as handle:
+                scenario_dict = pickle.load(handle)
+            rows += [[sweep, HPtype, el, gas, capex] + [scenario_dict[HPtype][el][gas][capex]['new system']['original']
+                                                        ['results'][kpi] for kpi in kpis]
+                     for HPtype in scenario_dict for el in scenario_dict[HPtype] for gas in scenario_dict[HPtype][el]
+                     for capex in scenario_dict[HPtype][el][gas]]
+        pickle_time = time.time() - begin
+        begin = time.time()
+        table = query_kpis(catalog_file, kpis, sweeps=sweeps)
+        query_time = time.time() - begin
+        benchmark[n] = {'pickle files [MB]': sum(os.path.getsize(os.path.join(directory, sweep + '.pickle'))
+                                                  for sweep in sweeps) / 1e6,
+                        'catalog [MB]': os.path.getsize(catalog_file) / 1e6, 'unpickle [s]': pickle_time,
+                        'query [s]': query_time, 'speedup': pickle_time / query_time,
+                        'identical': np.array_equal(np.array([row[5:] for row in rows]), table[kpis].to_numpy())}
+        print(n, benchmark[n])
+
+benchmark = pd.DataFrame(benchmark).T
+benchmark.index.name = 'sweeps'
+pd.set_option('display.width', 200)
+print(benchmark)
@@ -0,0 +1,53 @@
+import pyomo.environ as pm
+import pandas as pd
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import PI_CHP_constants, build_PI_model, solve_PI_lazy_binaries
+from benchmarks.shipped_inputs import load_shipped_inputs
+
+# Compares the plug-in model with binaries at all time steps with the lazy binaries mode, in which the binaries are
+# only added at the time steps where storages charge and discharge simultaneously or the grid connection is used in
+# both directions (solve_PI_lazy_binaries).
+
+# define settings of the benchmark
+hours = 8000  # operational hours (=length of the optimisation)
+GT_min_load = 0.3  # minimal load factor, [% of Pnom]
+linearize = True
+capex_scenarios = {
+    'HighHP-LowRest': {'ElB': 30000, 'Bat': 180e3, 'TES': 15000, 'HP': 500e3, 'H2E': 760e3, 'H2B': 35000, 'H2S': 10000},
+    'LowHP-HighRest': {'ElB': 30000, 'Bat': 320e3, 'TES': 40000, 'HP': 300e3, 'H2E': 980e3, 'H2B': 35000, 'H2S': 10000}}
+time_step = 0.5  # in hours
+
+H_dem, P_dem, price_el_half_hourly, price_NG_use_half_hourly = load_shipped_inputs(hours)
+
+benchmark = {}
+for capex_scenario, capex_data in capex_scenarios.items():
+    c = PI_CHP_constants(capex_data, H_dem.max().iloc[0])
+
+    def build_model(binary_steps=None):
+        return build_PI_model(H_dem.iloc[:, 0].to_numpy(), P_dem.iloc[:, 0].to_numpy(),
+                              price_el_half_hourly.to_numpy(), price_NG_use_half_hourly.to_numpy(), GT_min_load, c,
+                              time_step, linearize=linearize, binary_steps=binary_steps)
+
+    for mode in ['all binaries', 'lazy binaries']:
+        opt = pm.SolverFactory('gurobi')
+        opt.options["MIPGap"] = 0.0005
+        begin = time.time()
+        if mode == 'lazy binaries':
+            m, results, binary_steps, iterations = solve_PI_lazy_binaries(build_model, opt, tee=False)
+            binaries = sum(len(steps) for steps in binary_steps.values())
+        else:
+            m = build_model()
+            opt.solve(m, tee=False)
+            iterations, binaries = 1, 4 * len(m.T)
+        benchmark[(capex_scenario, mode)] = {'build and solve time [s]': time.time() - begin,
+                                             'objective': pm.value(m.objective), 'iterations': iterations,
+                                             'binary variables': binaries}
+        print(capex_scenario, mode, benchmark[(capex_scenario, mode)])
+        del m
+
+benchmark = pd.DataFrame(benchmark).T
+print(benchmark)
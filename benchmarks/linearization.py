@@ -0,0 +1,53 @@
+import pyomo.environ as pm
+import pandas as pd
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import PI_CHP_constants, build_PI_model
+from benchmarks.shipped_inputs import load_shipped_inputs
+
+# Compares the solve time and objective value of the plug-in model with the products of capacity and binary
+# variables (mixed-integer quadratic program) and of its linearised big-M reformulation (MILP, linearize=True).
+
+# define settings of the benchmark
+hours = 8000  # operational hours (=length of the optimisation)
+GT_min_load = 0.3  # minimal load factor, [% of Pnom]
+capex_scenarios = {
+    'HighHP-LowRest': {'ElB': 30000, 'Bat': 180e3, 'TES': 15000, 'HP': 500e3, 'H2E': 760e3, 'H2B': 35000, 'H2S': 10000},
+    'LowHP-HighRest': {'ElB': 30000, 'Bat': 320e3, 'TES': 40000, 'HP': 300e3, 'H2E': 980e3, 'H2B': 35000, 'H2S': 10000}}
+time_step = 0.5  # in hours
+
+H_dem, P_dem, price_el_half_hourly, price_NG_use_half_hourly = load_shipped_inputs(hours)
+
+benchmark = {}
+for capex_scenario, capex_data in capex_scenarios.items():
+    c = PI_CHP_constants(capex_data, H_dem.max().iloc[0])
+    for linearize in [False, True]:
+        m = build_PI_model(H_dem.iloc[:, 0].to_numpy(), P_dem.iloc[:, 0].to_numpy(), price_el_half_hourly.to_numpy(),
+                           price_NG_use_half_hourly.to_numpy(), GT_min_load, c, time_step, linearize=linearize)
+        opt = pm.SolverFactory('gurobi')
+        opt.options["MIPGap"] = 0.0005
+        begin = time.time()
+        opt.solve(m, tee=False)
+        model_type = 'MILP (big-M)' if linearize else 'MIQP (products)'
+        benchmark[(capex_scenario, model_type)] = {
+            'write and solve time [s]': time.time() - begin,
+            'objective': pm.value(m.objective),
+            'Battery size [MWh]': pm.value(m.bat_cap),
+            'TES size [MWh]': pm.value(m.TES_cap),
+            'Hydrogen storage size [MWh]': pm.value(m.H2S_cap)}
+        print(capex_scenario, model_type, benchmark[(capex_scenario, model_type)])
+        del m
+
+benchmark = pd.DataFrame(benchmark).T
+print(benchmark)
+for capex_scenario in capex_scenarios:
+    print(capex_scenario, "- solve time speedup:",
+          benchmark.loc[(capex_scenario, 'MIQP (products)'), 'write and solve time [s]'] /
+          benchmark.loc[(capex_scenario, 'MILP (big-M)'), 'write and solve time [s]'],
+          "- relative objective difference:",
+          abs(benchmark.loc[(capex_scenario, 'MIQP (products)'), 'objective'] -
+              benchmark.loc[(capex_scenario, 'MILP (big-M)'), 'objective']) /
+          abs(benchmark.loc[(capex_scenario, 'MIQP (products)'), 'objective']))
@@ -0,0 +1,56 @@
+import pyomo.environ as pm
+import pandas as pd
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import PI_CHP_constants, build_PI_model, build_PI_matrix, solve_matrix_model, create_solver, \
+    configure_solver, solver_settings
+from benchmarks.shipped_inputs import load_shipped_inputs
+
+# Compares the linearised plug-in model built with Pyomo (build_PI_model) with the same model assembled as sparse
+# matrix (build_PI_matrix) and passed to the solver without Pyomo: build time, peak memory of the build, solve time
+# and objective value for several horizons.
+
+# define settings of the benchmark
+horizons = [168, 720, 2000, 8000]  # operational hours (=length of the optimisation)
+GT_min_load = 0.3  # minimal load factor, [% of Pnom]
+capex_data = {'ElB': 30000, 'Bat': 180e3, 'TES': 15000, 'HP': 500e3, 'H2E': 760e3, 'H2B': 35000, 'H2S': 10000}
+settings = solver_settings({'solver': 'gurobi', 'tee': False})
+time_step = 0.5  # in hours
+
+benchmark = {}
+for hours in horizons:
+    H_dem, P_dem, price_el, price_NG = load_shipped_inputs(hours)
+    H_dem, P_dem = H_dem.iloc[:, 0].to_numpy(), P_dem.iloc[:, 0].to_numpy()
+    c = PI_CHP_constants(capex_data, H_dem.max())
+    for mode in ['pyomo', 'matrix']:
+        tracemalloc.start()
+        begin = time.time()
+        if mode == 'pyomo':
+            m = build_PI_model(H_dem, P_dem, price_el.to_numpy(), price_NG.to_numpy(), GT_min_load, c, time_step,
+                               linearize=True)
+        else:
+            model = build_PI_matrix(H_dem, P_dem, price_el.to_numpy(), price_NG.to_numpy(), GT_min_load, c,
+                                    time_step)
+        build_time = time.time() - begin
+        build_memory = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        begin = time.time()
+        if mode == 'pyomo':
+            opt = create_solver(settings)
+            configure_solver(opt, settings)
+            opt.solve(m, tee=settings['tee'])
+            objective = pm.value(m.objective)
+            del m
+        else:
+            objective = solve_matrix_model(model, settings)[1]
+            del model
+        benchmark[(hours, mode)] = {'build time [s]': build_time, 'peak build memory [MB]': build_memory,
+                                    'transfer and solve time [s]': time.time() - begin, 'objective': objective}
+        print(hours, mode, benchmark[(hours, mode)])
+
+benchmark = pd.DataFrame(benchmark).T
+print(benchmark)
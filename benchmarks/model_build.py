@@ -0,0 +1,50 @@
+import pyomo.environ as pm
+import pandas as pd
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import PI_CHP_constants, build_PI_model_rules, build_PI_model
+from benchmarks.shipped_inputs import load_shipped_inputs
+
+# Compares the construction of the plug-in model with per-time-step rules (build_PI_model_rules) and with the
+# array-backed construction (build_PI_model) on the shipped input data. Both models are solved afterwards to check
+# that they give the same objective value.
+
+# define settings of the benchmark
+hours = 8000  # operational hours (=length of the optimisation)
+GT_min_load = 0.3  # minimal load factor, [% of Pnom]
+capex_data = {'ElB': 30000, 'Bat': 180e3, 'TES': 15000, 'HP': 500e3, 'H2E': 760e3, 'H2B': 35000, 'H2S': 10000}
+solve_models = True  # set to False to only compare the build times (no solver licence needed)
+time_step = 0.5  # in hours
+
+H_dem, P_dem, price_el_half_hourly, price_NG_use_half_hourly = load_shipped_inputs(hours)
+c = PI_CHP_constants(capex_data, H_dem.max().iloc[0])
+
+# build (and solve) the model with both construction paths
+benchmark = {}
+for build in ['rules', 'arrays']:
+    begin = time.time()
+    if build == 'rules':
+        m = build_PI_model_rules(H_dem, P_dem, price_el_half_hourly, price_NG_use_half_hourly, GT_min_load, c,
+                                 time_step)
+    else:
+        m = build_PI_model(H_dem.iloc[:, 0].to_numpy(), P_dem.iloc[:, 0].to_numpy(), price_el_half_hourly.to_numpy(),
+                           price_NG_use_half_hourly.to_numpy(), GT_min_load, c, time_step)
+    benchmark[build] = {'build time [s]': time.time() - begin}
+    print("Model build with " + build + " took", benchmark[build]['build time [s]'], "s")
+    if solve_models:
+        opt = pm.SolverFactory('gurobi')
+        opt.options["MIPGap"] = 0.0005
+        begin = time.time()
+        opt.solve(m, tee=False)
+        benchmark[build]['write and solve time [s]'] = time.time() - begin
+        benchmark[build]['objective'] = pm.value(m.objective)
+    del m
+
+print(pd.DataFrame(benchmark))
+print("Build time speedup: ", benchmark['rules']['build time [s]'] / benchmark['arrays']['build time [s]'])
+if solve_models:
+    print("Relative objective difference: ",
+          abs(benchmark['rules']['objective'] - benchmark['arrays']['objective']) / abs(benchmark['rules']['objective']))
@@ -0,0 +1,43 @@
+import pandas as pd
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import optimisation_run_PI_CHP
+from benchmarks.shipped_inputs import load_shipped_data
+
+# Compares a sweep over price and CAPEX scenarios in which the plug-in model is built and transferred to the solver
+# for every scenario with a sweep in which the model is built once and only the prices and CAPEX are updated before
+# re-solving with a persistent solver (persistent={}).
+
+# define settings of the benchmark
+hours = 8000  # operational hours (=length of the optimisation)
+GT_min_load = 0.3  # minimal load factor, [% of Pnom]
+linearize = False
+price_scenarios = {'MeanLow-VarHigh-EGR1.6': ('MEANlow_VARhigh', 'K'), 'MeanHigh-VarLow-EGR1': ('MEANhigh_VARlow', 'L')}
+capex_scenarios = {
+    'HighHP-LowRest': {'ElB': 30000, 'Bat': 180e3, 'TES': 15000, 'HP': 500e3, 'H2E': 760e3, 'H2B': 35000, 'H2S': 10000},
+    'LowHP-HighRest': {'ElB': 30000, 'Bat': 320e3, 'TES': 40000, 'HP': 300e3, 'H2E': 980e3, 'H2B': 35000, 'H2S': 10000}}
+
+input_data = {price_scenario: load_shipped_data(*sheet_and_column)
+              for price_scenario, sheet_and_column in price_scenarios.items()}
+
+benchmark = {}
+for mode, persistent in [('rebuild', None), ('persistent', {})]:
+    for price_scenario, (heat_demand_orig, price_el_hourly, price_NG_use) in input_data.items():
+        for capex_scenario, capex_data in capex_scenarios.items():
+            begin = time.time()
+            results = optimisation_run_PI_CHP(heat_demand_orig, price_el_hourly.copy(), price_NG_use, [], ['original'],
+                                              GT_min_load, hours, capex_data, linearize=linearize,
+                                              persistent=persistent)['new system']['original']['results']
+            benchmark[(price_scenario, capex_scenario, mode)] = {'runtime [s]': time.time() - begin,
+                                                                 'objective': results['Optimal result']}
+
+benchmark = pd.DataFrame(benchmark).T
+print(benchmark)
+runtime = benchmark['runtime [s]'].unstack()
+objective = benchmark['objective'].unstack()
+print("Total runtime rebuild:", runtime['rebuild'].sum(), "persistent:", runtime['persistent'].sum())
+print("Max. relative objective difference:",
+      ((objective['rebuild'] - objective['persistent']).abs() / objective['rebuild'].abs()).max())
@@ -0,0 +1,72 @@
+import pandas as pd
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import optimisation_run_PI_CHP, optimisation_run_benchmark_CHP, peak_memory
+from benchmarks.shipped_inputs import load_shipped_data
+
+# Measures where the time of a run goes: the wall time of input preparation, model build, writing and transfer to
+# the solver, solve, result extraction and post-solve diagnostics of optimisation_run_PI_CHP and
+# optimisation_run_benchmark_CHP for several horizons, together with the peak memory of the run. Every run is done in
+# a fresh process, so the peak memory belongs to that run only. The results can be stored as baseline and later runs
+# are compared with it, so that performance regressions of single phases show up.
+
+# define settings of the benchmark
+horizons = [24, 168, 720, 2000, 8000]  # operational hours (=length of the optimisation)
+GT_min_load = 0.3  # minimal load factor, [% of Pnom]
+linearize = False
+el_price_sheet, gas_price_column = 'MEANlow_VARhigh', 'K'
+capex_data = {'ElB': 30000, 'Bat': 180e3, 'TES': 15000, 'HP': 500e3, 'H2E': 760e3, 'H2B': 35000, 'H2S': 10000}
+solver = {'tee': False}
+# baseline file, whether this run is stored as new baseline and the relative increase of a phase time (and the
+# minimum absolute increase [s]) that is reported as regression
+baseline_file = os.path.join(Path(__file__).resolve().parent, 'phase_timings_baseline.csv')
+save_baseline = False
+regression_tolerance = 0.25
+regression_min_seconds = 0.5
+phases = ['input preparation', 'model build', 'write and transfer', 'solve', 'result extraction', 'diagnostics']
+
+
+def run_case(model, hours):
+    # run one model function for one horizon and return the times of its phases and the peak memory
+    heat_demand_orig, price_el_hourly, price_NG_use = load_shipped_data(el_price_sheet, gas_price_column)
+    timings = {}
+    if model == 'PI':
+        optimisation_run_PI_CHP(heat_demand_orig, price_el_hourly, price_NG_use, [], ['original'], GT_min_load, hours,
+                                capex_data, linearize=linearize, solver=solver, timings=timings)
+    else:
+        optimisation_run_benchmark_CHP(heat_demand_orig, price_el_hourly, price_NG_use, [], ['original'], GT_min_load,
+                                       hours, solver=solver, timings=timings)
+    return dict({phase + ' [s]': timings.get(phase, 0) for phase in phases}, **{'peak memory [MB]': peak_memory()})
+
+
+if __name__ == '__main__':
+    benchmark = {}
+    for model in ['PI', 'benchmark']:
+        for hours in horizons:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                benchmark[(model, hours)] = executor.submit(run_case, model, hours).result()
+            print(model, hours, benchmark[(model, hours)])
+    benchmark = pd.DataFrame(benchmark).T
+    benchmark.index.names = ['model', 'hours']
+    benchmark['total [s]'] = benchmark[[phase + ' [s]' for phase in phases]].sum(axis=1)
+    pd.set_option('display.width', 200)
+    print(benchmark)
+
+    if save_baseline:
+        benchmark.to_csv(baseline_file)
+        print("Stored the baseline in", baseline_file)
+    elif os.path.exists(baseline_file):
+        baseline = pd.read_csv(baseline_file, index_col=[0, 1])
+        baseline = baseline.reindex(benchmark.index)
+        print("Ratio to the baseline:")
+        print(benchmark / baseline)
+        slower = (benchmark > baseline * (1 + regression_tolerance)) & \
+                 (benchmark - baseline > regression_min_seconds)
+        slower = slower.drop(columns='peak memory [MB]')
+        for model, hours, column in slower.stack()[slower.stack()].index:
+            print("Regression:", model, hours, column, baseline.loc[(model, hours), column], "->",
+                  benchmark.loc[(model, hours), column])
@@ -0,0 +1,91 @@
+import pyomo.environ as pm
+import pandas as pd
+import numpy as np
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import PI_CHP_constants, PI_energy_flows, PI_flow_columns, PI_flow_kpis, PI_capacities, PI_results, \
+    annuity
+
+# Compares the post-solve diagnostics and KPIs of optimisation_run_PI_CHP computed in one vectorized pass over the
+# energy flows (PI_results) with the previous element-wise loops and repeated column sums, for one year (16,000 half
+# hours) and several years. The energy flows are random (with many zero flows, so that storages are charged and
+# discharged simultaneously in some time steps); no solver is needed.
+
+# define settings of the benchmark
+step_counts = [16000, 3 * 17520, 5 * 17520]  # number of time steps (half hours)
+capex_data = {'ElB': 30000, 'Bat': 180e3, 'TES': 15000, 'HP': 500e3, 'H2E': 760e3, 'H2B': 35000, 'H2S': 10000}
+time_step = 0.5  # in hours
+zero_share = 0.7  # share of time steps without flow
+
+
+def loop_results(result, m, c):
+    # the diagnostics and KPIs as computed before: loops over the time steps and one sum per KPI
+    grid_P_out = result['Power from grid to electric boiler'] + result['Power from grid to battery'] + \
+                 result['Power from grid to electrolyser'] + result['Power from grid to heat pump'] + \
+                 result['Power from grid to process']
+    simultaneous = {}
+    for storage, charge, discharge in [
+        ('battery', result['Power from grid to battery'] + result['Power from GT to battery'],
+         result['Battery to electrolyser'] + result['Battery to electric boiler'] + result['Battery to heat pump'] +
+         result['Battery to grid'] + result['Battery to process']),
+        ('TES', result['Heat from CHP to TES'] + result['Heat from electric boiler to TES'], result['TES to CP']),
+        ('H2S', result['H2E to H2S'], result['H2S to H2B'])]:
+        hours_with_simultaneous_use = pd.Series(index=charge.index)
+        for i in range(0, len(charge)):
+            if charge.iloc[i] > 0:
+                if discharge.iloc[i] > 0:
+                    hours_with_simultaneous_use.iloc[i] = charge.iloc[i] + discharge.iloc[i]
+        simultaneous[storage] = len(hours_with_simultaneous_use[hours_with_simultaneous_use > 0])
+    hours_with_simultaneous_gridcon_use = pd.Series(index=grid_P_out.index)
+    for i in range(0, len(grid_P_out)):
+        if grid_P_out.iloc[i] > 0.00001:
+            if pm.value(m.P_GT_gr[i]) + pm.value(m.P_bat_gr[i]) > 0.00001:
+                hours_with_simultaneous_gridcon_use.iloc[i] = grid_P_out.iloc[i] + pm.value(m.P_GT_gr[i]) + \
+                                                              pm.value(m.P_bat_gr[i])
+    results = {'CAPEX': pm.value(m.bat_cap) * annuity(c, 'bat') + pm.value(m.ElB_cap) * annuity(c, 'ElB') +
+               pm.value(m.TES_cap) * c['c_TES_C'] * c['disc_rate'] / (1 - (1 + c['disc_rate']) ** -c['TES_lifetime'])
+               + pm.value(m.H2E_cap) * annuity(c, 'H2E') + pm.value(m.H2B_cap) * annuity(c, 'H2B') +
+               pm.value(m.H2S_cap) * annuity(c, 'H2S') + pm.value(m.HP_cap) * annuity(c, 'HP'),
+               'scope 1 emissions': (result['Natural gas consumption GT [MW]'].sum() +
+                                     result['Natural gas consumption GB [MW]'].sum()) * c['EF_ng'] * time_step,
+               'max. power flow from grid [MW]': max(grid_P_out),
+               'Simultaneous bidirectional use of grid connection [hours]': len(
+                   hours_with_simultaneous_gridcon_use[hours_with_simultaneous_gridcon_use > 0]),
+               'Simultaneous charging and discharging hours battery': simultaneous['battery'],
+               'Simultaneous charging and discharging hours TES': simultaneous['TES'],
+               'Simultaneous charging and discharging hours H2S': simultaneous['H2S']}
+    for kpi, columns in PI_flow_kpis.items():
+        results[kpi] = sum(result[column].sum() for column in columns) * time_step
+    return results
+
+
+benchmark = {}
+rng = np.random.default_rng(0)
+for n in step_counts:
+    H_dem = rng.uniform(10, 30, n)
+    values = {name: rng.uniform(0, 5, n) * (rng.uniform(size=n) > zero_share) for name in PI_flow_columns.values()}
+    values.update({name: rng.uniform(1, 10) for name in PI_capacities})
+    m = SimpleNamespace(**values)
+    c = PI_CHP_constants(capex_data, H_dem.max())
+    result = PI_energy_flows(m, pd.date_range('2019-01-01', periods=n, freq='30min'), H_dem, 0.1 * H_dem)
+    begin = time.time()
+    reference = loop_results(result, m, c)
+    loop_time = time.time() - begin
+    begin = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = PI_results(result, {name: values[name] for name in PI_capacities}, 0, c, time_step)
+    vectorized_time = time.time() - begin
+    deviation = max(abs(results[kpi] - reference[kpi]) / max(1, abs(reference[kpi])) for kpi in reference)
+    benchmark[n] = {'loops [s]': loop_time, 'vectorized [s]': vectorized_time, 'speedup': loop_time / vectorized_time,
+                    'max. relative deviation': deviation}
+    print(n, benchmark[n])
+
+benchmark = pd.DataFrame(benchmark).T
+benchmark.index.name = 'time steps'
+print(benchmark)
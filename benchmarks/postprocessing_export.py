@@ -0,0 +1,111 @@
+import pandas as pd
+import numpy as np
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from result_store import save_scenario_result, load_scenario_dict, key_columns
+from result_export import scenario_runs, long_format, select_parameters, export_energy_flows
+
+# Compares the export of a sweep as done before by Postprocessing.py (all energy flows loaded from the result store,
+# results flattened by three nested list comprehensions that check every parameter against a list, hourly energy
+# flows written one after another) with the long-format table (long_format, select_parameters) and the export of the
+# hourly energy flows by worker processes that read them from the store (export_energy_flows), as csv files and as
+# compressed numpy archives ('.npz'). The time to load the sweep is given for comparison. The results and energy flows
+# are random; no solver is needed.
+
+# define settings of the benchmark
+run_counts = [8, 32]  # number of runs of the sweep
+n_steps = 16000  # number of time steps (half hours)
+n_columns = 40  # number of energy flows per run
+n_parameters = 80  # number of scalar results per run, of which a quarter is selected per file
+worker_counts = [1, 4]  # number of worker processes of the export
+extensions = ['.csv', '.npz']  # file formats of the hourly energy flows
+
+
+def loop_export(all_scenarios_dict, parameter_lists, directory):
+    # the export as done before: one nested list comprehension per file, hourly energy flows written one by one
+    for number, parameters in enumerate(parameter_lists):
+        pd.DataFrame.from_records(
+            [(HPtype, ELscenario, NGscenario, CAPEXscenario, system, amp, parameter, value)
+             for HPtype, ELscenario_dict in all_scenarios_dict.items()
+             for ELscenario, NGscenario_dict in ELscenario_dict.items()
+             for NGscenario, CAPEXscenario_dict in NGscenario_dict.items()
+             for CAPEXscenario, system_dict in CAPEXscenario_dict.items()
+             for system, amp_dict in system_dict.items()
+             for amp, parameter_dict in amp_dict.items()
+             for parameter, value in parameter_dict['results'].items()
+             if parameter in parameters],
+            columns=key_columns + ['parameter', 'value']).to_csv(os.path.join(directory, str(number) + '.csv'))
+    for keys, run in scenario_runs(all_scenarios_dict):
+        run['energy flows'].to_csv(os.path.join(directory, '__'.join(keys) + '.csv'), index=True)
+
+
+def vectorized_export(store_dir, parameter_lists, directory, workers, extension):
+    # the export of Postprocessing.py with the long-format table and the export workers
+    all_scenarios_dict = load_scenario_dict(store_dir, energy_flows=False)[0]
+    results_long_df = long_format(all_scenarios_dict)
+    for number, parameters in enumerate(parameter_lists):
+        select_parameters(results_long_df, parameters).to_csv(os.path.join(directory, str(number) + '.csv'))
+    exports = {os.path.join(directory, '__'.join(keys) + extension): (store_dir, list(keys))
+               for keys, _ in scenario_runs(all_scenarios_dict)}
+    list(export_energy_flows(exports, workers))
+
+
+benchmark = {}
+rng = np.random.default_rng(0)
+index = pd.date_range('2019-01-01', periods=n_steps, freq='30min')
+parameters = ['parameter ' + str(number) for number in range(n_parameters)]
+parameter_lists = [parameters[start::4] for start in range(3)]
+for n in run_counts:
+    with tempfile.TemporaryDirectory() as directory:
+        store_dir = os.path.join(directory, 'store')
+        for run in range(n):
+            energy_flows = pd.DataFrame(rng.uniform(0, 10, (n_steps, n_columns)), index=index,
+                                        columns=['flow ' + str(column) for column in range(n_columns)])
+            results = dict(zip(parameters, rng.uniform(0, 1e6, n_parameters)))
+            save_scenario_result(store_dir, 'PlugIn', 'EL' + str(run % 4), 'NG' + str(run), 'CAPEX',
+                                 {'new system': {'original': {'results': results, 'energy flows': energy_flows}}})
+        begin = time.time()
+        all_scenarios_dict = load_scenario_dict(store_dir)[0]
+        load_time = time.time() - begin
+        os.mkdir(os.path.join(directory, 'loop'))
+        begin = time.time()
+        loop_export(all_scenarios_dict, parameter_lists, os.path.join(directory, 'loop'))
+        loop_time = load_time + time.time() - begin
+        for extension in extensions:
+            for workers in worker_counts:
+                export_dir = os.path.join(directory, extension + str(workers))
+                os.mkdir(export_dir)
+                begin = time.time()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    vectorized_export(store_dir, parameter_lists, export_dir, workers, extension)
+                vectorized_time = time.time() - begin
+                # the csv files are compared with the previous export, the numpy archives with the stored energy flows
+                if extension == '.csv':
+                    identical = all(Path(directory, 'loop', filename).read_bytes() ==
+                                    Path(export_dir, filename).read_bytes()
+                                    for filename in os.listdir(os.path.join(directory, 'loop')))
+                else:
+                    identical = True
+                    for keys, run in scenario_runs(all_scenarios_dict):
+                        energy_flows = run['energy flows']
+                        with np.load(os.path.join(export_dir, '__'.join(keys) + extension)) as arrays:
+                            identical &= all(np.array_equal(arrays['column ' + str(position)],
+                                                            energy_flows[column].to_numpy())
+                                             for position, column in enumerate(energy_flows))
+                benchmark[(n, extension, workers)] = {'load sweep [s]': load_time, 'previous export [s]': loop_time,
+                                                      'export [s]': vectorized_time,
+                                                      'speedup': loop_time / vectorized_time,
+                                                      'identical': identical}
+                print(n, extension, workers, benchmark[(n, extension, workers)])
+
+benchmark = pd.DataFrame(benchmark).T
+benchmark.index.names = ['runs', 'format', 'workers']
+pd.set_option('display.width', 200)
+print(benchmark)
@@ -0,0 +1,64 @@
+import pandas as pd
+import numpy as np
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import amplified_prices, price_duration_curves
+
+# Compares the generation of the amplified electricity price profiles (amp_values) with the previous column-by-column
+# loop, which also sorted every profile into duration-curve dataframes and set negative prices to zero with one .loc
+# write per profile, with the vectorized generator (amplified_prices) for increasing numbers of factors k. The
+# prices are random half-hourly prices of one year; no solver is needed.
+
+# define settings of the benchmark
+k_counts = [1, 6, 24, 96]  # number of amplification factors k
+n_steps = 16000  # number of time steps (half hours)
+
+
+def loop_amplified_prices(price_el_half_hourly, amp_values):
+    # the amplified price profiles as generated before
+    price_el_half_hourly_mean = price_el_half_hourly.mean()
+    price_el_half_hourly_sorted = price_el_half_hourly['EP [EUR/MWh]'].sort_values(ascending=False)
+    price_el_half_hourly_sorted_df = pd.DataFrame(price_el_half_hourly_sorted)
+    for k in amp_values:
+        colname = ("amp " + "%.3f") % k
+        price_el_half_hourly[str(colname)] = price_el_half_hourly_mean.iloc[0] + \
+                                             k * (price_el_half_hourly['EP [EUR/MWh]'] -
+                                                  price_el_half_hourly_mean.iloc[0])
+        price_el_half_hourly_sorted[str(colname)] = price_el_half_hourly[str(colname)].sort_values(ascending=False)
+        price_el_half_hourly_sorted_df[str(colname)] = price_el_half_hourly_sorted[str(colname)]
+        price_el_half_hourly_sorted_df = price_el_half_hourly_sorted_df.reset_index(drop=True)
+    price_el_half_hourly_mean_df = pd.DataFrame(price_el_half_hourly.mean())
+    for k in amp_values:
+        colname = ("amp " + "%.3f") % k
+        price_el_half_hourly.loc[price_el_half_hourly[str(colname)] < 0, str(colname)] = 0
+        price_el_half_hourly_mean_df[str(colname)] = price_el_half_hourly[str(colname)].mean()
+    return price_el_half_hourly
+
+
+benchmark = {}
+rng = np.random.default_rng(0)
+prices = pd.DataFrame({'EP [EUR/MWh]': rng.normal(50, 30, n_steps)},
+                      index=pd.date_range('2019-01-01', periods=n_steps, freq='30min'))
+for n in k_counts:
+    amp_values = list(np.linspace(0.5, 3, n))
+    begin = time.time()
+    reference = loop_amplified_prices(prices.copy(), amp_values)
+    loop_time = time.time() - begin
+    begin = time.time()
+    amplified = amplified_prices(prices['EP [EUR/MWh]'], amp_values)
+    vectorized_time = time.time() - begin
+    begin = time.time()
+    price_duration_curves(amplified)
+    duration_curve_time = time.time() - begin
+    benchmark[n] = {'loop [s]': loop_time, 'vectorized [s]': vectorized_time, 'speedup': loop_time / vectorized_time,
+                    'duration curves on demand [s]': duration_curve_time,
+                    'max. deviation': np.abs(amplified - reference.iloc[:, 1:].to_numpy()).max()}
+    print(n, benchmark[n])
+
+benchmark = pd.DataFrame(benchmark).T
+benchmark.index.name = 'k values'
+pd.set_option('display.width', 200)
+print(benchmark)
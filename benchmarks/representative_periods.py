@@ -0,0 +1,52 @@
+import pandas as pd
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import optimisation_run_PI_CHP
+from benchmarks.shipped_inputs import load_shipped_data
+
+# Compares capacity planning of the plug-in system on the full year with planning on representative days or weeks
+# (representative_periods), with the storages linked across the sequence of periods of the year or operating
+# cyclically within every representative period (link_periods). In all cases the results contain the cost of the full
+# year, so the relative cost error of the representative periods is the cost increase caused by the capacities planned
+# on the reduced data; the capacity errors are the differences to the capacities planned on the full year.
+
+# define settings of the benchmark
+hours = 8000  # operational hours (=length of the optimisation)
+GT_min_load = 0.3  # minimal load factor, [% of Pnom]
+linearize = True
+el_price_sheet, gas_price_column = 'MEANlow_VARhigh', 'K'
+capex_data = {'ElB': 30000, 'Bat': 180e3, 'TES': 15000, 'HP': 500e3, 'H2E': 760e3, 'H2B': 35000, 'H2S': 10000}
+# period length in hours and numbers of representative periods
+period_settings = [(24, 4), (24, 8), (24, 16), (24, 32), (168, 2), (168, 4), (168, 8)]
+
+heat_demand_orig, price_el_hourly, price_NG_use = load_shipped_data(el_price_sheet, gas_price_column)
+size_columns = ['ElB size [MW]', 'Battery size [MWh]', 'TES size [MWh]', 'Heat pump size [MW]',
+                'electrolyser size [MW]', 'Hydrogen boiler size [MW]', 'Hydrogen storage size [MWh]']
+
+benchmark = {}
+for period_hours, representative_periods, link_periods in [(None, None, True)] + \
+        [settings + (link,) for settings in period_settings for link in (True, False)]:
+    begin = time.time()
+    results = optimisation_run_PI_CHP(heat_demand_orig, price_el_hourly.copy(), price_NG_use, [], ['original'],
+                                      GT_min_load, hours, capex_data, linearize=linearize,
+                                      representative_periods=representative_periods, period_hours=period_hours or 24,
+                                      link_periods=link_periods)['new system']['original']['results']
+    name = 'full year' if representative_periods is None else \
+        str(representative_periods) + ' x ' + str(period_hours) + ' h ' + ('linked' if link_periods else 'cyclic')
+    benchmark[name] = dict({'runtime [s]': time.time() - begin,
+                            'planning solve time [s]': results.get('solve time representative periods [s]'),
+                            'full-year cost': results['Optimal result'],
+                            'cost on representative periods': results.get('objective on representative periods'),
+                            'estimate error': results.get('cost error representative periods [-]'),
+                            'price clustering error': results.get('clustering error electricity price [-]')},
+                           **{column: results[column] for column in size_columns})
+
+benchmark = pd.DataFrame(benchmark).T
+benchmark['relative cost error'] = benchmark['full-year cost'] / benchmark.loc['full year', 'full-year cost'] - 1
+for column in size_columns:
+    benchmark[column + ' error'] = benchmark[column] - benchmark.loc['full year', column]
+pd.set_option('display.width', 200)
+print(benchmark)
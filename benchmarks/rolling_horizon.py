@@ -0,0 +1,51 @@
+import pandas as pd
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from functions import PI_CHP_constants, build_PI_model, dispatch_PI_rolling_horizon
+from benchmarks.shipped_inputs import load_shipped_inputs
+import pyomo.environ as pm
+
+# Compares the dispatch of the plug-in system with fixed capacities solved as one model over the full horizon with
+# the rolling-horizon dispatch (dispatch_PI_rolling_horizon) for several window and overlap lengths.
+
+# define settings of the benchmark
+hours = 8000  # operational hours (=length of the optimisation)
+GT_min_load = 0.3  # minimal load factor, [% of Pnom]
+linearize = True
+time_step = 0.5
+capex_data = {'ElB': 30000, 'Bat': 180e3, 'TES': 15000, 'HP': 500e3, 'H2E': 760e3, 'H2B': 35000, 'H2S': 10000}
+# installed capacities of the design that is evaluated
+capacities = {'bat_cap': 5, 'ElB_cap': 20, 'TES_cap': 40, 'HP_cap': 2, 'H2E_cap': 0, 'H2B_cap': 0, 'H2S_cap': 0}
+# window and overlap lengths in hours
+window_settings = [(24, 6), (168, 24), (336, 48), (720, 72)]
+
+H_dem, P_dem, price_el, price_NG = load_shipped_inputs(hours)
+H_dem, P_dem = H_dem.iloc[:, 0], P_dem.iloc[:, 0]
+c = PI_CHP_constants(capex_data, H_dem.max())
+
+benchmark = {}
+begin = time.time()
+m = build_PI_model(H_dem.to_numpy(), P_dem.to_numpy(), price_el.to_numpy(), price_NG.to_numpy(), GT_min_load, c,
+                   time_step, linearize=linearize)
+for name, capacity in capacities.items():
+    getattr(m, name).fix(capacity)
+opt = pm.SolverFactory('gurobi')
+opt.options["MIPGap"] = 0.0005
+opt.solve(m)
+benchmark['full horizon'] = {'runtime [s]': time.time() - begin, 'windows': 1, 'total cost': pm.value(m.objective)}
+
+for window_hours, overlap_hours in window_settings:
+    begin = time.time()
+    energy_flows, cost = dispatch_PI_rolling_horizon(H_dem, P_dem, price_el, price_NG, GT_min_load, c, time_step,
+                                                     capacities, int(window_hours / time_step),
+                                                     int(overlap_hours / time_step), index=price_el.index,
+                                                     linearize=linearize)
+    benchmark[str(window_hours) + ' h / ' + str(overlap_hours) + ' h overlap'] = {
+        'runtime [s]': time.time() - begin, 'windows': cost['dispatch windows'], 'total cost': cost['Optimal result']}
+
+benchmark = pd.DataFrame(benchmark).T
+benchmark['relative cost difference'] = benchmark['total cost'] / benchmark.loc['full horizon', 'total cost'] - 1
+print(benchmark)
@@ -0,0 +1,32 @@
+import pandas as pd
+import os
+from pathlib import Path
+
+reporoot_dir = Path(__file__).resolve().parent.parent
+
+
+def load_shipped_data(el_price_sheet='MEANlow_VARhigh', gas_price_column='K'):
+    # read the shipped demand and price data in the form Modelruns.py passes them to the optimisation functions
+    heat_demand_orig = pd.read_csv(os.path.join(reporoot_dir,
+                                                r'input_data/demand_data/Steamconsumption_15122023.csv'))
+    price_el_hourly = pd.read_excel(os.path.join(reporoot_dir, r'input_data/Model_price_data_python_final.xlsx'),
+                                    sheet_name=el_price_sheet, header=0, index_col=0, usecols='A,F')
+    price_NG_use = pd.read_excel(os.path.join(reporoot_dir, r'input_data/Model_price_data_python_final.xlsx'),
+                                 sheet_name=el_price_sheet, header=0, index_col=0, usecols='A,' + gas_price_column)
+    price_NG_use.index = pd.to_datetime(price_NG_use.index, dayfirst=True, format='mixed')
+    return heat_demand_orig, price_el_hourly, price_NG_use
+
+
+def load_shipped_inputs(hours, el_price_sheet='MEANlow_VARhigh', gas_price_column='K'):
+    # read the shipped demand and price data and prepare them in the same way as optimisation_run_PI_CHP
+    # returns heat and power demand (dataframes) and half-hourly electricity and gas prices (series)
+    heat_demand_orig, price_el_hourly, price_NG_use = load_shipped_data(el_price_sheet, gas_price_column)
+
+    price_NG_use_hourly = price_NG_use.resample('1h').ffill()
+    price_NG_use_half_hourly = price_NG_use_hourly.resample('30min').ffill().iloc[0:hours * 2, 0]
+    price_el_hourly = price_el_hourly.ffill()
+    price_el_hourly.index = price_NG_use_hourly.index
+    price_el_half_hourly = price_el_hourly.resample('30min').ffill().iloc[0:hours * 2, 0]
+    H_dem = heat_demand_orig[0:hours * 2]
+    P_dem = 0.1 * heat_demand_orig[0:hours * 2]
+    return H_dem, P_dem, price_el_half_hourly, price_NG_use_half_hourly
@@ -1,76 +1,1449 @@
 import pyomo.environ as pm
+from pyomo.core.expr.numeric_expr import LinearExpression, MonomialTermExpression
 import pandas as pd
 import os
 import numpy as np
-import math
 import time
-import matplotlib.pyplot as plt
-import pickle
-from datetime import datetime
+import sys
+import re
+import tempfile
+from types import SimpleNamespace
+import scipy.sparse as sp
+from scipy.optimize import milp, Bounds, LinearConstraint
+
+# ________________________________________ Solver configuration ________________________________________________________
+# default solver settings: solver ('gurobi', 'highs', 'cbc' or 'glpk'), maximum number of threads, time limit [s],
+# relative MIP gap, presolve level ('off', 'on', 'aggressive') and solver log output; None keeps the solver default
+default_solver_settings = {'solver': 'gurobi', 'threads': None, 'time_limit': None, 'mip_gap': 0.0005, 'presolve': None,
+                           'tee': True}
+# pyomo interfaces of the solvers (persistent: re-solving after parameter updates)
+solver_interfaces = {'gurobi': 'gurobi', 'highs': 'appsi_highs', 'cbc': 'cbc', 'glpk': 'glpk'}
+persistent_solver_interfaces = {'gurobi': 'appsi_gurobi', 'highs': 'appsi_highs'}
+# names of the settings in the options of the solvers (settings that are missing are not available for a solver)
+solver_option_names = {
+    'gurobi': {'threads': 'Threads', 'time_limit': 'TimeLimit', 'mip_gap': 'MIPGap', 'presolve': 'Presolve',
+               'cutoff': 'Cutoff'},
+    'highs': {'threads': 'threads', 'time_limit': 'time_limit', 'mip_gap': 'mip_rel_gap', 'presolve': 'presolve',
+              'cutoff': 'objective_bound'},
+    'cbc': {'threads': 'threads', 'time_limit': 'sec', 'mip_gap': 'ratioGap', 'presolve': 'presolve',
+            'cutoff': 'cutoff'},
+    'glpk': {'time_limit': 'tmlim', 'mip_gap': 'mipgap'}}
+presolve_levels = {'gurobi': {'off': 0, 'on': 1, 'aggressive': 2},
+                   'highs': {'off': 'off', 'on': 'on', 'aggressive': 'on'},
+                   'cbc': {'off': 'off', 'on': 'on', 'aggressive': 'more'}}
+quadratic_solvers = ['gurobi']  # solvers for the products of capacity and binary variables (linearize=False)
+warmstart_solvers = ['gurobi', 'cbc']  # solvers that accept a MIP start
+
+
+def solver_settings(settings=None):
+    # complete solver settings: the default settings updated with the given settings
+    settings = dict(default_solver_settings, **(settings or {}))
+    if settings['solver'] not in solver_interfaces:
+        raise ValueError("Unknown solver " + str(settings['solver']) + ", available solvers: " +
+                         ", ".join(solver_interfaces) + ".")
+    return settings
+
+
+def create_solver(settings=None, persistent=False):
+    # pyomo solver interface of the solver in the settings
+    name = solver_settings(settings)['solver']
+    if persistent and name not in persistent_solver_interfaces:
+        raise ValueError("The persistent solver is not available for " + name + ".")
+    return pm.SolverFactory(persistent_solver_interfaces[name] if persistent else solver_interfaces[name])
+
+
+def configure_solver(opt, settings=None, **overrides):
+    # set the options of a solver interface from the solver settings; overrides (e.g. threads or cutoff) replace
+    # single settings if they are not None
+    settings = solver_settings(settings)
+    settings.update({setting: value for setting, value in overrides.items() if value is not None})
+    name = settings['solver']
+    for setting in ['threads', 'time_limit', 'mip_gap', 'presolve', 'cutoff']:
+        value = settings.get(setting)
+        if value is None:
+            continue
+        if setting not in solver_option_names[name]:
+            print("The setting", setting, "is not available for", name, "and is ignored.")
+            continue
+        opt.options[solver_option_names[name][setting]] = presolve_levels[name][value] if setting == 'presolve' \
+            else value
+    return settings
+
+
+# ________________________________________ Run timing __________________________________________________________________
+def add_phase_time(timings, phase, start):
+    # add the wall time since start to a phase of timings ({phase: time [s]}, nothing is recorded if timings is None)
+    # and return the current time as start of the next phase
+    now = time.time()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0) + now - start
+    return now
+
+
+def solver_wall_time(results):
+    # time the solver reports for the solve itself, without writing the model file, starting the solver and loading
+    # the solution (gurobi shell interface); None if the solver interface does not report it
+    try:
+        return float(results.solver[0]['Wall time'])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def peak_memory():
+    # peak resident set size of this process and of its finished child processes (e.g. the solver) [MB]; None where
+    # the resource module is not available (Windows)
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return rss / 1024 ** 2 if sys.platform == 'darwin' else rss / 1024  # bytes on macOS, kilobytes on Linux
+
+
+# ________________________________________ Run statistics ______________________________________________________________
+# statistics of a solve that are stored in the results of a run (None if the solver does not report them)
+run_statistics = ['variables', 'binary variables', 'constraints', 'nonzeros', 'solver status', 'MIP gap', 'nodes']
+# number of branch-and-bound nodes in the log of the solvers that are called as separate program
+node_count_patterns = {'gurobi': r'Explored (\d+) nodes', 'cbc': r'Enumerated nodes:\s+(\d+)'}
+
+
+def solver_log_file(opt):
+    # temporary log file for the solvers that are called as separate program (their node count is only reported in
+    # the log); None for the solvers with a python interface (appsi), which do not take a log file
+    if hasattr(opt, '_solver_model'):
+        return None
+    handle, log_file = tempfile.mkstemp(suffix='.log')
+    os.close(handle)
+    return log_file
+
+
+def solver_statistics(opt, results, settings, log_file=None):
+    # size of the model passed to the solver, solver status, final relative MIP gap and number of branch-and-bound
+    # nodes of a solve with a pyomo solver interface (see run_statistics). The python interfaces (appsi) are asked
+    # directly, the other solvers report the size in the results and the nodes in the log file, which is removed
+    statistics = dict.fromkeys(run_statistics)
+    statistics['solver status'] = str(results.solver.termination_condition)
+    solver_model = getattr(opt, '_solver_model', None)
+    if solver_model is None:
+        problem = results.problem[0]
+        for statistic, name in [('variables', 'number_of_variables'),
+                                ('binary variables', 'number_of_binary_variables'),
+                                ('constraints', 'number_of_constraints'), ('nonzeros', 'number_of_nonzeros')]:
+            value = getattr(problem, name, None)
+            statistics[statistic] = int(value) if isinstance(value, (int, float)) and value >= 0 else None
+    elif settings['solver'] == 'highs':
+        statistics.update({'variables': solver_model.getNumCol(), 'constraints': solver_model.getNumRow(),
+                           'nonzeros': solver_model.getNumNz()})
+        # highs reports -1 nodes for a model without integer variables
+        nodes = solver_model.getInfo().mip_node_count
+        statistics['nodes'] = nodes if nodes >= 0 else None
+        # all integer variables of the models are binaries
+        statistics['binary variables'] = sum(1 for integrality in solver_model.getLp().integrality_
+                                             if integrality != type(integrality).kContinuous)
+    else:
+        statistics.update({'variables': solver_model.NumVars, 'binary variables': solver_model.NumBinVars,
+                           'constraints': solver_model.NumConstrs + solver_model.NumQConstrs,
+                           'nonzeros': solver_model.NumNZs, 'nodes': int(solver_model.NodeCount)})
+    # relative gap between the objective and the bound of the best solution, as defined by the solvers
+    lower, upper = results.problem[0].lower_bound, results.problem[0].upper_bound
+    if isinstance(lower, (int, float)) and isinstance(upper, (int, float)) and np.isfinite([lower, upper]).all():
+        statistics['MIP gap'] = abs(upper - lower) / max(abs(upper), 1e-10)
+    if log_file is not None:
+        if settings['solver'] in node_count_patterns and os.path.exists(log_file):
+            with open(log_file) as log:
+                nodes = re.findall(node_count_patterns[settings['solver']], log.read())
+            statistics['nodes'] = int(nodes[-1]) if nodes else None
+        if os.path.exists(log_file):
+            os.remove(log_file)
+    return statistics
+
+
+# ________________________________________ Model definition of the plug-in system ______________________________________
+def PI_CHP_constants(capex_data, H_dem_max):
+    # collect all technology and economic constants of the plug-in system in one dictionary
+    c = {}
+    c['disc_rate'] = 0.1  # 10%, assumption
+    c['EF_ng'] = 0.2  # emission factor natural gas, tCO2/MWh(CH4)
+    c['gr_connection'] = 30  # [MW] Grid connection capacity
+    # ElB constants
+    c['c_ElB'] = capex_data['ElB']  # CAPEX for electric boiler, 60000 eur/MW
+    c['ElB_lifetime'] = 20  # lifetime of electric boiler, years
+    c['ElB_spatialreq'] = 70  # spatial requirements, m^2/MW
+    c['eta_ElB'] = 0.99  # Conversion ratio electricity to steam for electric boiler [%]
+    c['if_ElB'] = 2  # installation factor, [-]
+    # CHP constants
+    c['eta_GT_el'] = 0.3  # Electric efficiency of GT [%]
+    c['eta_GT_th'] = 0.6  # Thermal efficiency of GT [%]
+    c['eta_GB'] = 0.82
+    c['GT_cap'] = H_dem_max / c['eta_GB']  # Thermal capacity (LPS) GT, [MW]
+    # Battery constants
+    c['eta_bat'] = 0.95  # Battery (dis)charging efficiency
+    c['c_bat'] = capex_data['Bat']  # CAPEX for battery per eur/MWh, 386e3 USD --> 385.5e3 eur (12.07.23)
+    c['bat_lifetime'] = 20  # lifetime of battery
+    c['bat_spatialreq'] = 11  # spatial requirement, [m^2/MWh]
+    c['crate_bat'] = 0.7  # C rate of battery, 70% of nominal capacity, [-]
+    c['if_bat'] = 2.5  # installation factor, [-]
+    # TES constants
+    c['c_TES_C'] = capex_data['TES']  # CAPEX for latent heat storage, including installation factor [eur/MWh]
+    c['TES_lifetime'] = 25  # heat storage lifetime, [years]
+    c['eta_TES'] = 0.95  # discharge efficiency [-]
+    c['TES_spatialreq'] = 7  # spatial requirement TES (configuration B), [m^2/MWh]
+    c['crate_TES'] = 0.5  # C rate of TES, 50% of nominal capacity, [-]
+    c['if_TES'] = 2.5  # installation factor, [-]
+    # Heat pump constants
+    c['c_HP'] = capex_data['HP']
+    c['HP_lifetime'] = 20
+    c['HP_spatialreq'] = 1
+    c['HP_COP_carnot'] = (160 + 273) / (160 - 55)
+    c['eta_HP'] = 0.5
+    c['if_HP'] = 3  # installation factor, [-]
+    # Hydrogen equipment constants
+    c['eta_H2S'] = 0.9  # charge efficiency hydrogen storage [-]
+    c['eta_H2B'] = 0.9  # conversion efficiency hydrogen boiler [-]
+    c['eta_H2E'] = 0.69  # conversion efficiency electrolyser [-]
+    c['c_H2S'] = capex_data['H2S']  # CAPEX for hydrogen storage per MWh, [eur/MWh]
+    c['c_H2B'] = capex_data['H2B']  # CAPEX for hydrogen boiler per MW, [eur/MW]
+    c['c_H2E'] = capex_data['H2E']  # CAPEX for electrolyser per MW, [eur/MW]  # From ISPT
+    c['H2S_lifetime'] = 23  # lifetime hydrogen storage, [years]
+    c['H2B_lifetime'] = 20  # lifetime hydrogen boiler, [years]
+    c['H2E_lifetime'] = 14  # lifetime electrolyser, [years]
+    c['H2E_spatialreq'] = 105  # spatial requirement electrolyser, [m^2/MW]
+    c['H2B_spatialreq'] = 70  # spatial requirement hydrogen boiler, [m^2/MW]
+    c['H2S_spatialreq'] = 8.4  # spatial requirement hydrogen storage, [m^2/MWh]
+    c['if_H2S'] = 4  # installation factor, [-]
+    c['if_H2B'] = 2  # installation factor, [-]
+    c['if_H2E'] = 1  # installation factor, [-]
+    return c
+
+
+def annuity(c, tech):
+    # annualised investment cost per unit of installed capacity (objective function coefficient)
+    c_tech = c['c_TES_C'] if tech == 'TES' else c['c_' + tech]
+    return c_tech * c['if_' + tech] * c['disc_rate'] / (1 - (1 + c['disc_rate']) ** -c[tech + '_lifetime'])
+
+
+def PI_big_M(c, H_dem, P_dem, price_el, price_NG, GT_min_load, time_step, bat_cap_max=None, weights=None):
+    # upper bounds of the storage flows that are switched by the binaries (used by the linearised model)
+    # bat_cap_max: upper bound of the battery capacity. None derives a bound that holds for every optimal solution: a
+    # battery costs its annuity per MWh, so it can at most be as large as the difference between the cost of a
+    # feasible operation without new technologies (GT at full load, the rest of the power demand from the grid) and a
+    # lower bound of the operating cost (minimal gas use, the whole grid connection used at the price of the time step)
+    # divided by the annuity. The feasible set of the optimal capacities is therefore the same as in the MIQP.
+    # weights: weight of every time step in the operational cost (None: 1)
+    GT_in_max = c['GT_cap'] / c['eta_GT_th']  # maximum natural gas intake of the GT
+    GB_in_max = 0.2 * c['GT_cap'] / c['eta_GB']  # maximum natural gas intake of the re-boiler
+    P_GT_max = c['eta_GT_el'] * GT_in_max  # maximum power output of the GT
+    H_CHP_max = c['eta_GB'] * c['GT_cap'] + 0.2 * c['GT_cap']  # maximum heat output of GT and re-boiler
+    P_in_max = c['gr_connection'] + P_GT_max  # maximum power taken from grid and GT
+    if bat_cap_max is None:
+        if annuity(c, 'bat') <= 0:
+            raise ValueError("The linearised model needs a positive battery CAPEX to bound the battery capacity.")
+        price_el = np.asarray(price_el, dtype=float)
+        price_NG = np.asarray(price_NG, dtype=float)
+        feasible_cost = (price_NG * GT_in_max + price_el * np.maximum(np.asarray(P_dem, dtype=float) - P_GT_max, 0))
+        lowest_cost = np.minimum(price_NG * GT_in_max * GT_min_load, price_NG * (GT_in_max + GB_in_max)) - \
+            np.abs(price_el) * c['gr_connection']
+        weights = 1 if weights is None else np.asarray(weights, dtype=float)
+        bat_cap_max = max(((feasible_cost - lowest_cost) * weights).sum() * time_step / annuity(c, 'bat'), 0)
+    M = {'bat_cap': bat_cap_max}
+    # the battery is only charged from the grid and the GT
+    M['bat_in'] = c['eta_bat'] * P_in_max
+    # the discharging power is limited by the c-rate of the largest battery
+    M['bat_out'] = c['crate_bat'] / time_step * bat_cap_max
+    P_conversion_max = P_in_max + c['eta_bat'] * M['bat_out']  # maximum power input of ElB, HP and electrolyser
+    M['TES_in'] = c['eta_TES'] * (H_CHP_max + max(c['eta_ElB'], c['HP_COP_carnot'] * c['eta_HP']) * P_conversion_max)
+    M['TES_out'] = max(H_dem)  # the TES only discharges to the core process
+    M['H2S_in'] = c['eta_H2S'] * c['eta_H2E'] * P_conversion_max
+    M['H2S_out'] = max(H_dem) / c['eta_H2B']  # stored hydrogen is only used by the hydrogen boiler
+    return M
+
+
+def declare_PI_variables(m):
+    # define VARIABLES of the plug-in system on the time set m.T
+    m.NG_GT_in = pm.Var(m.T, bounds=(0, None))  # natural gas intake of gas turbine, MWh
+    m.NG_GB_in = pm.Var(m.T, bounds=(0, None))  # natural gas intake of gas boiler, MWh
+    m.P_GT_bat = pm.Var(m.T, bounds=(0, None))  # Power from CHP to battery, MW
+    m.P_GT_HP = pm.Var(m.T, bounds=(0, None))  # Power from CHP to heat pump, MW
+    m.P_GT_ElB = pm.Var(m.T, bounds=(0, None))  # Power from CHP to electric boiler, MW
+    m.P_GT_H2E = pm.Var(m.T, bounds=(0, None))  # Power from CHP to electrolyser, MW
+    m.P_GT_process = pm.Var(m.T, bounds=(0, None))  # Power from CHP to process, MW
+    m.P_GT_excess = pm.Var(m.T, bounds=(0, None))  # Excess power from CHP, MW
+    m.P_GT_gr = pm.Var(m.T, bounds=(0, None))  # Power from CHP to grid, MW
+    m.H_CHP_CP = pm.Var(m.T, bounds=(0, None))  # Heat generated from CHP (natural gas), MW
+    m.H_CHP_TES = pm.Var(m.T, bounds=(0, None))  # Heat from CHP to TES, MW
+    m.H_CHP_excess = pm.Var(m.T, bounds=(0, None))  # Excess heat from CHP, MW
+    m.P_gr_ElB = pm.Var(m.T, bounds=(0, None))  # grid to el. boiler, MW
+    m.P_gr_bat = pm.Var(m.T, bounds=(0, None))  # max charging power batter, MW
+    m.P_gr_H2E = pm.Var(m.T, bounds=(0, None))  # power flow from grid to electrolyser, MW
+    m.P_gr_HP = pm.Var(m.T, bounds=(0, None))  # power flow from grid to heat pump, MW
+    m.P_gr_process = pm.Var(m.T, bounds=(0, None))  # power flow from grid to process, MW
+    m.P_bat_ElB = pm.Var(m.T, bounds=(0, None))  # discharging power batter to electric boiler, MW
+    m.P_bat_H2E = pm.Var(m.T, bounds=(0, None))  # power flow from battery to electrolyser, MW
+    m.P_bat_HP = pm.Var(m.T, bounds=(0, None))  # power flow from battery to heat pump, MW
+    m.P_bat_process = pm.Var(m.T, bounds=(0, None))  # power flow from battery to process, MW
+    m.P_bat_gr = pm.Var(m.T, bounds=(0, None))  # power flow from battery to gr, MW
+    m.H_ElB_CP = pm.Var(m.T, bounds=(0, None))  # Heat generated from electricity, MW
+    m.H_ElB_TES = pm.Var(m.T, bounds=(0, None))  # Heat from electric boiler to TES, MW
+    m.H_TES_CP = pm.Var(m.T, bounds=(0, None))  # Heat from TES to core process, MW
+    m.H_H2B_CP = pm.Var(m.T, bounds=(0, None))  # Heat flow from hydrogen boiler to core process, MW
+    m.H_HP_CP = pm.Var(m.T, bounds=(0, None))  # Heat flow from heat pump to core process, MW
+    m.H_HP_TES = pm.Var(m.T, bounds=(0, None))  # Heat from heat pump to TES, MW
+    m.H2_H2E_H2S = pm.Var(m.T, bounds=(0, None))  # hydrogen flow from electrolyser to hydrogen storage, MWh
+    m.H2_H2S_H2B = pm.Var(m.T, bounds=(0, None))  # hydrogen flow from hydrogen storage to hydrogen boiler, MWh
+    m.H2_H2E_H2B = pm.Var(m.T, bounds=(0, None))  # hydrogen flow from electrolyser to hydrogen boiler, MWh
+    m.TES_soe = pm.Var(m.T, bounds=(0, None))  # state of energy TES, MWh
+    m.bat_soe = pm.Var(m.T, bounds=(0, None))  # State of energy of battery
+    m.H2S_soe = pm.Var(m.T, bounds=(0, None))  # state of energy hydrogen storage, MWh
+    m.bat_cap = pm.Var(bounds=(0, None))  # Battery capacity, MWh
+    m.ElB_cap = pm.Var(bounds=(0, None))  # electric boiler capacity, MW
+    m.TES_cap = pm.Var(bounds=(0, None))  # TES capacity, MWh
+    m.HP_cap = pm.Var(bounds=(0, None))  # heat pump capacity, MW
+    m.H2S_cap = pm.Var(bounds=(0, None))  # hydrogen storage capacity, MWh
+    m.H2B_cap = pm.Var(bounds=(0, None))  # hydrogen boiler capacity, MW
+    m.H2E_cap = pm.Var(bounds=(0, None))  # electrolyser capacity, MW
+    m.b1 = pm.Var(m.T, within=pm.Binary)  # binary variable battery
+    m.b2 = pm.Var(m.T, within=pm.Binary)  # binary variable TES
+    m.b3 = pm.Var(m.T, within=pm.Binary)  # binary variable grid connection
+    m.b4 = pm.Var(m.T, within=pm.Binary)  # binary variable H2S
+
+
+def build_PI_model_rules(H_dem, P_dem, price_el, price_NG, GT_min_load, c, time_step):
+    # reference construction with one rule per time step reading the pandas inputs (H_dem, P_dem: dataframes,
+    # price_el, price_NG: series), kept to compare against build_PI_model
+    # Definitions of constraints
+
+    def heat_balance(m, time):  # heat demand at t has to be equal to the sum of the heat produced at t
+        return float(H_dem.iloc[time]) == m.H_ElB_CP[time] + m.H_CHP_CP[time] + m.H_TES_CP[time] + m.H_H2B_CP[time] \
+               + m.H_HP_CP[time]
+
+    def power_balance(m, time):  # power demand at t has to be equal to the sum of the power produced or bought at t
+        return float(P_dem.iloc[time]) == m.P_gr_process[time] + m.P_GT_process[time] + m.P_bat_process[time]
+
+    def ElB_balance(m, time):  # energy conversion of electric boiler
+        return m.H_ElB_CP[time] + m.H_ElB_TES[time] == (m.P_gr_ElB[time] + m.P_bat_ElB[time] + m.P_GT_ElB[time]) \
+               * c['eta_ElB']
+
+    def ElB_size(m, time):  # definition of boiler capacity
+        return m.H_ElB_CP[time] + m.H_ElB_TES[time] <= m.ElB_cap
+
+    def GT_ng_P_conversion(m, time):  # gas to power conversion of gas turbine
+        return m.NG_GT_in[time] * c['eta_GT_el'] == m.P_GT_excess[time] + m.P_GT_bat[time] + m.P_GT_ElB[time] + \
+               m.P_GT_H2E[time] + m.P_GT_HP[time] + m.P_GT_process[time] + m.P_GT_gr[time]
+
+    def CHP_ng_H_conversion(m, time):  # gas to heat conversion of gas turbine and re-boiler
+        return (m.NG_GT_in[time] * c['eta_GT_th'] + m.NG_GB_in[time]) * c['eta_GB'] == \
+               m.H_CHP_CP[time] + m.H_CHP_TES[time] + m.H_CHP_excess[time]
+
+    def GT_cap_rule(m, time):  # gas intake cannot exceed capacity
+        return m.NG_GT_in[time] <= c['GT_cap'] / c['eta_GT_th']  # * eta_GB)  #GT_cap = H_dem_max / eta_GB #outflow GT
+
+    def GB_cap_rule(m, time):  # gas intake can not exceed capacity
+        return m.NG_GB_in[time] <= 0.2 * c['GT_cap'] / c['eta_GB']  # GB_cap = 0.2 * GT_cap  #outflow GB
+
+    def GT_min_load_rule(m, time):  # operation has to be above the minimal load
+        return m.NG_GT_in[time] >= c['GT_cap'] / c['eta_GT_th'] * GT_min_load
+
+    def bat_soe(m, time):  # calculating the state of energy of the battery
+        if time == 0:
+            return m.bat_soe[time] == 0
+        else:
+            return m.bat_soe[time] == m.bat_soe[time - 1] + \
+                   (m.P_gr_bat[time - 1] + m.P_GT_bat[time - 1]) * c['eta_bat'] * time_step - \
+                   (m.P_bat_ElB[time - 1] + m.P_bat_H2E[time - 1] + m.P_bat_HP[time - 1] + \
+                    m.P_bat_process[time - 1] + m.P_bat_gr[time - 1]) / c['eta_bat'] * time_step  # / m.bat_cap[time]
+
+    def bat_in(m, time):  # limiting the charging with c-rate and use binary to prevent simultaeous charging and discharging
+        return (m.P_gr_bat[time] + m.P_GT_bat[time]) * c['eta_bat'] <= \
+               m.bat_cap * c['crate_bat'] / time_step * m.b1[time]
+
+    def bat_out_maxP(m, time):  # limiting the discharging with c-rate and use binary to prevent simultaeous charging and discharging
+        if time == 0:
+            return (m.P_bat_ElB[time] + m.P_bat_H2E[time] + m.P_bat_HP[time] + m.P_bat_process[time] +
+                    m.P_bat_gr[time]) / c['eta_bat'] == 0
+        else:
+            return (m.P_bat_ElB[time] + m.P_bat_H2E[time] + m.P_bat_HP[time] + m.P_bat_process[time] +
+                    m.P_bat_gr[time]) / c['eta_bat'] <= m.bat_cap * c['crate_bat'] / time_step * (1 - m.b1[time])
+
+    def bat_soe_max(m, time):  # define battery capacity
+        return m.bat_soe[time] <= m.bat_cap
+
+    def TES_soe(m, time):  # calculating the state of energy of the TES
+        if time == 0:
+            return m.TES_soe[time] == 0
+        else:
+            return m.TES_soe[time] == m.TES_soe[time - 1] \
+                   + ((m.H_CHP_TES[time - 1] + m.H_ElB_TES[time - 1] + m.H_HP_TES[time - 1]) * c['eta_TES']
+                      - m.H_TES_CP[time - 1]) * time_step
+
+    def TES_in(m, time):  # limiting the charging with c-rate and use binary to prevent simultaeous charging and discharging
+        return (m.H_CHP_TES[time] + m.H_ElB_TES[time] + m.H_HP_TES[
+            time]) * c['eta_TES'] <= m.TES_cap * c['crate_TES'] / time_step * m.b2[time]
+
+    def TES_out(m, time):  # limiting the discharging with c-rate and use binary to prevent simultaeous charging and discharging
+        if time == 0:
+            return m.H_TES_CP[time] == 0
+        else:
+            return m.H_TES_CP[time] <= m.TES_cap * c['crate_TES'] / time_step * (1 - m.b2[time])
+
+    def TES_size(m, time):  # define TES capacity
+        return m.TES_soe[time] <= m.TES_cap
+
+    def HP_balance(m, time):  # power to heat conversion of the heat pump
+        return m.H_HP_CP[time] + m.H_HP_TES[time] == (m.P_gr_HP[time] + m.P_bat_HP[time] + m.P_GT_HP[time]) \
+               * c['HP_COP_carnot'] * c['eta_HP']
+
+    def HP_size(m, time):  # defining HP capacity
+        return m.H_HP_CP[time] + m.H_HP_TES[time] <= m.HP_cap
+
+    def H2S_soe(m, time):  # calculate state of energy of the hydrogen storage
+        if time == 0:
+            return m.H2S_soe[time] == 0
+        else:
+            return m.H2S_soe[time] == m.H2S_soe[time - 1] + (m.H2_H2E_H2S[time - 1] * c['eta_H2S'] -
+                                                             m.H2_H2S_H2B[time - 1]) * time_step
+
+    def H2S_in(m, time):  # implement binary to prevent simultaneous charging and discharging
+        return m.H2_H2E_H2S[time] * c['eta_H2S'] <= m.H2S_cap / time_step * m.b4[time]
+
+    def H2S_out(m, time):  # implement binary to prevent simultaneous charging and discharging
+        if time == 0:
+            return m.H2_H2S_H2B[time] == 0
+        else:
+            return m.H2_H2S_H2B[time] <= m.H2S_soe[time] / time_step * (1 - m.b4[time])
+
+    def H2S_size(m, time):  # define hydrogen storage capacity
+        return m.H2S_soe[time] <= m.H2S_cap
+
+    def H2B_balance(m, time):  # hydrogen to heat conversion of hyrogen boiler
+        return (m.H2_H2E_H2B[time] + m.H2_H2S_H2B[time]) * c['eta_H2B'] == m.H_H2B_CP[time]
+
+    def H2B_size(m, time):  # define hydrogen boiler size
+        return m.H_H2B_CP[time] <= m.H2B_cap
+
+    def H2E_balance(m, time):  # power to hydrogen conversion of electrolyzer
+        return (m.P_gr_H2E[time] + m.P_GT_H2E[time] + m.P_bat_H2E[time]) * c['eta_H2E'] == m.H2_H2E_H2B[time] + \
+               m.H2_H2E_H2S[time]
+
+    def H2E_size(m, time):  # define capacity of electrolyzer
+        return m.P_gr_H2E[time] + m.P_GT_H2E[time] + m.P_bat_H2E[time] <= m.H2E_cap
+
+    def max_grid_power_in(m, time):  # limit power inflow through the grid connection and use binary to prevent simultaneous bidirectional use
+        return m.P_gr_ElB[time] + m.P_gr_HP[time] + m.P_gr_bat[time] + m.P_gr_H2E[time] + m.P_gr_process[time] <= \
+               c['gr_connection'] * m.b3[time]  # total power flow from grid to plant is limited to x MW
+
+    def max_grid_power_out(m, time):  # limit power outflow through the grid connection and use binary to prevent simultaneous bidirectional use
+        return m.P_GT_gr[time] + m.P_bat_gr[time] <= c['gr_connection'] * (
+                1 - m.b3[time])  # total power flow from grid to plant is limited to x MW
+
+    def minimize_total_costs(m, time):  # define the total cost of the system
+        return sum(price_el.iloc[time] * time_step * (m.P_gr_ElB[time] + m.P_gr_bat[time]
+                                                      + m.P_gr_H2E[time] + m.P_gr_HP[time]
+                                                      + m.P_gr_process[time]
+                                                      - (m.P_GT_gr[time] + m.P_bat_gr[time]))
+                   + (m.NG_GT_in[time] + m.NG_GB_in[time]) * time_step * price_NG.iloc[time]
+                   for time in m.T) + \
+               m.bat_cap * annuity(c, 'bat') + m.ElB_cap * annuity(c, 'ElB') + m.TES_cap * annuity(c, 'TES') + \
+               m.HP_cap * annuity(c, 'HP') + m.H2E_cap * annuity(c, 'H2E') + m.H2B_cap * annuity(c, 'H2B') + \
+               m.H2S_cap * annuity(c, 'H2S')
+
+    m = pm.ConcreteModel()
+
+    # define SETS
+    m.T = pm.RangeSet(0, len(H_dem) - 1)  # time steps
+
+    declare_PI_variables(m)
+
+    # add CONSTRAINTS to the model
+    # balance supply and demand
+    m.heat_balance_constraint = pm.Constraint(m.T, rule=heat_balance)
+    m.power_balance_constraint = pm.Constraint(m.T, rule=power_balance)
+    # CHP constraints
+    m.CHP_ng_H_conversion_constraint = pm.Constraint(m.T, rule=CHP_ng_H_conversion)
+    m.GT_ng_P_conversion_constraint = pm.Constraint(m.T, rule=GT_ng_P_conversion)
+    m.GT_cap_constraint = pm.Constraint(m.T, rule=GT_cap_rule)
+    m.GB_cap_constraint = pm.Constraint(m.T, rule=GB_cap_rule)
+    m.GT_min_load_constraint = pm.Constraint(m.T, rule=GT_min_load_rule)
+    # electric boiler constraint
+    m.ElB_size_constraint = pm.Constraint(m.T, rule=ElB_size)
+    m.ElB_balance_constraint = pm.Constraint(m.T, rule=ElB_balance)
+    # heat pump constraints
+    m.HP_size_constraint = pm.Constraint(m.T, rule=HP_size)
+    m.HP_balance_constraint = pm.Constraint(m.T, rule=HP_balance)
+    # battery constraints
+    m.bat_soe_constraint = pm.Constraint(m.T, rule=bat_soe)
+    m.bat_out_maxP_constraint = pm.Constraint(m.T, rule=bat_out_maxP)
+    m.bat_in_constraint = pm.Constraint(m.T, rule=bat_in)
+    m.SOE_max_constraint = pm.Constraint(m.T, rule=bat_soe_max)
+    # TES constraints
+    m.TES_discharge_constraint = pm.Constraint(m.T, rule=TES_out)
+    m.TES_charge_constraint = pm.Constraint(m.T, rule=TES_in)
+    m.TES_soe_constraint = pm.Constraint(m.T, rule=TES_soe)
+    m.TES_size_constraint = pm.Constraint(m.T, rule=TES_size)
+    # hydrogen constraints
+    m.H2S_soe_constraint = pm.Constraint(m.T, rule=H2S_soe)
+    m.H2S_in_constraint = pm.Constraint(m.T, rule=H2S_in)
+    m.H2S_out_constraint = pm.Constraint(m.T, rule=H2S_out)
+    m.H2B_balance_constraint = pm.Constraint(m.T, rule=H2B_balance)
+    m.H2E_balance_constraint = pm.Constraint(m.T, rule=H2E_balance)
+    m.H2S_size_constraint = pm.Constraint(m.T, rule=H2S_size)
+    m.H2B_size_constraint = pm.Constraint(m.T, rule=H2B_size)
+    m.H2E_size_constraint = pm.Constraint(m.T, rule=H2E_size)
+    # grid constraint
+    m.max_grid_power_in_constraint = pm.Constraint(m.T, rule=max_grid_power_in)
+    m.max_grid_power_out_constraint = pm.Constraint(m.T, rule=max_grid_power_out)
+
+    # add OBJECTIVE FUNCTION
+    m.objective = pm.Objective(rule=minimize_total_costs,
+                               sense=pm.minimize,
+                               doc='Define objective function')
+    return m
+
+
+def terms(coef, variables):
+    # one linear term per time step: a (scalar or per-step) coefficient times the variable of that time step
+    # per-step coefficients are numpy arrays or lists of (mutable) parameters
+    if isinstance(coef, np.ndarray):
+        coef = coef.astype(float).tolist()
+    elif not isinstance(coef, list):
+        return list(variables) if coef == 1 else [MonomialTermExpression((coef, v)) for v in variables]
+    return [MonomialTermExpression((k, v)) for k, v in zip(coef, variables)]
+
+
+def linear_rows(*columns):
+    # add up columns of terms element-wise, giving one LinearExpression per time step
+    return [LinearExpression(list(row)) for row in zip(*columns)]
+
+
+def build_PI_model(H_dem, P_dem, price_el, price_NG, GT_min_load, c, time_step, linearize=False, mutable=False,
+                   period_length=None, period_weights=None, period_sequence=None, initial_soe=None,
+                   binary_steps=None, bat_cap_max=None):
+    # array-backed construction of the plug-in model: H_dem, P_dem, price_el and price_NG are numpy arrays with one
+    # value per time step. The constraint bodies are assembled column-wise for all time steps at once from lists of
+    # variables and coefficients, so no pandas lookups or operator overloading happen per time step.
+    # With linearize=True the products of capacity and binary variables are replaced by linear big-M constraints, so
+    # the model becomes a MILP instead of a mixed-integer quadratic program. bat_cap_max: upper bound of the battery
+    # capacity for the big-M values, e.g. the capacity of a fixed design (None: derived from the data, see PI_big_M)
+    # With mutable=True the prices and annuities in the objective are mutable parameters, so that the model can be
+    # re-used for other price and CAPEX scenarios (see update_PI_model).
+    # With period_length the time steps are a sequence of representative periods of period_length time steps (see
+    # cluster_periods). The storages operate cyclically within every period (the state of energy at the start of a
+    # period follows from the end of the same period) and the operational cost of every period is multiplied by its
+    # weight in period_weights.
+    # period_sequence: representative period of every period of the full time horizon in chronological order (see
+    # cluster_periods). The storages are then linked across the sequence instead of operating cyclically: the state
+    # of energy at the start of every period is the one at the start of the previous period plus the change over the
+    # representative period of the previous period, and stays within the capacity over the whole period. The storages
+    # start empty, as in the model of the full time horizon.
+    # initial_soe: states of energy of the storages at the first time step ({'bat_soe': ..., 'TES_soe': ...,
+    # 'H2S_soe': ...}, e.g. the end of a previous dispatch window), the storages may then discharge from the first
+    # time step on. By default the storages start empty.
+    # binary_steps: time steps at which the binaries prevent simultaneous charging and discharging of the battery
+    # (b1), TES (b2) and hydrogen storage (b4) and bidirectional use of the grid connection (b3), as dictionary
+    # {'b1': [...], ...}. At the other time steps only the capacity limits apply (relaxation, see
+    # solve_PI_lazy_binaries). By default the binaries are used at all time steps.
+    m = pm.ConcreteModel()
+
+    # define SETS
+    m.T = pm.RangeSet(0, len(H_dem) - 1)  # time steps
+
+    declare_PI_variables(m)
+    # plain lists of the variable data objects of all time steps
+    x = {var.local_name: list(var.values()) for var in m.component_objects(pm.Var) if var.is_indexed()}
+    H_dem = np.asarray(H_dem, dtype=float).tolist()
+    P_dem = np.asarray(P_dem, dtype=float).tolist()
+    # weight of every time step in the operational cost
+    step_weights = None if period_weights is None else \
+        np.repeat(np.asarray(period_weights, dtype=float), period_length)[:len(H_dem)]
+
+    # right-hand sides and coefficients that do not depend on the time step
+    eta_bat, eta_TES, eta_H2S = c['eta_bat'], c['eta_TES'], c['eta_H2S']
+    GT_in_max = c['GT_cap'] / c['eta_GT_th']
+    GB_in_max = 0.2 * c['GT_cap'] / c['eta_GB']
+    GT_in_min = c['GT_cap'] / c['eta_GT_th'] * GT_min_load
+    bat_P_max = c['crate_bat'] / time_step  # maximum (dis)charging power per MWh battery capacity
+    TES_H_max = c['crate_TES'] / time_step  # maximum (dis)charging power per MWh TES capacity
+    gr_connection = c['gr_connection']
+    bat_in = ('P_gr_bat', 'P_GT_bat')
+    bat_out = ('P_bat_ElB', 'P_bat_H2E', 'P_bat_HP', 'P_bat_process', 'P_bat_gr')
+    TES_in = ('H_CHP_TES', 'H_ElB_TES', 'H_HP_TES')
+    H2E_in = ('P_gr_H2E', 'P_GT_H2E', 'P_bat_H2E')
+    grid_in = ('P_gr_ElB', 'P_gr_HP', 'P_gr_bat', 'P_gr_H2E', 'P_gr_process')
+    GT_out = ('P_GT_excess', 'P_GT_bat', 'P_GT_ElB', 'P_GT_H2E', 'P_GT_HP', 'P_GT_process', 'P_GT_gr')
+    # previous time step of every time step (storage balances); with representative periods the first time step of
+    # a period follows the last time step of the same period
+    prev = list(range(-1, len(H_dem) - 1))
+    if period_length is not None:
+        for start in range(0, len(H_dem), period_length):
+            prev[start] = min(start + period_length, len(H_dem)) - 1
+    # states of energy at the first time step (none with representative periods) and time steps without discharge
+    first_soe = {} if period_length is not None else initial_soe or {'bat_soe': 0, 'TES_soe': 0, 'H2S_soe': 0}
+    empty = {0} if period_length is None and initial_soe is None else set()
+    # first time steps of the representative periods, without storage balance if the periods are linked
+    starts = list(range(0, len(H_dem), period_length)) if period_length is not None else []
+    linked = set(starts) if period_sequence is not None else set()
+    binary = {name: range(len(H_dem)) if binary_steps is None else set(binary_steps[name])
+              for name in ('b1', 'b2', 'b3', 'b4')}
+
+    def column(coef, names, shift=0):  # term columns of several variables with a common coefficient
+        # shift=-1 gives the terms of the previous time step of every time step
+        return [terms(coef, [x[name][p] for p in prev] if shift else x[name]) for name in names]
+
+    def now(names):  # the same variables for all time steps
+        return [x[name] for name in names]
+
+    heat_balance = linear_rows(*column(1, ('H_ElB_CP', 'H_CHP_CP', 'H_TES_CP', 'H_H2B_CP', 'H_HP_CP')))
+    power_balance = linear_rows(*column(1, ('P_gr_process', 'P_GT_process', 'P_bat_process')))
+    CHP_ng_H_conversion = linear_rows(terms(c['eta_GT_th'] * c['eta_GB'], x['NG_GT_in']),
+                                      terms(c['eta_GB'], x['NG_GB_in']),
+                                      *column(-1, ('H_CHP_CP', 'H_CHP_TES', 'H_CHP_excess')))
+    GT_ng_P_conversion = linear_rows(terms(c['eta_GT_el'], x['NG_GT_in']), *column(-1, GT_out))
+    ElB_size = linear_rows(*column(1, ('H_ElB_CP', 'H_ElB_TES')))
+    ElB_balance = linear_rows(*column(1, ('H_ElB_CP', 'H_ElB_TES')),
+                              *column(-c['eta_ElB'], ('P_gr_ElB', 'P_bat_ElB', 'P_GT_ElB')))
+    HP_size = linear_rows(*column(1, ('H_HP_CP', 'H_HP_TES')))
+    HP_balance = linear_rows(*column(1, ('H_HP_CP', 'H_HP_TES')),
+                             *column(-c['HP_COP_carnot'] * c['eta_HP'], ('P_gr_HP', 'P_bat_HP', 'P_GT_HP')))
+    bat_charge = linear_rows(*column(eta_bat, bat_in))
+    bat_discharge = linear_rows(*column(1 / eta_bat, bat_out))
+    bat_soe = linear_rows(*now(['bat_soe']), *column(-1, ['bat_soe'], -1),
+                          *column(-eta_bat * time_step, bat_in, -1), *column(time_step / eta_bat, bat_out, -1))
+    TES_charge = linear_rows(*column(eta_TES, TES_in))
+    TES_soe = linear_rows(*now(['TES_soe']), *column(-1, ['TES_soe'], -1),
+                          *column(-eta_TES * time_step, TES_in, -1), *column(time_step, ['H_TES_CP'], -1))
+    H2S_soe = linear_rows(*now(['H2S_soe']), *column(-1, ['H2S_soe'], -1),
+                          *column(-eta_H2S * time_step, ['H2_H2E_H2S'], -1), *column(time_step, ['H2_H2S_H2B'], -1))
+    H2B_balance = linear_rows(*column(c['eta_H2B'], ('H2_H2E_H2B', 'H2_H2S_H2B')), *column(-1, ['H_H2B_CP']))
+    H2E_balance = linear_rows(*column(c['eta_H2E'], H2E_in), *column(-1, ('H2_H2E_H2B', 'H2_H2E_H2S')))
+    H2E_size = linear_rows(*column(1, H2E_in))
+    grid_power_in = linear_rows(*column(1, grid_in), terms(-gr_connection, x['b3']))
+    grid_power_out = linear_rows(*column(1, ('P_GT_gr', 'P_bat_gr')), terms(gr_connection, x['b3']))
+    if binary_steps is not None:
+        grid_power_in_relaxed = linear_rows(*column(1, grid_in))
+        grid_power_out_relaxed = linear_rows(*column(1, ('P_GT_gr', 'P_bat_gr')))
+
+    # add CONSTRAINTS to the model
+    # balance supply and demand
+    m.heat_balance_constraint = pm.Constraint(m.T, rule=lambda m, t: (heat_balance[t], H_dem[t]))
+    m.power_balance_constraint = pm.Constraint(m.T, rule=lambda m, t: (power_balance[t], P_dem[t]))
+    # CHP constraints
+    m.CHP_ng_H_conversion_constraint = pm.Constraint(m.T, rule=lambda m, t: (CHP_ng_H_conversion[t], 0))
+    m.GT_ng_P_conversion_constraint = pm.Constraint(m.T, rule=lambda m, t: (GT_ng_P_conversion[t], 0))
+    m.GT_cap_constraint = pm.Constraint(m.T, rule=lambda m, t: (None, x['NG_GT_in'][t], GT_in_max))
+    m.GB_cap_constraint = pm.Constraint(m.T, rule=lambda m, t: (None, x['NG_GB_in'][t], GB_in_max))
+    m.GT_min_load_constraint = pm.Constraint(m.T, rule=lambda m, t: (GT_in_min, x['NG_GT_in'][t], None))
+    # electric boiler constraint
+    m.ElB_size_constraint = pm.Constraint(m.T, rule=lambda m, t: (None, ElB_size[t] - m.ElB_cap, 0))
+    m.ElB_balance_constraint = pm.Constraint(m.T, rule=lambda m, t: (ElB_balance[t], 0))
+    # heat pump constraints
+    m.HP_size_constraint = pm.Constraint(m.T, rule=lambda m, t: (None, HP_size[t] - m.HP_cap, 0))
+    m.HP_balance_constraint = pm.Constraint(m.T, rule=lambda m, t: (HP_balance[t], 0))
+    # battery constraints
+    m.bat_soe_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+        (x['bat_soe'][t], first_soe['bat_soe']) if t == 0 and first_soe else
+        pm.Constraint.Skip if t in linked else (bat_soe[t], 0)))
+    if linearize:
+        # the products of capacity and binary are split into a c-rate limit on the capacity and a big-M limit on
+        # the binary, which is exact because the big-M values bound the flows of every optimal solution
+        M = PI_big_M(c, H_dem, P_dem, price_el, price_NG, GT_min_load, time_step, bat_cap_max, step_weights)
+        m.bat_out_maxP_constraint = pm.Constraint(m.T, rule=lambda m, t: (bat_discharge[t], 0) if t in empty else (
+            None, bat_discharge[t] - bat_P_max * m.bat_cap, 0))
+        m.bat_out_bigM_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+            pm.Constraint.Skip if t in empty or t not in binary['b1'] else (
+                None, bat_discharge[t] + M['bat_out'] * x['b1'][t], M['bat_out'])))
+        m.bat_in_constraint = pm.Constraint(m.T, rule=lambda m, t: (None, bat_charge[t] - bat_P_max * m.bat_cap, 0))
+        m.bat_in_bigM_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+            None, bat_charge[t] - M['bat_in'] * x['b1'][t], 0) if t in binary['b1'] else pm.Constraint.Skip)
+    else:
+        m.bat_out_maxP_constraint = pm.Constraint(m.T, rule=lambda m, t: (bat_discharge[t], 0) if t in empty else (
+            None, bat_discharge[t] - m.bat_cap * bat_P_max * (1 - x['b1'][t]), 0) if t in binary['b1'] else (
+            None, bat_discharge[t] - bat_P_max * m.bat_cap, 0))
+        m.bat_in_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+            None, bat_charge[t] - m.bat_cap * bat_P_max * x['b1'][t], 0) if t in binary['b1'] else (
+            None, bat_charge[t] - bat_P_max * m.bat_cap, 0))
+    m.SOE_max_constraint = pm.Constraint(m.T, rule=lambda m, t: (None, x['bat_soe'][t] - m.bat_cap, 0))
+    # TES constraints
+    if linearize:
+        m.TES_discharge_constraint = pm.Constraint(m.T, rule=lambda m, t: (x['H_TES_CP'][t], 0) if t in empty else (
+            None, x['H_TES_CP'][t] - TES_H_max * m.TES_cap, 0))
+        m.TES_out_bigM_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+            pm.Constraint.Skip if t in empty or t not in binary['b2'] else (
+                None, x['H_TES_CP'][t] + M['TES_out'] * x['b2'][t], M['TES_out'])))
+        m.TES_charge_constraint = pm.Constraint(m.T, rule=lambda m, t: (None, TES_charge[t] - TES_H_max * m.TES_cap, 0))
+        m.TES_in_bigM_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+            None, TES_charge[t] - M['TES_in'] * x['b2'][t], 0) if t in binary['b2'] else pm.Constraint.Skip)
+    else:
+        m.TES_discharge_constraint = pm.Constraint(m.T, rule=lambda m, t: (x['H_TES_CP'][t], 0) if t in empty else (
+            None, x['H_TES_CP'][t] - m.TES_cap * TES_H_max * (1 - x['b2'][t]), 0) if t in binary['b2'] else (
+            None, x['H_TES_CP'][t] - TES_H_max * m.TES_cap, 0))
+        m.TES_charge_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+            None, TES_charge[t] - m.TES_cap * TES_H_max * x['b2'][t], 0) if t in binary['b2'] else (
+            None, TES_charge[t] - TES_H_max * m.TES_cap, 0))
+    m.TES_soe_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+        (x['TES_soe'][t], first_soe['TES_soe']) if t == 0 and first_soe else
+        pm.Constraint.Skip if t in linked else (TES_soe[t], 0)))
+    m.TES_size_constraint = pm.Constraint(m.T, rule=lambda m, t: (None, x['TES_soe'][t] - m.TES_cap, 0))
+    # hydrogen constraints
+    m.H2S_soe_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+        (x['H2S_soe'][t], first_soe['H2S_soe']) if t == 0 and first_soe else
+        pm.Constraint.Skip if t in linked else (H2S_soe[t], 0)))
+    if linearize:
+        m.H2S_in_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+            None, eta_H2S * x['H2_H2E_H2S'][t] - m.H2S_cap / time_step, 0))
+        m.H2S_in_bigM_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+            None, eta_H2S * x['H2_H2E_H2S'][t] - M['H2S_in'] * x['b4'][t], 0) if t in binary['b4'] else
+            pm.Constraint.Skip)
+        m.H2S_out_constraint = pm.Constraint(m.T, rule=lambda m, t: (x['H2_H2S_H2B'][t], 0) if t in empty else (
+            None, x['H2_H2S_H2B'][t] - x['H2S_soe'][t] / time_step, 0))
+        m.H2S_out_bigM_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+            pm.Constraint.Skip if t in empty or t not in binary['b4'] else (
+                None, x['H2_H2S_H2B'][t] + M['H2S_out'] * x['b4'][t], M['H2S_out'])))
+    else:
+        m.H2S_in_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+            None, eta_H2S * x['H2_H2E_H2S'][t] - m.H2S_cap / time_step * x['b4'][t], 0) if t in binary['b4'] else (
+            None, eta_H2S * x['H2_H2E_H2S'][t] - m.H2S_cap / time_step, 0))
+        m.H2S_out_constraint = pm.Constraint(m.T, rule=lambda m, t: (x['H2_H2S_H2B'][t], 0) if t in empty else (
+            None, x['H2_H2S_H2B'][t] - x['H2S_soe'][t] / time_step * (1 - x['b4'][t]), 0) if t in binary['b4'] else (
+            None, x['H2_H2S_H2B'][t] - x['H2S_soe'][t] / time_step, 0))
+    m.H2B_balance_constraint = pm.Constraint(m.T, rule=lambda m, t: (H2B_balance[t], 0))
+    m.H2E_balance_constraint = pm.Constraint(m.T, rule=lambda m, t: (H2E_balance[t], 0))
+    m.H2S_size_constraint = pm.Constraint(m.T, rule=lambda m, t: (None, x['H2S_soe'][t] - m.H2S_cap, 0))
+    m.H2B_size_constraint = pm.Constraint(m.T, rule=lambda m, t: (None, x['H_H2B_CP'][t] - m.H2B_cap, 0))
+    m.H2E_size_constraint = pm.Constraint(m.T, rule=lambda m, t: (None, H2E_size[t] - m.H2E_cap, 0))
+    # grid constraint
+    m.max_grid_power_in_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+        None, grid_power_in[t], 0) if t in binary['b3'] else (None, grid_power_in_relaxed[t], gr_connection))
+    m.max_grid_power_out_constraint = pm.Constraint(m.T, rule=lambda m, t: (
+        None, grid_power_out[t] if t in binary['b3'] else grid_power_out_relaxed[t], gr_connection))
+
+    # storages linked across the sequence of periods
+    if period_sequence is not None:
+        sequence = [starts[period] for period in period_sequence]  # first time step of the period of every period
+        m.S = pm.RangeSet(0, len(sequence) - 1)  # periods of the sequence
+        m.R = pm.RangeSet(0, len(starts) - 1)  # representative periods
+
+        def link_storage(name, soe_balance):
+            soe, cap = x[name + '_soe'], getattr(m, name + '_cap')
+            # state of energy at the start of every period of the sequence, highest and lowest state of energy
+            # within every representative period
+            m.add_component(name + '_soe_start', pm.Var(m.S, bounds=(0, None)))
+            m.add_component(name + '_soe_high', pm.Var(m.R))
+            m.add_component(name + '_soe_low', pm.Var(m.R))
+            start, high, low = (list(getattr(m, name + '_soe_' + var).values()) for var in ('start', 'high', 'low'))
+            m.add_component(name + '_soe_high_constraint', pm.Constraint(m.T, rule=lambda m, t: (
+                None, soe[t] - high[t // period_length], 0)))
+            m.add_component(name + '_soe_low_constraint', pm.Constraint(m.T, rule=lambda m, t: (
+                0, soe[t] - low[t // period_length], None)))
+            # the balance at the first time step of a representative period is the negative change of the state of
+            # energy over the period
+            m.add_component(name + '_soe_link_constraint', pm.Constraint(m.S, rule=lambda m, i: (start[i], 0) if i == 0
+                            else (start[i] - start[i - 1] + soe_balance[sequence[i - 1]], 0)))
+            # the state of energy stays within the capacity over every period of the sequence
+            m.add_component(name + '_soe_max_constraint', pm.Constraint(m.S, rule=lambda m, i: (
+                None, start[i] + high[sequence[i] // period_length] - soe[sequence[i]] - cap, 0)))
+            m.add_component(name + '_soe_min_constraint', pm.Constraint(m.S, rule=lambda m, i: (
+                0, start[i] + low[sequence[i] // period_length] - soe[sequence[i]], None)))
+
+        for name, soe_balance in (('bat', bat_soe), ('TES', TES_soe), ('H2S', H2S_soe)):
+            link_storage(name, soe_balance)
+
+    # add OBJECTIVE FUNCTION
+    # the cost coefficients of all time steps are computed as arrays and the objective is one linear expression
+    el_cost = np.asarray(price_el, dtype=float) * time_step
+    NG_cost = np.asarray(price_NG, dtype=float) * time_step
+    if step_weights is not None:
+        el_cost, NG_cost = el_cost * step_weights, NG_cost * step_weights
+    capex = {tech: annuity(c, tech) for tech in ['bat', 'ElB', 'TES', 'HP', 'H2E', 'H2B', 'H2S']}
+    if mutable:
+        m.el_cost = pm.Param(m.T, initialize=dict(enumerate(el_cost.tolist())), mutable=True)
+        m.NG_cost = pm.Param(m.T, initialize=dict(enumerate(NG_cost.tolist())), mutable=True)
+        m.annuity = pm.Param(list(capex), initialize=capex, mutable=True)
+        el_cost, NG_cost = list(m.el_cost.values()), list(m.NG_cost.values())
+        el_revenue = [-p for p in el_cost]
+        capex = {tech: m.annuity[tech] for tech in capex}
+    else:
+        el_revenue = -el_cost
+    cost_terms = [t for name in grid_in for t in terms(el_cost, x[name])] + \
+                 [t for name in ('P_GT_gr', 'P_bat_gr') for t in terms(el_revenue, x[name])] + \
+                 [t for name in ('NG_GT_in', 'NG_GB_in') for t in terms(NG_cost, x[name])] + \
+                 [MonomialTermExpression((capex[tech], getattr(m, tech + '_cap'))) for tech in capex]
+    m.objective = pm.Objective(expr=LinearExpression(cost_terms),
+                               sense=pm.minimize,
+                               doc='Define objective function')
+    return m
+
+
+def update_PI_model(m, price_el, price_NG, c, time_step):
+    # set the prices and annuities of a model built with mutable=True to the values of another scenario
+    m.el_cost.store_values(dict(enumerate((np.asarray(price_el, dtype=float) * time_step).tolist())))
+    m.NG_cost.store_values(dict(enumerate((np.asarray(price_NG, dtype=float) * time_step).tolist())))
+    m.annuity.store_values({tech: annuity(c, tech) for tech in m.annuity})
+
+
+def cluster_periods(profiles, period_length, n_periods, iterations=100, seed=0):
+    # select representative periods of period_length time steps from the time series in profiles (one column per
+    # series) by k-means clustering of the complete periods, with every series scaled to the range 0..1. Returns the
+    # indices of the representative periods (the period closest to the centre of each cluster, in chronological
+    # order), their weights (the number of periods in the cluster, scaled to the full length of the time series) and
+    # the sequence of the complete periods: the position of the representative period of every period
+    profiles = np.asarray(profiles, dtype=float).reshape(len(profiles), -1)
+    n_full = len(profiles) // period_length
+    if not 0 < n_periods <= n_full:
+        raise ValueError("The number of representative periods must be between 1 and the number of complete "
+                         "periods (" + str(n_full) + ").")
+    span = profiles.max(axis=0) - profiles.min(axis=0)
+    scaled = (profiles - profiles.min(axis=0)) / np.where(span > 0, span, 1)
+    features = scaled[:n_full * period_length].reshape(n_full, -1)
+
+    def distances(centres):  # squared distances of all periods to all centres
+        return ((features[:, None, :] - centres[None, :, :]) ** 2).sum(axis=2)
+
+    # k-means++ initialisation: every new centre is drawn with a probability proportional to the squared distance
+    # to the closest centre chosen so far
+    rng = np.random.default_rng(seed)
+    centres = features[[rng.integers(n_full)]]
+    for _ in range(1, n_periods):
+        distance = distances(centres).min(axis=1)
+        probability = distance / distance.sum() if distance.sum() > 0 else np.full(n_full, 1 / n_full)
+        centres = np.vstack([centres, features[rng.choice(n_full, p=probability)]])
+    for _ in range(iterations):
+        labels = distances(centres).argmin(axis=1)
+        # an empty cluster keeps its centre
+        new_centres = np.array([features[labels == k].mean(axis=0) if np.any(labels == k) else centres[k]
+                                for k in range(n_periods)])
+        if np.allclose(new_centres, centres):
+            break
+        centres = new_centres
+    distance = distances(centres)
+    labels = distance.argmin(axis=1)
+    periods, counts, clusters = [], [], []
+    for k in range(n_periods):
+        members = np.flatnonzero(labels == k)
+        if len(members) > 0:  # clusters that stayed empty are dropped
+            periods.append(members[distance[members, k].argmin()])
+            counts.append(len(members))
+            clusters.append(k)
+    order = np.argsort(periods)
+    weights = np.asarray(counts, dtype=float)[order] * len(profiles) / (n_full * period_length)
+    position = np.zeros(n_periods, dtype=int)
+    position[np.asarray(clusters)[order]] = np.arange(len(order))
+    return np.asarray(periods)[order], weights, position[labels]
+
+
+def clustering_error(profiles, period_length, periods, sequence):
+    # error of the representation of the time series in profiles (one column per series) by the representative
+    # periods of cluster_periods: root mean square difference between every complete period and its representative
+    # period, relative to the range of each series (0: the series is represented exactly)
+    profiles = np.asarray(profiles, dtype=float).reshape(len(profiles), -1)
+    steps = (np.asarray(periods)[sequence][:, None] * period_length + np.arange(period_length)).ravel()
+    span = profiles.max(axis=0) - profiles.min(axis=0)
+    error = np.sqrt(((profiles[:len(steps)] - profiles[steps]) ** 2).mean(axis=0))
+    return error / np.where(span > 0, span, 1)
+
+
+# columns of the energy flows dataframe of the plug-in system and the variables they are taken from
+PI_flow_columns = {
+    'Natural gas consumption GT [MW]': 'NG_GT_in',
+    'Natural gas consumption GB [MW]': 'NG_GB_in',
+    'Power from GT to battery': 'P_GT_bat',
+    'Power from GT to heat pump': 'P_GT_HP',
+    'Power from GT to electric boiler': 'P_GT_ElB',
+    'Power from GT to electrolyser': 'P_GT_H2E',
+    'Power from GT to process': 'P_GT_process',
+    'Power excess from GT': 'P_GT_excess',
+    'Power from GT to grid': 'P_GT_gr',
+    'Heat from CHP to core process': 'H_CHP_CP',
+    'Heat from CHP to TES': 'H_CHP_TES',
+    'Heat excess from CHP': 'H_CHP_excess',
+    'Power from grid to electric boiler': 'P_gr_ElB',
+    'Power from grid to battery': 'P_gr_bat',
+    'Power from grid to electrolyser': 'P_gr_H2E',
+    'Power from grid to heat pump': 'P_gr_HP',
+    'Power from grid to process': 'P_gr_process',
+    'Battery to electric boiler': 'P_bat_ElB',
+    'Battery to electrolyser': 'P_bat_H2E',
+    'Battery to heat pump': 'P_bat_HP',
+    'Battery to process': 'P_bat_process',
+    'Battery to grid': 'P_bat_gr',
+    'Heat from electric boiler to core process': 'H_ElB_CP',
+    'Heat from electric boiler to TES': 'H_ElB_TES',
+    'TES to CP': 'H_TES_CP',
+    'Heat from hydrogen boiler to core process': 'H_H2B_CP',
+    'Heat from heat pump to core process': 'H_HP_CP',
+    'Heat from heat pump to TES': 'H_HP_TES',
+    'H2E to H2S': 'H2_H2E_H2S',
+    'H2S to H2B': 'H2_H2S_H2B',
+    'H2E to H2B': 'H2_H2E_H2B',
+    'TES SOE': 'TES_soe',
+    'Battery SOE': 'bat_soe',
+    'H2S SOE': 'H2S_soe'}
+
+
+def energy_flows(solution, flow_columns, index, H_dem, P_dem):
+    # energy flows dataframe from the solution of a model: a solved pyomo model, a solution with the values of the
+    # variables as attributes (matrix model, merit-order dispatch) or a dictionary of values ({name: values}).
+    # flow_columns: {column: variable name}. The values of all variables are read in one pass into one preallocated
+    # array (time steps x columns), which becomes the dataframe without copying single columns
+    columns = ['Heat demand core process', 'Power demand core process'] + list(flow_columns)
+    flows = np.empty((len(index), len(columns)))
+    flows[:, 0], flows[:, 1] = H_dem, P_dem
+    for column, name in enumerate(flow_columns.values(), start=2):
+        values = solution[name] if isinstance(solution, dict) else getattr(solution, name)
+        if isinstance(values, pm.Var):
+            flows[:, column] = np.fromiter((var.value for var in values.values()), dtype=float, count=len(index))
+        else:
+            flows[:, column] = values
+    return pd.DataFrame(flows, index=index, columns=columns, copy=False)
+
+
+def PI_energy_flows(solution, index, H_dem, P_dem):
+    # energy flows dataframe of the plug-in system from the solution of its model (see energy_flows)
+    return energy_flows(solution, PI_flow_columns, index, H_dem, P_dem)
+
+
+# KPIs of the plug-in system with the energy flows they are summed from [MWh]
+PI_flow_kpis = {
+    'CHP heat gen to CP [MWh]': ['Heat from CHP to core process'],
+    'CHP heat gen to TES [MWh]': ['Heat from CHP to TES'],
+    'CHP excess heat gen [MWh]': ['Heat excess from CHP'],
+    'GT electricity gen to HP [MWh]': ['Power from GT to heat pump'],
+    'GT electricity gen to battery [MWh]': ['Power from GT to battery'],
+    'GT electricity gen to ElB [MWh]': ['Power from GT to electric boiler'],
+    'GT electricity gen to H2E [MWh]': ['Power from GT to electrolyser'],
+    'GT excess electricity gen [MWh]': ['Power excess from GT'],
+    'GT electricity gen to process [MWh]': ['Power from GT to process'],
+    'GT electricity gen to grid [MWh]': ['Power from GT to grid'],
+    'total natural gas consumption [MWh]': ['Natural gas consumption GT [MW]', 'Natural gas consumption GB [MW]'],
+    'total grid consumption [MWh]': ['Power from grid to electric boiler', 'Power from grid to battery',
+                                     'Power from grid to electrolyser', 'Power from grid to heat pump',
+                                     'Power from grid to process'],
+    'grid to battery [MWh]': ['Power from grid to battery'],
+    'grid to electric boiler [MWh]': ['Power from grid to electric boiler'],
+    'grid to electrolyser [MWh]': ['Power from grid to electrolyser'],
+    'grid to HP [MWh]': ['Power from grid to heat pump'],
+    'grid to process [MWh]': ['Power from grid to process'],
+    'ElB gen to CP [MWh]': ['Heat from electric boiler to core process'],
+    'ElB gen to TES [MWh]': ['Heat from electric boiler to TES'],
+    'battery to ElB [MWh]': ['Battery to electric boiler'],
+    'battery to electrolyser [MWh]': ['Battery to electrolyser'],
+    'battery to HP [MWh]': ['Battery to heat pump'],
+    'battery to process [MWh]': ['Battery to process'],
+    'battery to grid [MWh]': ['Battery to grid'],
+    'TES to CP [MWh]': ['TES to CP'],
+    'H2 from electrolyser to boiler [MWh]': ['H2E to H2B'],
+    'H2 from electrolyser to storage [MWh]': ['H2E to H2S'],
+    'Hydrogen boiler to CP [MWh]': ['Heat from hydrogen boiler to core process'],
+    'H2 from storage to boiler [MWh]': ['H2S to H2B'],
+    'Heat from HP to CP [MWh]': ['Heat from heat pump to core process'],
+    'Heat from HP to TES [MWh]': ['Heat from heat pump to TES']}
+# charging and discharging flows of the storages that are checked for simultaneous use (installed capacity, charging
+# flows, discharging flows)
+PI_storage_checks = {
+    'battery': ('bat_cap', ['Power from grid to battery', 'Power from GT to battery'],
+                ['Battery to electrolyser', 'Battery to electric boiler', 'Battery to heat pump', 'Battery to grid',
+                 'Battery to process']),
+    'TES': ('TES_cap', ['Heat from CHP to TES', 'Heat from electric boiler to TES'], ['TES to CP']),
+    'H2S': ('H2S_cap', ['H2E to H2S'], ['H2S to H2B'])}
+
+
+def PI_results(result, capacities, objective, c, time_step):
+    # KPIs and diagnostics of a run of the plug-in system, computed in one vectorized pass over the array of the
+    # energy flows (result, see PI_energy_flows). capacities: installed capacities ({'bat_cap': ..., see
+    # PI_capacities}). Prints the diagnostics and returns the results in the order of the results dictionary
+    flows = result.to_numpy()
+    column = {name: index for index, name in enumerate(result.columns)}
+    totals = flows.sum(axis=0)
+
+    def flow_sum(names):
+        return flows[:, [column[name] for name in names]].sum(axis=1)
+
+    def energy(names):
+        return sum(totals[column[name]] for name in names) * time_step
+
+    grid_P_out = flow_sum(PI_flow_kpis['total grid consumption [MWh]'])
+    grid_P_out_max = grid_P_out.max()
+    # control: H_CP==H_dem?
+    control_H = totals[column['Heat demand core process']] - sum(
+        totals[column[name]] for name in ['Heat from electric boiler to core process', 'Heat from CHP to core process',
+                                          'TES to CP', 'Heat from hydrogen boiler to core process',
+                                          'Heat from heat pump to core process'])
+    print("control_H =", control_H)
+    # display total cost and installed capacities
+    print("Total cost = ", objective)
+    print("HP capacity =", capacities['HP_cap'])
+    print("Battery capacity =", capacities['bat_cap'])
+    print("Electric boiler capacity =", capacities['ElB_cap'])
+    print("TES capacity =", capacities['TES_cap'])
+    print("electrolyser capacity =", capacities['H2E_cap'])
+    print("Hydrogen boiler capacity =", capacities['H2B_cap'])
+    print("Hydrogen storage capacity =", capacities['H2S_cap'])
+    # display grid connection use
+    print("Grid capacity: ", c['gr_connection'], "Max. power flow from grid: ", grid_P_out_max)
+
+    # IF storage capacity is installed, how many time steps does the storage charge and discharge simultaneously?
+    simultaneous = {}
+    for storage, (capacity, charge, discharge) in PI_storage_checks.items():
+        if capacities[capacity] > 0:
+            simultaneous[storage] = int(np.count_nonzero((flow_sum(charge) > 0) & (flow_sum(discharge) > 0)))
+            print("Number of times of simultaneous " + storage + " charging and discharging: ",
+                  simultaneous[storage])
+    # Check if grid connection is simultaneously used in a bidirectional manner (0.00001 because using 0 led to
+    # rounding errors)
+    bidirectional_grid_use = int(np.count_nonzero(
+        (grid_P_out > 0.00001) & (flow_sum(['Power from GT to grid', 'Battery to grid']) > 0.00001)))
+    print("Number of hours of simultaneous bidirectional grid connection use: ", bidirectional_grid_use)
+
+    # the TES CAPEX is reported without its installation factor
+    capex = {tech: annuity(c, tech) for tech in ['bat', 'ElB', 'H2E', 'H2B', 'H2S', 'HP']}
+    capex['TES'] = c['c_TES_C'] * c['disc_rate'] / (1 - (1 + c['disc_rate']) ** -c['TES_lifetime'])
+    results = {'Optimal result': objective,
+               'CAPEX': sum(capacities[tech + '_cap'] * capex[tech]
+                            for tech in ['bat', 'ElB', 'TES', 'H2E', 'H2B', 'H2S', 'HP'])}
+    results['OPEX'] = results['Optimal result'] - results['CAPEX']
+    # CO2 emissions from natural gas consumption, [MW]*[ton/MWh]*[h] = [ton]
+    results['scope 1 emissions'] = energy(PI_flow_kpis['total natural gas consumption [MWh]']) * c['EF_ng']
+    results['required space'] = sum(capacities[tech + '_cap'] * c[tech + '_spatialreq']
+                                    for tech in ['bat', 'ElB', 'TES', 'H2E', 'H2B', 'H2S', 'HP'])
+    results['grid connection cap'] = c['gr_connection']
+    results['discount rate'] = c['disc_rate']
+    results['max. power flow from grid [MW]'] = grid_P_out_max
+    results['Simultaneous bidirectional use of grid connection [hours]'] = bidirectional_grid_use
+    # sizes and simultaneous use of the storages are stored before the energy of a flow, in the order of the results
+    # dictionary (the simultaneous use only if the storage is installed)
+    stored_before = {
+        'battery to ElB [MWh]': {'ElB size [MW]': capacities['ElB_cap'], 'Battery size [MWh]': capacities['bat_cap']},
+        'TES to CP [MWh]': {'Simultaneous charging and discharging hours battery': simultaneous.get('battery'),
+                            'TES size [MWh]': capacities['TES_cap']},
+        'H2 from electrolyser to boiler [MWh]': {
+            'Simultaneous charging and discharging hours TES': simultaneous.get('TES'),
+            'Simultaneous charging and discharging hours H2S': simultaneous.get('H2S'),
+            'electrolyser size [MW]': capacities['H2E_cap']},
+        'Hydrogen boiler to CP [MWh]': {'Hydrogen boiler size [MW]': capacities['H2B_cap']},
+        'H2 from storage to boiler [MWh]': {'Hydrogen storage size [MWh]': capacities['H2S_cap']},
+        'Heat from HP to CP [MWh]': {'Heat pump size [MW]': capacities['HP_cap']}}
+    for kpi, names in PI_flow_kpis.items():
+        results.update({name: value for name, value in stored_before.get(kpi, {}).items() if value is not None})
+        results[kpi] = energy(names)
+    return results
+
+
+def PI_binary_conflicts(m, tolerance=1e-5):
+    # time steps of a solved plug-in model at which the battery (b1), TES (b2) or hydrogen storage (b4) charge and
+    # discharge simultaneously or the grid connection is used in both directions (b3)
+    def flow(names):
+        return sum(np.array(pm.value(getattr(m, name)[:]), dtype=float) for name in names)
+
+    simultaneous = {
+        'b1': (flow(['P_gr_bat', 'P_GT_bat']),
+               flow(['P_bat_ElB', 'P_bat_H2E', 'P_bat_HP', 'P_bat_process', 'P_bat_gr'])),
+        'b2': (flow(['H_CHP_TES', 'H_ElB_TES', 'H_HP_TES']), flow(['H_TES_CP'])),
+        'b3': (flow(['P_gr_ElB', 'P_gr_HP', 'P_gr_bat', 'P_gr_H2E', 'P_gr_process']), flow(['P_GT_gr', 'P_bat_gr'])),
+        'b4': (flow(['H2_H2E_H2S']), flow(['H2_H2S_H2B']))}
+    return {name: set(np.flatnonzero((flow_in > tolerance) & (flow_out > tolerance)).tolist())
+            for name, (flow_in, flow_out) in simultaneous.items()}
+
+
+def solve_PI_lazy_binaries(build, opt, tee=True, logfile=None):
+    # solve the plug-in model without the binaries first and add them (with their constraints) only at the time steps
+    # at which the solution charges and discharges a storage simultaneously or uses the grid connection in both
+    # directions, then solve again until this no longer occurs. build(binary_steps) returns the model (see
+    # build_PI_model). Leaving out binaries only relaxes the model, so the final solution, which satisfies the
+    # constraints of all binaries, is also optimal for the model with binaries at all time steps. logfile: log file
+    # of the solver (see solver_log_file), which holds the log of the last solve
+    binary_steps = {name: set() for name in ('b1', 'b2', 'b3', 'b4')}
+    iterations = 0
+    while True:
+        m = build(binary_steps)
+        results = opt.solve(m, tee=tee, logfile=logfile)
+        iterations += 1
+        conflicts = PI_binary_conflicts(m)
+        new_steps = {name: conflicts[name] - binary_steps[name] for name in binary_steps}
+        print("Lazy binaries iteration", iterations, "- new time steps with binaries:",
+              {name: len(steps) for name, steps in new_steps.items()})
+        if not any(new_steps.values()):
+            return m, results, binary_steps, iterations
+        for name in binary_steps:
+            binary_steps[name] |= new_steps[name]
+
+
+# variables of the plug-in system and the columns of the benchmark energy flows with the same flows
+benchmark_start_columns = {
+    'NG_GT_in': 'Natural gas consumption GT [MW]',
+    'NG_GB_in': 'Natural gas consumption GB [MW]',
+    'P_GT_process': 'Power from GT to process',
+    'P_GT_excess': 'Power excess from GT',
+    'P_GT_gr': 'Power from GT to grid',
+    'H_CHP_CP': 'Heat from CHP to process',
+    'H_CHP_excess': 'Heat excess from CHP',
+    'P_gr_process': 'Power from grid to process'}
+
+
+def set_PI_start_from_benchmark(m, benchmark_flows):
+    # set the variables of the plug-in model to the dispatch of the benchmark system (energy flows dataframe of
+    # optimisation_run_benchmark_CHP). Without new capacities the plug-in system is the benchmark system, so this is
+    # a feasible solution of the plug-in model for the same demand and prices.
+    for var in m.component_data_objects(pm.Var):
+        var.set_value(0, skip_validation=True)
+    for name, column in benchmark_start_columns.items():
+        for var, value in zip(getattr(m, name).values(), benchmark_flows[column].to_numpy()):
+            var.set_value(value, skip_validation=True)
+    # the grid connection binary allows power from the grid wherever the benchmark takes power from the grid
+    for var, value in zip(m.b3.values(), benchmark_flows['Power from grid to process'].to_numpy()):
+        var.set_value(1 if value > 0 else 0, skip_validation=True)
+
+
+# ________________________________________ Matrix form of the models ___________________________________________________
+# capacity and binary variables of the plug-in system (its time-dependent flows are the variables in PI_flow_columns)
+PI_capacities = ('bat_cap', 'ElB_cap', 'TES_cap', 'HP_cap', 'H2S_cap', 'H2B_cap', 'H2E_cap')
+PI_binaries = ('b1', 'b2', 'b3', 'b4')
+matrix_solvers = ['highs', 'gurobi']  # solvers of the matrix models: HiGHS (scipy.optimize.milp) or gurobipy
+
+
+def matrix_columns(sizes):
+    # column indices of the variables of a matrix model ({name: number of time steps, None for a scalar variable})
+    columns, offset = {}, 0
+    for name, size in sizes.items():
+        columns[name] = offset if size is None else np.arange(offset, offset + size)
+        offset += 1 if size is None else size
+    return columns, offset
+
+
+def matrix_rows(n_rows, entries, n_columns):
+    # sparse rows of a constraint family with n_rows rows (one per time step). entries: (coefficient, columns) pairs,
+    # each with a scalar or per-row coefficient and a scalar (e.g. a capacity) or per-row column index
+    data = np.concatenate([np.broadcast_to(np.asarray(coef, dtype=float), n_rows) for coef, _ in entries])
+    columns = np.concatenate([np.broadcast_to(cols, n_rows) for _, cols in entries])
+    rows = np.tile(np.arange(n_rows), len(entries))
+    return sp.csr_matrix((data, (rows, columns)), shape=(n_rows, n_columns))
+
+
+def matrix_model(blocks, columns, n_columns, cost, lower, upper, integer):
+    # collect the constraint families (sparse rows, lower and upper bounds of the rows) of a matrix model. The rows
+    # are equalities (lower == upper) or upper limits (lower = -inf)
+    return {'A': sp.vstack([rows for rows, _, _ in blocks], format='csr'),
+            'row_lower': np.concatenate([np.broadcast_to(np.asarray(low, dtype=float), rows.shape[0])
+                                         for rows, low, _ in blocks]),
+            'row_upper': np.concatenate([np.broadcast_to(np.asarray(up, dtype=float), rows.shape[0])
+                                         for rows, _, up in blocks]),
+            'cost': cost, 'lower': lower, 'upper': upper, 'integrality': integer.astype(int), 'columns': columns,
+            'n_columns': n_columns}
+
+
+def build_PI_matrix(H_dem, P_dem, price_el, price_NG, GT_min_load, c, time_step):
+    # matrix form of the linearised plug-in model (build_PI_model with linearize=True and empty storages at the
+    # start), assembled as scipy.sparse blocks directly from the arrays of demand and prices, without creating Pyomo
+    # components. Returns the constraint matrix, the bounds of rows and variables, the cost vector, the integrality
+    # and the column indices of the variables (see matrix_model)
+    H_dem, P_dem, price_el, price_NG = (np.asarray(a, dtype=float) for a in (H_dem, P_dem, price_el, price_NG))
+    n = len(H_dem)
+    x, n_columns = matrix_columns(dict({name: n for name in PI_flow_columns.values()},
+                                       **{name: None for name in PI_capacities}, **{name: n for name in PI_binaries}))
+
+    eta_bat, eta_TES, eta_H2S = c['eta_bat'], c['eta_TES'], c['eta_H2S']
+    bat_P_max = c['crate_bat'] / time_step  # maximum (dis)charging power per MWh battery capacity
+    TES_H_max = c['crate_TES'] / time_step  # maximum (dis)charging power per MWh TES capacity
+    gr_connection = c['gr_connection']
+    M = PI_big_M(c, H_dem, P_dem, price_el, price_NG, GT_min_load, time_step)
+    bat_in = ('P_gr_bat', 'P_GT_bat')
+    bat_out = ('P_bat_ElB', 'P_bat_H2E', 'P_bat_HP', 'P_bat_process', 'P_bat_gr')
+    TES_in = ('H_CHP_TES', 'H_ElB_TES', 'H_HP_TES')
+    H2E_in = ('P_gr_H2E', 'P_GT_H2E', 'P_bat_H2E')
+    grid_in = ('P_gr_ElB', 'P_gr_HP', 'P_gr_bat', 'P_gr_H2E', 'P_gr_process')
+    GT_out = ('P_GT_excess', 'P_GT_bat', 'P_GT_ElB', 'P_GT_H2E', 'P_GT_HP', 'P_GT_process', 'P_GT_gr')
+    # the storage balances link every time step from the second on to its previous time step
+    now, before = slice(1, None), slice(None, -1)
+    blocks = []
+
+    def flows(coef, names, steps=slice(None)):  # entries of several variables with a common coefficient
+        return [(coef, x[name][steps]) for name in names]
+
+    def add(entries, lower, upper, n_rows=n):
+        blocks.append((matrix_rows(n_rows, entries, n_columns), lower, upper))
+
+    # balance supply and demand
+    add(flows(1, ('H_ElB_CP', 'H_CHP_CP', 'H_TES_CP', 'H_H2B_CP', 'H_HP_CP')), H_dem, H_dem)
+    add(flows(1, ('P_gr_process', 'P_GT_process', 'P_bat_process')), P_dem, P_dem)
+    # CHP constraints (capacities and minimum load of GT and GB are bounds of the natural gas intake)
+    add([(c['eta_GT_th'] * c['eta_GB'], x['NG_GT_in']), (c['eta_GB'], x['NG_GB_in'])] +
+        flows(-1, ('H_CHP_CP', 'H_CHP_TES', 'H_CHP_excess')), 0, 0)
+    add([(c['eta_GT_el'], x['NG_GT_in'])] + flows(-1, GT_out), 0, 0)
+    # electric boiler and heat pump constraints
+    add(flows(1, ('H_ElB_CP', 'H_ElB_TES')) + [(-1, x['ElB_cap'])], -np.inf, 0)
+    add(flows(1, ('H_ElB_CP', 'H_ElB_TES')) + flows(-c['eta_ElB'], ('P_gr_ElB', 'P_bat_ElB', 'P_GT_ElB')), 0, 0)
+    add(flows(1, ('H_HP_CP', 'H_HP_TES')) + [(-1, x['HP_cap'])], -np.inf, 0)
+    add(flows(1, ('H_HP_CP', 'H_HP_TES')) +
+        flows(-c['HP_COP_carnot'] * c['eta_HP'], ('P_gr_HP', 'P_bat_HP', 'P_GT_HP')), 0, 0)
+    # battery constraints
+    add(flows(1, ['bat_soe'], now) + flows(-1, ['bat_soe'], before) + flows(-eta_bat * time_step, bat_in, before) +
+        flows(time_step / eta_bat, bat_out, before), 0, 0, n - 1)
+    add(flows(1 / eta_bat, bat_out) + [(-bat_P_max, x['bat_cap'])], -np.inf, 0)
+    add(flows(1 / eta_bat, bat_out) + [(M['bat_out'], x['b1'])], -np.inf, M['bat_out'])
+    add(flows(eta_bat, bat_in) + [(-bat_P_max, x['bat_cap'])], -np.inf, 0)
+    add(flows(eta_bat, bat_in) + [(-M['bat_in'], x['b1'])], -np.inf, 0)
+    add([(1, x['bat_soe']), (-1, x['bat_cap'])], -np.inf, 0)
+    # TES constraints
+    add([(1, x['H_TES_CP']), (-TES_H_max, x['TES_cap'])], -np.inf, 0)
+    add([(1, x['H_TES_CP']), (M['TES_out'], x['b2'])], -np.inf, M['TES_out'])
+    add(flows(eta_TES, TES_in) + [(-TES_H_max, x['TES_cap'])], -np.inf, 0)
+    add(flows(eta_TES, TES_in) + [(-M['TES_in'], x['b2'])], -np.inf, 0)
+    add(flows(1, ['TES_soe'], now) + flows(-1, ['TES_soe'], before) + flows(-eta_TES * time_step, TES_in, before) +
+        flows(time_step, ['H_TES_CP'], before), 0, 0, n - 1)
+    add([(1, x['TES_soe']), (-1, x['TES_cap'])], -np.inf, 0)
+    # hydrogen constraints
+    add(flows(1, ['H2S_soe'], now) + flows(-1, ['H2S_soe'], before) +
+        flows(-eta_H2S * time_step, ['H2_H2E_H2S'], before) + flows(time_step, ['H2_H2S_H2B'], before), 0, 0, n - 1)
+    add([(eta_H2S, x['H2_H2E_H2S']), (-1 / time_step, x['H2S_cap'])], -np.inf, 0)
+    add([(eta_H2S, x['H2_H2E_H2S']), (-M['H2S_in'], x['b4'])], -np.inf, 0)
+    add([(1, x['H2_H2S_H2B']), (-1 / time_step, x['H2S_soe'])], -np.inf, 0)
+    add([(1, x['H2_H2S_H2B']), (M['H2S_out'], x['b4'])], -np.inf, M['H2S_out'])
+    add(flows(c['eta_H2B'], ('H2_H2E_H2B', 'H2_H2S_H2B')) + flows(-1, ['H_H2B_CP']), 0, 0)
+    add(flows(c['eta_H2E'], H2E_in) + flows(-1, ('H2_H2E_H2B', 'H2_H2E_H2S')), 0, 0)
+    add([(1, x['H2S_soe']), (-1, x['H2S_cap'])], -np.inf, 0)
+    add([(1, x['H_H2B_CP']), (-1, x['H2B_cap'])], -np.inf, 0)
+    add(flows(1, H2E_in) + [(-1, x['H2E_cap'])], -np.inf, 0)
+    # grid constraints
+    add(flows(1, grid_in) + [(-gr_connection, x['b3'])], -np.inf, 0)
+    add(flows(1, ('P_GT_gr', 'P_bat_gr')) + [(gr_connection, x['b3'])], -np.inf, gr_connection)
+
+    # bounds of the variables: the storages start empty and cannot discharge at the first time step
+    lower, upper = np.zeros(n_columns), np.full(n_columns, np.inf)
+    lower[x['NG_GT_in']] = c['GT_cap'] / c['eta_GT_th'] * GT_min_load
+    upper[x['NG_GT_in']] = c['GT_cap'] / c['eta_GT_th']
+    upper[x['NG_GB_in']] = 0.2 * c['GT_cap'] / c['eta_GB']
+    for name in ('bat_soe', 'TES_soe', 'H2S_soe', 'H_TES_CP', 'H2_H2S_H2B') + bat_out:
+        upper[x[name][0]] = 0
+    integer = np.zeros(n_columns, dtype=bool)
+    for name in PI_binaries:
+        upper[x[name]] = 1
+        integer[x[name]] = True
+
+    # cost vector of the objective function
+    cost = np.zeros(n_columns)
+    for name in grid_in:
+        cost[x[name]] = price_el * time_step
+    for name in ('P_GT_gr', 'P_bat_gr'):
+        cost[x[name]] = -price_el * time_step
+    for name in ('NG_GT_in', 'NG_GB_in'):
+        cost[x[name]] = price_NG * time_step
+    for name in PI_capacities:
+        cost[x[name]] = annuity(c, name[:-len('_cap')])
+    return matrix_model(blocks, x, n_columns, cost, lower, upper, integer)
+
+
+def build_benchmark_matrix(H_dem, P_dem, price_el, price_NG, GT_min_load, c, time_step):
+    # matrix form of the benchmark model (see optimisation_run_benchmark_CHP); c: constants of the benchmark system
+    # ('GT_cap', 'eta_GT_el', 'eta_GT_th', 'eta_GB', 'gr_connection')
+    H_dem, P_dem, price_el, price_NG = (np.asarray(a, dtype=float) for a in (H_dem, P_dem, price_el, price_NG))
+    n = len(H_dem)
+    x, n_columns = matrix_columns({name: n for name in ('NG_GT_in', 'NG_GB_in', 'P_GT_process', 'P_GT_excess',
+                                                        'P_GT_gr', 'H_CHP_process', 'H_CHP_excess', 'P_gr_process',
+                                                        'b1')})
+    gr_connection = c['gr_connection']
+    blocks = [
+        # balance supply and demand
+        (matrix_rows(n, [(1, x['H_CHP_process'])], n_columns), H_dem, H_dem),
+        (matrix_rows(n, [(1, x['P_gr_process']), (1, x['P_GT_process'])], n_columns), P_dem, P_dem),
+        # CHP constraints (capacities and minimum load of GT and GB are bounds of the natural gas intake)
+        (matrix_rows(n, [(c['eta_GT_el'], x['NG_GT_in']), (-1, x['P_GT_excess']), (-1, x['P_GT_process']),
+                         (-1, x['P_GT_gr'])], n_columns), 0, 0),
+        (matrix_rows(n, [(c['eta_GT_th'] * c['eta_GB'], x['NG_GT_in']), (c['eta_GB'], x['NG_GB_in']),
+                         (-1, x['H_CHP_process']), (-1, x['H_CHP_excess'])], n_columns), 0, 0),
+        # grid constraints
+        (matrix_rows(n, [(1, x['P_gr_process']), (-gr_connection, x['b1'])], n_columns), -np.inf, 0),
+        (matrix_rows(n, [(1, x['P_GT_gr']), (gr_connection, x['b1'])], n_columns), -np.inf, gr_connection)]
+
+    lower, upper = np.zeros(n_columns), np.full(n_columns, np.inf)
+    lower[x['NG_GT_in']] = c['GT_cap'] / c['eta_GT_th'] * GT_min_load
+    upper[x['NG_GT_in']] = c['GT_cap'] / c['eta_GT_th']
+    upper[x['NG_GB_in']] = 0.2 * c['GT_cap'] / c['eta_GB']
+    upper[x['b1']] = 1
+    integer = np.zeros(n_columns, dtype=bool)
+    integer[x['b1']] = True
+    cost = np.zeros(n_columns)
+    cost[x['P_gr_process']] = price_el * time_step
+    cost[x['P_GT_gr']] = -price_el * time_step
+    cost[x['NG_GT_in']] = cost[x['NG_GB_in']] = price_NG * time_step
+    return matrix_model(blocks, x, n_columns, cost, lower, upper, integer)
+
+
+def solve_matrix_model(model, settings=None, threads=None, statistics=None):
+    # solve a matrix model (build_PI_matrix, build_benchmark_matrix) with HiGHS through scipy.optimize.milp or with
+    # the matrix interface of gurobipy. Returns the solution values of the variables ({name: values}, arrays for
+    # time-dependent variables) and the objective value
+    # statistics: dictionary in which the size of the model, the solver status, the final MIP gap and the number of
+    # nodes are stored (see run_statistics)
+    settings = solver_settings(settings)
+    if settings['solver'] not in matrix_solvers:
+        raise ValueError("The matrix models are only solved with " + " or ".join(matrix_solvers) + ".")
+    if settings['solver'] == 'highs':
+        if threads is not None or settings['threads'] is not None:
+            print("The setting threads is not available for highs in scipy and is ignored.")
+        options = {'disp': settings['tee'], 'time_limit': settings['time_limit'], 'mip_rel_gap': settings['mip_gap'],
+                   'presolve': None if settings['presolve'] is None else settings['presolve'] != 'off'}
+        res = milp(model['cost'], integrality=model['integrality'], bounds=Bounds(model['lower'], model['upper']),
+                   constraints=LinearConstraint(model['A'], model['row_lower'], model['row_upper']),
+                   options={name: value for name, value in options.items() if value is not None})
+        if res.x is None:
+            raise RuntimeError("No solution of the matrix model was found: " + res.message)
+        solution, objective = res.x, res.fun
+        status = 'optimal' if res.status == 0 else res.message
+        mip_gap, nodes = getattr(res, 'mip_gap', None), getattr(res, 'mip_node_count', None)
+    else:
+        import gurobipy as gp  # only needed for this solver
+        env = gp.Env(empty=True)
+        env.setParam('OutputFlag', int(settings['tee']))
+        env.start()
+        m = gp.Model(env=env)
+        # the gurobipy model takes the options in the names of configure_solver
+        options = SimpleNamespace(options={})
+        configure_solver(options, settings, threads=threads)
+        for name, value in options.options.items():
+            m.setParam(name, value)
+        v = m.addMVar(model['n_columns'], lb=model['lower'], ub=model['upper'], obj=model['cost'],
+                      vtype=np.where(model['integrality'] == 1, gp.GRB.BINARY, gp.GRB.CONTINUOUS))
+        m.addMConstr(model['A'], v, np.where(model['row_lower'] == model['row_upper'], '=', '<'), model['row_upper'])
+        m.optimize()
+        if m.SolCount == 0:
+            raise RuntimeError("No solution of the matrix model was found, gurobi status " + str(m.Status) + ".")
+        solution, objective = v.X, m.ObjVal
+        status = 'optimal' if m.Status == gp.GRB.OPTIMAL else 'gurobi status ' + str(m.Status)
+        mip_gap, nodes = m.MIPGap, int(m.NodeCount)
+        m.dispose()
+        env.dispose()
+    if statistics is not None:
+        statistics.update({'variables': model['n_columns'], 'binary variables': int(model['integrality'].sum()),
+                           'constraints': model['A'].shape[0], 'nonzeros': model['A'].nnz, 'solver status': status,
+                           'MIP gap': mip_gap, 'nodes': nodes})
+    values = {name: solution[columns] for name, columns in model['columns'].items()}
+    return values, objective
+
+
+# ________________________________________ Input preparation ___________________________________________________________
+def amplified_prices(price, amp_values):
+    # price profiles with amplified variation for all factors k of amp_values in one array (one column per factor):
+    # mean + k * (price - mean), with negative prices set to zero
+    price = np.asarray(price, dtype=float)
+    mean = price.mean()
+    return np.maximum(mean + np.multiply.outer(price - mean, np.asarray(amp_values, dtype=float)), 0)
+
+
+def price_duration_curves(prices):
+    # price duration curves: the prices of every column (or of a single profile) sorted from high to low
+    return -np.sort(-np.asarray(prices, dtype=float), axis=0)
+
+
+def prepare_inputs(heat_demand_orig, price_el_hourly, price_NG_use, amp_values, hours, time_step=0.5):
+    # input arrays of one price scenario for the first hours operational hours in the resolution of the optimisation
+    # (time_step [h]), shared by optimisation_run_PI_CHP and optimisation_run_benchmark_CHP. The input dataframes are
+    # not changed. Returns a dictionary with
+    # 'index': time steps, 'H_dem', 'P_dem': heat demand and power demand (10% of the heat demand) [MW],
+    # 'price_NG': natural gas prices, 'price_el': original electricity prices (first column) and the amplified prices
+    # of amp_values (following columns, see amplified_prices) [EUR/MWh]
+    # The daily gas prices are expanded to the time steps of their day and the hourly electricity prices (which take
+    # the hourly time index of the gas prices) to the time steps of their hour. All arrays are read-only, so that the
+    # prepared inputs can be shared by several runs.
+    steps = int(round(hours / time_step))
+    steps_per_hour = int(round(1 / time_step))
+    start = price_NG_use.index[0].floor(pd.Timedelta(hours=1))
+    gas_hours = int((price_NG_use.index[-1] - start) / pd.Timedelta(hours=1)) + 1
+    if len(price_el_hourly) != gas_hours:
+        raise ValueError("The electricity prices (" + str(len(price_el_hourly)) + " hours) do not cover the hours of "
+                         "the gas prices (" + str(gas_hours) + " hours).")
+    if steps > (gas_hours - 1) * steps_per_hour + 1:
+        raise ValueError("The price data covers only " + str(gas_hours - 1) + " operational hours.")
+    index = pd.date_range(start, periods=steps, freq=pd.Timedelta(hours=time_step))
+    # position of the day of every time step in the daily gas prices
+    days = price_NG_use.index.searchsorted(index, side='right') - 1
+    price_el = np.repeat(price_el_hourly.iloc[:, 0].ffill().to_numpy(dtype=float), steps_per_hour)[:steps]
+    if len(amp_values) > 0:
+        print("Amplified the electricity prices with k =", ", ".join(str(k) for k in amp_values))
+        price_el = np.column_stack([price_el, amplified_prices(price_el, amp_values)])
+    H_dem = np.array(heat_demand_orig.iloc[0:steps, 0], dtype=float)
+    prepared = {'index': index, 'H_dem': H_dem, 'P_dem': 0.1 * H_dem,
+                'price_NG': price_NG_use.iloc[:, 0].to_numpy(dtype=float)[days], 'price_el': price_el.reshape(steps, -1)}
+    for values in prepared.values():
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+    return prepared
+
 
 # ________________________________________ Optimisation with plug-in heat pump _________________________________________
 def optimisation_run_PI_CHP(heat_demand_orig, price_el_hourly, price_NG_use, amp_values, variability_values,
-                            GT_min_load, hours, capex_data):
+                            GT_min_load, hours, capex_data, build='arrays', linearize=False, persistent=None,
+                            threads=None, representative_periods=None, period_hours=24, lazy_binaries=False,
+                            benchmark_start=None, solver=None, timings=None, prepared=None, link_periods=True,
+                            dispatch_window_hours=None, dispatch_overlap_hours=24):
+    # build='arrays' constructs the model from numpy arrays (build_PI_model), build='rules' uses the original
+    # per-time-step rules (build_PI_model_rules), build='matrix' assembles the linearised model as sparse matrix
+    # without Pyomo and solves it with HiGHS (scipy) or gurobipy (build_PI_matrix, solve_matrix_model)
+    # linearize=True replaces the products of capacity and binary variables by big-M constraints (MILP)
+    # persistent: dictionary that keeps the model and a persistent gurobi solver between calls. The model is built
+    # once with mutable prices and annuities; following calls with the same demand and settings only update these
+    # parameters and re-solve, starting from the solution of the previous call
+    # threads: maximum number of threads used by the solver (None: solver default)
+    # representative_periods: number of representative periods of period_hours hours (e.g. 24 for days, 168 for
+    # weeks) on which the capacities are planned (see cluster_periods). The planned capacities are then fixed and the
+    # dispatch of the full time horizon is optimised, so that the results contain the full-year cost and energy flows
+    # link_periods=True links the storages across the sequence of periods of the full time horizon, False lets them
+    # operate cyclically within every representative period (see build_PI_model)
+    # dispatch_window_hours: the dispatch of the full time horizon with the planned capacities is solved in consecutive
+    # windows of this length that overlap by dispatch_overlap_hours (see dispatch_PI_rolling_horizon; None: one model
+    # of the full time horizon, solved with lazy binaries, see solve_PI_lazy_binaries)
+    # The results of representative periods hold the clustering error of prices and demand (see clustering_error) and
+    # the relative error of the objective on the representative periods to the cost of the full-year dispatch
+    # lazy_binaries=True solves the model without binaries first and adds them only where needed (see
+    # solve_PI_lazy_binaries)
+    # benchmark_start: results of optimisation_run_benchmark_CHP for the same prices and demand. Their dispatch is
+    # passed to the solver as MIP start and their objective as cutoff (upper bound of the objective)
+    # solver: solver settings (see default_solver_settings), threads replaces the number of threads of the settings
+    # timings: dictionary in which the wall time of the phases of the run is recorded [s] ('input preparation',
+    # 'model build', 'write and transfer', 'solve', 'result extraction', 'diagnostics'). Writing and transfer are only
+    # separated from the solve if the solver reports its own time (gurobi), otherwise they are part of 'solve'
+    # The results of each run hold the build and solve time, the peak memory and the statistics of the solve (see
+    # run_statistics). With several solves, 'run statistics of' names the solve they belong to: the last iteration of
+    # the lazy binaries or the dispatch windows (see dispatch_PI_rolling_horizon); the statistics of the planning
+    # solve on representative periods are stored with the suffix ' representative periods'
+    # prepared: input arrays of prepare_inputs for the same demand, prices, amp_values and hours, e.g. prepared once
+    # per price scenario for all runs of the scenario (None: the inputs are prepared in the run)
+    settings = solver_settings(solver)
+    if not linearize and settings['solver'] not in quadratic_solvers:
+        raise ValueError("The solver " + settings['solver'] + " only solves the linearised model (linearize=True).")
+    if benchmark_start is not None and settings['solver'] not in warmstart_solvers:
+        raise ValueError("The benchmark MIP start is not available for the solver " + settings['solver'] + ".")
+    if build == 'rules' and linearize:
+        raise ValueError("The linearised model is only available with build='arrays'.")
+    if build == 'matrix' and (not linearize or persistent is not None or representative_periods is not None or
+                              lazy_binaries or benchmark_start is not None):
+        raise ValueError("The matrix model is only available for the linearised model (linearize=True) without the "
+                         "persistent solver, representative periods, lazy binaries and benchmark MIP start.")
+    if build == 'matrix' and settings['solver'] not in matrix_solvers:
+        raise ValueError("The matrix model is only solved with " + " or ".join(matrix_solvers) + ".")
+    if build == 'rules' and persistent is not None:
+        raise ValueError("The persistent solver is only available with build='arrays'.")
+    if representative_periods is not None and (build == 'rules' or persistent is not None):
+        raise ValueError("Representative periods are only available with build='arrays' and without the persistent "
+                         "solver.")
+    if lazy_binaries and (build == 'rules' or persistent is not None or representative_periods is not None):
+        raise ValueError("Lazy binaries are only available with build='arrays', without the persistent solver and "
+                         "without representative periods.")
+    if benchmark_start is not None and (persistent is not None or representative_periods is not None or
+                                        lazy_binaries):
+        raise ValueError("The benchmark MIP start is only available without the persistent solver, representative "
+                         "periods and lazy binaries.")
+    # the full-year dispatch of the capacities planned on representative periods is solved window by window or with
+    # lazy binaries
+    rolling_dispatch = representative_periods is not None and dispatch_window_hours is not None
+    lazy = lazy_binaries or (representative_periods is not None and dispatch_window_hours is None)
+    phase_start = time.time()
     print("Started optimisation with PI heat pump.")
-
     # ------------------------------------- input DATA preperation ---------------------------------------------------
     # define the resolution of the optimisation problem in hours
     time_step = 0.5  # in hours
-
-    # resample natural gas price data to get prices with the same resolution of the optimisation problem
-    # original data contains one price per day
-    price_NG_use_hourly = price_NG_use.resample('{}H'.format(1)).ffill()
-    price_NG_use_half_hourly = price_NG_use_hourly.resample('30T').ffill()  # resample to get half-hourly prices
-
-    # prepare electricity price data
-    el_row_NaN = price_el_hourly[price_el_hourly.isna().any(axis=1)]  # indicates row with NaN value
-    price_el_hourly.fillna(method='ffill', inplace=True)  # replace NaN values with previous non-NaN value
-    price_el_hourly.index = price_NG_use_hourly.index # use index from natural gas price data
-    price_el_half_hourly = price_el_hourly.resample('30T').ffill()  # resample data to get half-hourly prices
-    # 'cut' the data and replace full data sets by short data sets
-    price_el_hourly_short = pd.DataFrame(price_el_hourly.iloc[0:7768])
-    price_el_hourly = price_el_hourly_short
-    price_el_half_hourly_short = pd.DataFrame(price_el_half_hourly.iloc[0:hours * 2])  # 8000 operational hours per year
-    price_el_half_hourly = price_el_half_hourly_short
-
-    # manipulate ELECTRICITY price data to increase the amplitude of the price variation
-    # get average price of original price data
-    price_el_half_hourly_mean = price_el_half_hourly.mean()
-    # sort them to plot price duration-curve
-    price_el_hourly_sorted = price_el_hourly['EP [EUR/MWh]'].sort_values(ascending=False)
-    price_el_hourly_sorted_df = pd.DataFrame(price_el_hourly_sorted)
-    price_el_half_hourly_sorted = price_el_half_hourly['EP [EUR/MWh]'].sort_values(ascending=False)
-    price_el_half_hourly_sorted_df = pd.DataFrame(price_el_half_hourly_sorted)
-    # generate new price profiles and sort their values from high to low to plot price duration curves
-    if len(amp_values) > 0:
-        for k in amp_values:
-            print("Current k is: ", k)
-            colname = ("amp " + "%.3f") % k
-            # add new price data as additional columns to dataframe
-            price_el_half_hourly[str(colname)] = price_el_half_hourly_mean.iloc[0] + \
-                                                 k * (price_el_half_hourly['EP [EUR/MWh]'] -
-                                                      price_el_half_hourly_mean.iloc[0])
-
-            # sort values from high to low and add new column to dataframe
-            price_el_half_hourly_sorted[str(colname)] = price_el_half_hourly[str(colname)].sort_values(ascending=False)
-            price_el_half_hourly_sorted_df[str(colname)] = price_el_half_hourly_sorted[str(colname)]
-            # remove the index
-            price_el_half_hourly_sorted_df = price_el_half_hourly_sorted_df.reset_index(drop=True)
-        price_el_half_hourly_mean_df = pd.DataFrame(price_el_half_hourly.mean())
-        # calculate new mean values
-        for k in amp_values:
-            print("Current k is: ", k)
-            colname = ("amp " + "%.3f") % k
-            # removing negative prices
-            price_el_half_hourly.loc[price_el_half_hourly[str(colname)] < 0, str(colname)] = 0
-            # calculate new mean values
-            price_el_half_hourly_mean_df[str(colname)] = price_el_half_hourly[str(colname)].mean()
+    # half-hourly demand and prices, with the amplified electricity prices (see prepare_inputs)
+    if prepared is None:
+        prepared = prepare_inputs(heat_demand_orig, price_el_hourly, price_NG_use, amp_values, hours, time_step)
+    H_dem, P_dem, price_NG = prepared['H_dem'], prepared['P_dem'], prepared['price_NG']
 
     # ---------------- Preparation of dictionaries in which results are stored for each model run ----------------------
-    # for electricity
-    price_el_hourly.rename(columns={'EP [EUR/MWh]': 'original'}, inplace=True)
-    price_el_half_hourly.rename(columns={'EP [EUR/MWh]': 'original'}, inplace=True)
-
     # create respective dictionary and define the variable over which the model runs loop
     looping_variable = variability_values
     el_price_scenario_dict = {'new system': {amp: {'results': {}, 'energy flows': {}} for amp in looping_variable}}
@@ -80,622 +1453,334 @@ def optimisation_run_PI_CHP(heat_demand_orig, price_el_hourly, price_NG_use, amp
     for count, amp in enumerate(looping_variable):
         print("Current scenario is: ", amp)
         current_process_dict = el_price_scenario_dict['new system'][amp]
-        # get the heat demand data
-        H_dem = heat_demand_orig[0:hours * 2]
-        H_dem_max = heat_demand_orig[0:hours * 2].max().iloc[0]
-        # define power demand data
-        P_dem = 0.1 * heat_demand_orig[0:hours * 2] # Power demand is 10% of the heat demand
-        P_dem.rename(columns={'Heat demand [MW]': 'Power demand [MW]'}, inplace=True)
+        H_dem_max = H_dem.max()
+        price_el = prepared['price_el'][:, count]
 
         # ------------------ START OPTIMISATION --------------------------------------------------------------------
-        # Definitions of constraints
-
-        def heat_balance(m, time):  # heat demand at t has to be equal to the sum of the heat produced at t
-            return float(H_dem.iloc[time]) == m.H_ElB_CP[time] + m.H_CHP_CP[time] + m.H_TES_CP[time] + m.H_H2B_CP[time] \
-                   + m.H_HP_CP[time]
-
-        def power_balance(m, time):  # power demand at t has to be equal to the sum of the power produced or bought at t
-            return float(P_dem.iloc[time]) == m.P_gr_process[time] + m.P_GT_process[time] + m.P_bat_process[time]
-
-        def ElB_balance(m, time):  # energy conversion of electric boiler
-            return m.H_ElB_CP[time] + m.H_ElB_TES[time] == (m.P_gr_ElB[time] + m.P_bat_ElB[time] + m.P_GT_ElB[time]) \
-                   * eta_ElB
-
-        def ElB_size(m, time):  # definition of boiler capacity
-            return m.H_ElB_CP[time] + m.H_ElB_TES[time] <= m.ElB_cap
-
-        def GT_ng_P_conversion(m, time):  # gas to power conversion of gas turbine
-            return m.NG_GT_in[time] * eta_GT_el == m.P_GT_excess[time] + m.P_GT_bat[time] + m.P_GT_ElB[time] + \
-                   m.P_GT_H2E[time] + m.P_GT_HP[time] + m.P_GT_process[time] + m.P_GT_gr[time]
-
-        def CHP_ng_H_conversion(m, time):  # gas to heat conversion of gas turbine and re-boiler
-            return (m.NG_GT_in[time] * eta_GT_th + m.NG_GB_in[time]) * eta_GB == \
-                   m.H_CHP_CP[time] + m.H_CHP_TES[time] + m.H_CHP_excess[time]
-
-        def GT_cap_rule(m, time):  # gas intake cannot exceed capacity
-            return m.NG_GT_in[time] <= GT_cap / eta_GT_th # * eta_GB)  #GT_cap = H_dem_max / eta_GB #outflow GT
-
-        def GB_cap_rule(m, time):  # gas intake can not exceed capacity
-            return m.NG_GB_in[time] <= 0.2 * GT_cap / eta_GB  # GB_cap = 0.2 * GT_cap  #outflow GB
-
-        def GT_min_load_rule(m, time):  # operation has to be above the minimal load
-            return m.NG_GT_in[time] >= GT_cap / eta_GT_th * GT_min_load
-
-        def bat_soe(m, time):  # calculating the state of energy of the battery
-            if time == 0:
-                return m.bat_soe[time] == 0
-            else:
-                return m.bat_soe[time] == m.bat_soe[time - 1] + \
-                       (m.P_gr_bat[time - 1] + m.P_GT_bat[time - 1]) * eta_bat * time_step - \
-                       (m.P_bat_ElB[time - 1] + m.P_bat_H2E[time - 1] + m.P_bat_HP[time - 1] + \
-                        m.P_bat_process[time - 1] + m.P_bat_gr[time - 1]) / eta_bat * time_step  # / m.bat_cap[time]
-
-        def bat_in(m, time):  # limiting the charging with c-rate and use binary to prevent simultaeous charging and discharging
-            return (m.P_gr_bat[time] + m.P_GT_bat[time]) * eta_bat <= m.bat_cap * crate_bat / time_step * m.b1[time]
-
-        def bat_out_maxP(m, time):  # limiting the discharging with c-rate and use binary to prevent simultaeous charging and discharging
-            if time == 0:
-                return (m.P_bat_ElB[time] + m.P_bat_H2E[time] + m.P_bat_HP[time] + m.P_bat_process[time] +
-                        m.P_bat_gr[time]) / eta_bat == 0
-            else:
-                return (m.P_bat_ElB[time] + m.P_bat_H2E[time] + m.P_bat_HP[time] + m.P_bat_process[time] +
-                        m.P_bat_gr[time]) / eta_bat <= m.bat_cap * crate_bat / time_step * (1 - m.b1[time])
-
-        def bat_soe_max(m, time):  # define battery capacity
-            return m.bat_soe[time] <= m.bat_cap
-
-        def TES_soe(m, time):  # calculating the state of energy of the TES
-            if time == 0:
-                return m.TES_soe[time] == 0
-            else:
-                return m.TES_soe[time] == m.TES_soe[time - 1] \
-                       + ((m.H_CHP_TES[time - 1] + m.H_ElB_TES[time - 1] + m.H_HP_TES[time - 1]) * eta_TES
-                          - m.H_TES_CP[time - 1]) * time_step
-
-        def TES_in(m, time):  # limiting the charging with c-rate and use binary to prevent simultaeous charging and discharging
-            return (m.H_CHP_TES[time] + m.H_ElB_TES[time] + m.H_HP_TES[
-                time]) * eta_TES <= m.TES_cap * crate_TES / time_step * m.b2[time]
-
-
-        def TES_out(m, time):  # limiting the discharging with c-rate and use binary to prevent simultaeous charging and discharging
-            if time == 0:
-                return m.H_TES_CP[time] == 0
-            else:
-                return m.H_TES_CP[time] <= m.TES_cap * crate_TES / time_step * (1 - m.b2[time])
-
-        def TES_size(m, time):  # define TES capacity
-            return m.TES_soe[time] <= m.TES_cap
-
-        def HP_balance(m, time):  # power to heat conversion of the heat pump
-            return m.H_HP_CP[time] + m.H_HP_TES[time] == (m.P_gr_HP[time] + m.P_bat_HP[time] + m.P_GT_HP[time]) \
-                   * HP_COP_carnot * eta_HP
-
-        def HP_size(m, time):  # defining HP capacity
-            return m.H_HP_CP[time] + m.H_HP_TES[time] <= m.HP_cap
-
-        def H2S_soe(m, time):  # calculate state of energy of the hydrogen storage
-            if time == 0:
-                return m.H2S_soe[time] == 0
-            else:
-                return m.H2S_soe[time] == m.H2S_soe[time - 1] + (m.H2_H2E_H2S[time - 1] * eta_H2S -
-                                                                 m.H2_H2S_H2B[time - 1]) * time_step
-
-        def H2S_in(m, time):  # implement binary to prevent simultaneous charging and discharging
-            return m.H2_H2E_H2S[time] * eta_H2S <= m.H2S_cap / time_step * m.b4[time]
-
-        def H2S_out(m, time):  # implement binary to prevent simultaneous charging and discharging
-            if time == 0:
-                return m.H2_H2S_H2B[time] == 0
+        phase_start = add_phase_time(timings, 'input preparation', phase_start)
+        c = PI_CHP_constants(capex_data, H_dem_max)
+        if build == 'rules':
+            m = build_PI_model_rules(pd.Series(H_dem), pd.Series(P_dem), pd.Series(price_el), pd.Series(price_NG),
+                                     GT_min_load, c, time_step)
+            opt = create_solver(settings)
+        elif build == 'matrix':
+            model = build_PI_matrix(H_dem, P_dem, price_el, price_NG, GT_min_load, c, time_step)
+        elif representative_periods is not None:
+            H_dem_full, P_dem_full, price_el_full, price_NG_full = H_dem, P_dem, price_el, price_NG
+            # plan the capacities on the representative periods of prices and demand
+            period_length = int(round(period_hours / time_step))
+            profiles = np.column_stack([price_el_full, price_NG_full, H_dem_full])
+            periods, weights, sequence = cluster_periods(profiles, period_length, representative_periods)
+            clustering_errors = clustering_error(profiles, period_length, periods, sequence)
+            steps = (periods[:, None] * period_length + np.arange(period_length)).ravel()
+            start_time = time.time()
+            m_periods = build_PI_model(H_dem_full[steps], P_dem_full[steps], price_el_full[steps],
+                                       price_NG_full[steps], GT_min_load, c, time_step, linearize=linearize,
+                                       period_length=period_length, period_weights=weights,
+                                       period_sequence=sequence if link_periods else None)
+            opt = create_solver(settings)
+            configure_solver(opt, settings, threads=threads)
+            log_file = solver_log_file(opt)
+            periods_results = opt.solve(m_periods, tee=settings['tee'], logfile=log_file)
+            periods_solve_time = time.time() - start_time
+            periods_statistics = solver_statistics(opt, periods_results, settings, log_file)
+            print("Capacities planned on", len(periods), "representative periods in", periods_solve_time, "s.")
+            planned = {name: pm.value(getattr(m_periods, name)) for name in PI_capacities}
+            if not rolling_dispatch:
+                # optimise the dispatch of the full time horizon with the planned capacities. With fixed capacities
+                # the binaries are only needed at few time steps, so they are added lazily
+                def build_model(binary_steps=None):
+                    m_full = build_PI_model(H_dem_full, P_dem_full, price_el_full, price_NG_full, GT_min_load, c,
+                                            time_step, linearize=linearize, bat_cap_max=planned['bat_cap'],
+                                            binary_steps=binary_steps)
+                    for name, capacity in planned.items():
+                        getattr(m_full, name).fix(capacity)
+                    return m_full
+                m = None
+        elif persistent is None:
+            def build_model(binary_steps=None):
+                return build_PI_model(H_dem, P_dem, price_el, price_NG, GT_min_load, c, time_step,
+                                      linearize=linearize, binary_steps=binary_steps)
+            m = None if lazy_binaries else build_model()
+            opt = create_solver(settings)
+        else:
+            # the constraints only depend on the demand and the settings, prices and CAPEX only enter the objective
+            model_key = (H_dem.tobytes(), GT_min_load, linearize, settings['solver'])
+            # the big-M values of a linearised model also hold for a scenario whose battery capacity bound is smaller
+            bat_cap_max = PI_big_M(c, H_dem, P_dem, price_el, price_NG, GT_min_load, time_step)['bat_cap'] \
+                if linearize else None
+            if persistent.get('key') == model_key and (not linearize or bat_cap_max <= persistent['bat_cap_max']):
+                m, opt = persistent['model'], persistent['solver']
+                # the solver only transfers the changed objective coefficients and keeps the previous solution of
+                # the unchanged model as start
+                update_PI_model(m, price_el, price_NG, c, time_step)
             else:
-                return m.H2_H2S_H2B[time] <= m.H2S_soe[time] / time_step * (1 - m.b4[time])
-
-        def H2S_size(m, time):  # define hydrogen storage capacity
-            return m.H2S_soe[time] <= m.H2S_cap
-
-        def H2B_balance(m, time):  # hydrogen to heat conversion of hyrogen boiler
-            return (m.H2_H2E_H2B[time] + m.H2_H2S_H2B[time]) * eta_H2B == m.H_H2B_CP[time]
-
-        def H2B_size(m, time):  # define hydrogen boiler size
-            return m.H_H2B_CP[time] <= m.H2B_cap
-
-        def H2E_balance(m, time):  # power to hydrogen conversion of electrolyzer
-            return (m.P_gr_H2E[time] + m.P_GT_H2E[time] + m.P_bat_H2E[time]) * eta_H2E == m.H2_H2E_H2B[time] + \
-                   m.H2_H2E_H2S[time]
-
-        def H2E_size(m, time):  # define capacity of electrolyzer
-            return m.P_gr_H2E[time] + m.P_GT_H2E[time] + m.P_bat_H2E[time] <= m.H2E_cap
-
-        def max_grid_power_in(m, time):  # limit power inflow through the grid connection and use binary to prevent simultaneous bidirectional use
-            return m.P_gr_ElB[time] + m.P_gr_HP[time] + m.P_gr_bat[time] + m.P_gr_H2E[time] + m.P_gr_process[time] <= \
-                   gr_connection * m.b3[time]  # total power flow from grid to plant is limited to x MW
-
-        def max_grid_power_out(m, time):  # limit power outflow through the grid connection and use binary to prevent simultaneous bidirectional use
-            return m.P_GT_gr[time] + m.P_bat_gr[time] <= gr_connection * (
-                    1 - m.b3[time])  # total power flow from grid to plant is limited to x MW
-
-        def minimize_total_costs(m, time):  # define the total cost of the system
-            return sum(price_el_half_hourly.iloc[time, count] * time_step * (m.P_gr_ElB[time] + m.P_gr_bat[time]
-                                                                             + m.P_gr_H2E[time] + m.P_gr_HP[time]
-                                                                             + m.P_gr_process[time]
-                                                                             - (m.P_GT_gr[time] + m.P_bat_gr[time]))
-                       + (m.NG_GT_in[time] + m.NG_GB_in[time]) * time_step * price_NG_use_half_hourly.iloc[time, 0]
-                       for time in m.T) + \
-                   m.bat_cap * c_bat * if_bat * disc_rate / (1 - (1 + disc_rate) ** -bat_lifetime) + \
-                   m.ElB_cap * c_ElB * if_ElB * disc_rate / (1 - (1 + disc_rate) ** -ElB_lifetime) + \
-                   m.TES_cap * c_TES_C * if_TES * disc_rate / (1 - (1 + disc_rate) ** -TES_lifetime) + \
-                   m.HP_cap * c_HP * if_HP * disc_rate / (1 - (1 + disc_rate) ** -HP_lifetime) + \
-                   m.H2E_cap * c_H2E * if_H2E * disc_rate / (1 - (1 + disc_rate) ** -H2E_lifetime) + \
-                   m.H2B_cap * c_H2B * if_H2B * disc_rate / (1 - (1 + disc_rate) ** -H2B_lifetime) + \
-                   m.H2S_cap * c_H2S * if_H2S * disc_rate / (1 - (1 + disc_rate) ** -H2S_lifetime)
-
-        m = pm.ConcreteModel()
-
-        # define SETS
-        m.T = pm.RangeSet(0, hours * 2 - 1)  # time steps
-
-        # define CONSTANTS
-        disc_rate = 0.1  # 10%, assumption
-        EF_ng = 0.2  # emission factor natural gas, tCO2/MWh(CH4)
-        gr_connection = 30  # [MW] Grid connection capacity
-        # ElB constants
-        c_ElB = capex_data['ElB']  # CAPEX for electric boiler, 60000 eur/MW
-        ElB_lifetime = 20  # lifetime of electric boiler, years
-        ElB_spatialreq = 70  # spatial requirements, m^2/MW
-        eta_ElB = 0.99  # Conversion ratio electricity to steam for electric boiler [%]
-        if_ElB = 2  # installation factor, [-]
-        # CHP constants
-        eta_GT_el = 0.3  # Electric efficiency of GT [%]
-        eta_GT_th = 0.6  # Thermal efficiency of GT [%]
-        eta_GB = 0.82
-        GT_cap = H_dem_max / eta_GB  # Thermal capacity (LPS) GT, [MW]
-        # Battery constants
-        eta_bat = 0.95  # Battery (dis)charging efficiency
-        c_bat = capex_data['Bat']  # CAPEX for battery per eur/MWh, 386e3 USD --> 385.5e3 eur (12.07.23)
-        bat_lifetime = 20  # lifetime of battery
-        bat_spatialreq = 11  # spatial requirement, [m^2/MWh]
-        crate_bat = 0.7  # C rate of battery, 70% of nominal capacity, [-]
-        if_bat = 2.5  # installation factor, [-]
-        # TES constants
-        c_TES_C = capex_data['TES']  # CAPEX for latent heat storage, including installation factor [eur/MWh]
-        TES_lifetime = 25  # heat storage lifetime, [years]
-        eta_TES = 0.95  # discharge efficiency [-]
-        TES_spatialreq = 7  # spatial requirement TES (configuration B), [m^2/MWh]
-        crate_TES = 0.5  # C rate of TES, 50% of nominal capacity, [-]
-        if_TES = 2.5  # installation factor, [-]
-        # Heat pump constants
-        c_HP = capex_data['HP']
-        HP_lifetime = 20
-        HP_spatialreq = 1
-        HP_COP_carnot = (160 + 273) / (160 - 55)
-        eta_HP = 0.5
-        if_HP = 3  # installation factor, [-]
-        # Hydrogen equipment constants
-        eta_H2S = 0.9  # charge efficiency hydrogen storage [-]
-        eta_H2B = 0.9  # conversion efficiency hydrogen boiler [-]
-        eta_H2E = 0.69  # conversion efficiency electrolyser [-]
-        c_H2S = capex_data['H2S']  # CAPEX for hydrogen storage per MWh, [eur/MWh]
-        c_H2B = capex_data['H2B']  # CAPEX for hydrogen boiler per MW, [eur/MW]
-        c_H2E = capex_data['H2E']  # CAPEX for electrolyser per MW, [eur/MW]  # From ISPT
-        H2S_lifetime = 23  # lifetime hydrogen storage, [years]
-        H2B_lifetime = 20  # lifetime hydrogen boiler, [years]
-        H2E_lifetime = 14  # lifetime electrolyser, [years]
-        H2E_spatialreq = 105  # spatial requirement electrolyser, [m^2/MW]
-        H2B_spatialreq = 70  # spatial requirement hydrogen boiler, [m^2/MW]
-        H2S_spatialreq = 8.4  # spatial requirement hydrogen storage, [m^2/MWh]
-        if_H2S = 4  # installation factor, [-]
-        if_H2B = 2  # installation factor, [-]
-        if_H2E = 1  # installation factor, [-]
-
-        param_NaN = math.isnan(sum(m.component_data_objects(ctype=type)))
-
-        # define VARIABLES
-        m.NG_GT_in = pm.Var(m.T, bounds=(0, None))  # natural gas intake of gas turbine, MWh
-        m.NG_GB_in = pm.Var(m.T, bounds=(0, None))  # natural gas intake of gas boiler, MWh
-        m.P_GT_bat = pm.Var(m.T, bounds=(0, None))  # Power from CHP to battery, MW
-        m.P_GT_HP = pm.Var(m.T, bounds=(0, None))  # Power from CHP to heat pump, MW
-        m.P_GT_ElB = pm.Var(m.T, bounds=(0, None))  # Power from CHP to electric boiler, MW
-        m.P_GT_H2E = pm.Var(m.T, bounds=(0, None))  # Power from CHP to electrolyser, MW
-        m.P_GT_process = pm.Var(m.T, bounds=(0, None))  # Power from CHP to process, MW
-        m.P_GT_excess = pm.Var(m.T, bounds=(0, None))  # Excess power from CHP, MW
-        m.P_GT_gr = pm.Var(m.T, bounds=(0, None))  # Power from CHP to grid, MW
-        m.H_CHP_CP = pm.Var(m.T, bounds=(0, None))  # Heat generated from CHP (natural gas), MW
-        m.H_CHP_TES = pm.Var(m.T, bounds=(0, None))  # Heat from CHP to TES, MW
-        m.H_CHP_excess = pm.Var(m.T, bounds=(0, None))  # Excess heat from CHP, MW
-        m.P_gr_ElB = pm.Var(m.T, bounds=(0, None))  # grid to el. boiler, MW
-        m.P_gr_bat = pm.Var(m.T, bounds=(0, None))  # max charging power batter, MW
-        m.P_gr_H2E = pm.Var(m.T, bounds=(0, None))  # power flow from grid to electrolyser, MW
-        m.P_gr_HP = pm.Var(m.T, bounds=(0, None))  # power flow from grid to heat pump, MW
-        m.P_gr_process = pm.Var(m.T, bounds=(0, None))  # power flow from grid to process, MW
-        m.P_bat_ElB = pm.Var(m.T, bounds=(0, None))  # discharging power batter to electric boiler, MW
-        m.P_bat_H2E = pm.Var(m.T, bounds=(0, None))  # power flow from battery to electrolyser, MW
-        m.P_bat_HP = pm.Var(m.T, bounds=(0, None))  # power flow from battery to heat pump, MW
-        m.P_bat_process = pm.Var(m.T, bounds=(0, None))  # power flow from battery to process, MW
-        m.P_bat_gr = pm.Var(m.T, bounds=(0, None))  # power flow from battery to gr, MW
-        m.H_ElB_CP = pm.Var(m.T, bounds=(0, None))  # Heat generated from electricity, MW
-        m.H_ElB_TES = pm.Var(m.T, bounds=(0, None))  # Heat from electric boiler to TES, MW
-        m.H_TES_CP = pm.Var(m.T, bounds=(0, None))  # Heat from TES to core process, MW
-        m.H_H2B_CP = pm.Var(m.T, bounds=(0, None))  # Heat flow from hydrogen boiler to core process, MW
-        m.H_HP_CP = pm.Var(m.T, bounds=(0, None))  # Heat flow from heat pump to core process, MW
-        m.H_HP_TES = pm.Var(m.T, bounds=(0, None))  # Heat from heat pump to TES, MW
-        m.H2_H2E_H2S = pm.Var(m.T, bounds=(0, None))  # hydrogen flow from electrolyser to hydrogen storage, MWh
-        m.H2_H2S_H2B = pm.Var(m.T, bounds=(0, None))  # hydrogen flow from hydrogen storage to hydrogen boiler, MWh
-        m.H2_H2E_H2B = pm.Var(m.T, bounds=(0, None))  # hydrogen flow from electrolyser to hydrogen boiler, MWh
-        m.TES_soe = pm.Var(m.T, bounds=(0, None))  # state of energy TES, MWh
-        m.bat_soe = pm.Var(m.T, bounds=(0, None))  # State of energy of battery
-        m.H2S_soe = pm.Var(m.T, bounds=(0, None))  # state of energy hydrogen storage, MWh
-        m.bat_cap = pm.Var(bounds=(0, None))  # Battery capacity, MWh
-        m.ElB_cap = pm.Var(bounds=(0, None))  # electric boiler capacity, MW
-        m.TES_cap = pm.Var(bounds=(0, None))  # TES capacity, MWh
-        m.HP_cap = pm.Var(bounds=(0, None))  # heat pump capacity, MW
-        m.H2S_cap = pm.Var(bounds=(0, None))  # hydrogen storage capacity, MWh
-        m.H2B_cap = pm.Var(bounds=(0, None))  # hydrogen boiler capacity, MW
-        m.H2E_cap = pm.Var(bounds=(0, None))  # electrolyser capacity, MW
-        m.b1 = pm.Var(m.T, within=pm.Binary)  # binary variable battery
-        m.b2 = pm.Var(m.T, within=pm.Binary)  # binary variable TES
-        m.b3 = pm.Var(m.T, within=pm.Binary)  # binary variable grid connection
-        m.b4 = pm.Var(m.T, within=pm.Binary)  # binary variable H2S
-
-        # add CONSTRAINTS to the model
-        # balance supply and demand
-        m.heat_balance_constraint = pm.Constraint(m.T, rule=heat_balance)
-        m.power_balance_constraint = pm.Constraint(m.T, rule=power_balance)
-        # CHP constraints
-        m.CHP_ng_H_conversion_constraint = pm.Constraint(m.T, rule=CHP_ng_H_conversion)
-        m.GT_ng_P_conversion_constraint = pm.Constraint(m.T, rule=GT_ng_P_conversion)
-        m.GT_cap_constraint = pm.Constraint(m.T, rule=GT_cap_rule)
-        m.GB_cap_constraint = pm.Constraint(m.T, rule=GB_cap_rule)
-        m.GT_min_load_constraint = pm.Constraint(m.T, rule=GT_min_load_rule)
-        # electric boiler constraint
-        m.ElB_size_constraint = pm.Constraint(m.T, rule=ElB_size)
-        m.ElB_balance_constraint = pm.Constraint(m.T, rule=ElB_balance)
-        # heat pump constraints
-        m.HP_size_constraint = pm.Constraint(m.T, rule=HP_size)
-        m.HP_balance_constraint = pm.Constraint(m.T, rule=HP_balance)
-        # battery constraints
-        m.bat_soe_constraint = pm.Constraint(m.T, rule=bat_soe)
-        m.bat_out_maxP_constraint = pm.Constraint(m.T, rule=bat_out_maxP)
-        m.bat_in_constraint = pm.Constraint(m.T, rule=bat_in)
-        m.SOE_max_constraint = pm.Constraint(m.T, rule=bat_soe_max)
-        # TES constraints
-        m.TES_discharge_constraint = pm.Constraint(m.T, rule=TES_out)
-        m.TES_charge_constraint = pm.Constraint(m.T, rule=TES_in)
-        m.TES_soe_constraint = pm.Constraint(m.T, rule=TES_soe)
-        m.TES_size_constraint = pm.Constraint(m.T, rule=TES_size)
-        # hydrogen constraints
-        m.H2S_soe_constraint = pm.Constraint(m.T, rule=H2S_soe)
-        m.H2S_in_constraint = pm.Constraint(m.T, rule=H2S_in)
-        m.H2S_out_constraint = pm.Constraint(m.T, rule=H2S_out)
-        m.H2B_balance_constraint = pm.Constraint(m.T, rule=H2B_balance)
-        m.H2E_balance_constraint = pm.Constraint(m.T, rule=H2E_balance)
-        m.H2S_size_constraint = pm.Constraint(m.T, rule=H2S_size)
-        m.H2B_size_constraint = pm.Constraint(m.T, rule=H2B_size)
-        m.H2E_size_constraint = pm.Constraint(m.T, rule=H2E_size)
-        # grid constraint
-        m.max_grid_power_in_constraint = pm.Constraint(m.T, rule=max_grid_power_in)
-        m.max_grid_power_out_constraint = pm.Constraint(m.T, rule=max_grid_power_out)
-
-        # add OBJECTIVE FUNCTION
-        m.objective = pm.Objective(rule=minimize_total_costs,
-                                   sense=pm.minimize,
-                                   doc='Define objective function')
+                m = build_PI_model(H_dem, P_dem, price_el, price_NG, GT_min_load, c, time_step, linearize=linearize,
+                                   mutable=True, bat_cap_max=bat_cap_max)
+                opt = create_solver(settings, persistent=True)
+                # between the scenarios only parameter values change, the model structure is not checked again
+                opt.update_config.check_for_new_or_removed_constraints = False
+                opt.update_config.check_for_new_or_removed_vars = False
+                opt.update_config.check_for_new_or_removed_params = False
+                opt.update_config.check_for_new_objective = False
+                opt.update_config.update_constraints = False
+                opt.update_config.update_vars = False
+                opt.update_config.update_named_expressions = False
+                persistent.update({'key': model_key, 'model': m, 'solver': opt, 'bat_cap_max': bat_cap_max})
 
         # Solve optimization problem
-        opt = pm.SolverFactory('gurobi')  # use gurobi solvers
-        opt.options["MIPGap"] = 0.0005  # define optimality gap
-        results = opt.solve(m, tee=True)  # solve the problem
+        build_end = add_phase_time(timings, 'model build', phase_start)
+        build_time, phase_start = build_end - phase_start, build_end
+        # threads limits the solver threads (e.g. for parallel scenario runs)
+        if build != 'matrix':
+            configure_solver(opt, settings, threads=threads)
+        if benchmark_start is not None:
+            # start from the benchmark dispatch and discard solutions that are more expensive than the benchmark
+            benchmark_result = benchmark_start['benchmark system'][amp]
+            set_PI_start_from_benchmark(m, benchmark_result['energy flows'])
+            cutoff = benchmark_result['results']['Optimal result']
+            # the start itself must not be cut off
+            configure_solver(opt, settings, threads=threads, cutoff=cutoff + 1e-6 * max(1, abs(cutoff)))
+        start_time = time.time()
+        statistics = {}
+        if build == 'matrix':
+            values, objective = solve_matrix_model(model, settings, threads=threads, statistics=statistics)
+            # the solution values take the place of the model components in the evaluation below
+            m = SimpleNamespace(objective=objective, **values)
+        elif rolling_dispatch:
+            # the dispatch of the full time horizon with the planned capacities is solved window by window
+            dispatch_flows, dispatch = dispatch_PI_rolling_horizon(
+                H_dem, P_dem, price_el, price_NG, GT_min_load, c, time_step, planned,
+                int(round(dispatch_window_hours / time_step)), int(round(dispatch_overlap_hours / time_step)),
+                index=prepared['index'], linearize=linearize, threads=threads, solver=settings)
+            m = SimpleNamespace(objective=dispatch['Optimal result'], **planned,
+                                **{name: dispatch_flows[column].to_numpy() for column, name in PI_flow_columns.items()})
+            statistics = {name: dispatch[name] for name in run_statistics}
+        else:
+            log_file = solver_log_file(opt)
+            if lazy:
+                m, results, binary_steps, lazy_iterations = solve_PI_lazy_binaries(build_model, opt,
+                                                                                   tee=settings['tee'],
+                                                                                   logfile=log_file)
+            elif benchmark_start is not None:
+                # solve the problem from the MIP start
+                results = opt.solve(m, tee=settings['tee'], warmstart=True, logfile=log_file)
+            else:
+                results = opt.solve(m, tee=settings['tee'], logfile=log_file)  # solve the problem
+        solve_time = time.time() - start_time
+        if build != 'matrix' and not rolling_dispatch:
+            statistics = solver_statistics(opt, results, settings, log_file)
+        wall_time = None if build == 'matrix' or lazy or rolling_dispatch else solver_wall_time(results)
+        if timings is not None and wall_time is not None:
+            # the rest of the solve call is writing and transferring the model and loading the solution
+            timings['write and transfer'] = timings.get('write and transfer', 0) + solve_time - wall_time
+            phase_start += solve_time - wall_time
+        phase_start = add_phase_time(timings, 'solve', phase_start)
 
         # ------------------ OPTIMISATION END --------------------------------------------------------------------------
 
         # Collect results in dataframe
-        result = pd.DataFrame(index=price_NG_use_half_hourly.index[0:hours * 2])
-        result['Heat demand core process'] = list(H_dem['Heat demand [MW]'])
-        result['Power demand core process'] = list(P_dem['Power demand [MW]'])
-        result['Natural gas consumption GT [MW]'] = pm.value(m.NG_GT_in[:])
-        result['Natural gas consumption GB [MW]'] = pm.value(m.NG_GB_in[:])
-        result['Power from GT to battery'] = pm.value(m.P_GT_bat[:])
-        result['Power from GT to heat pump'] = pm.value(m.P_GT_HP[:])
-        result['Power from GT to electric boiler'] = pm.value(m.P_GT_ElB[:])
-        result['Power from GT to electrolyser'] = pm.value(m.P_GT_H2E[:])
-        result['Power from GT to process'] = pm.value(m.P_GT_process[:])
-        result['Power excess from GT'] = pm.value(m.P_GT_excess[:])
-        result['Power from GT to grid'] = pm.value(m.P_GT_gr[:])
-        result['Heat from CHP to core process'] = pm.value(m.H_CHP_CP[:])
-        result['Heat from CHP to TES'] = pm.value(m.H_CHP_TES[:])
-        result['Heat excess from CHP'] = pm.value(m.H_CHP_excess[:])
-        result['Power from grid to electric boiler'] = pm.value(m.P_gr_ElB[:])
-        result['Power from grid to battery'] = pm.value(m.P_gr_bat[:])
-        result['Power from grid to electrolyser'] = pm.value(m.P_gr_H2E[:])
-        result['Power from grid to heat pump'] = pm.value(m.P_gr_HP[:])
-        result['Power from grid to process'] = pm.value(m.P_gr_process[:])
-        result['Battery to electric boiler'] = pm.value(m.P_bat_ElB[:])
-        result['Battery to electrolyser'] = pm.value(m.P_bat_H2E[:])
-        result['Battery to heat pump'] = pm.value(m.P_bat_HP[:])
-        result['Battery to process'] = pm.value(m.P_bat_process[:])
-        result['Battery to grid'] = pm.value(m.P_bat_gr[:])
-        result['Heat from electric boiler to core process'] = pm.value(m.H_ElB_CP[:])
-        result['Heat from electric boiler to TES'] = pm.value(m.H_ElB_TES[:])
-        result['TES to CP'] = pm.value(m.H_TES_CP[:])
-        result['Heat from hydrogen boiler to core process'] = pm.value(m.H_H2B_CP[:])
-        result['Heat from heat pump to core process'] = pm.value(m.H_HP_CP[:])
-        result['Heat from heat pump to TES'] = pm.value(m.H_HP_TES[:])
-        result['H2E to H2S'] = pm.value(m.H2_H2E_H2S[:])
-        result['H2S to H2B'] = pm.value(m.H2_H2S_H2B[:])
-        result['H2E to H2B'] = pm.value(m.H2_H2E_H2B[:])
-        result['TES SOE'] = pm.value(m.TES_soe[:])
-        result['Battery SOE'] = pm.value(m.bat_soe[:])
-        result['H2S SOE'] = pm.value(m.H2S_soe[:])
-
-        grid_P_out = result['Power from grid to electric boiler'] + result['Power from grid to battery'] + \
-                     result['Power from grid to electrolyser'] + result['Power from grid to heat pump'] + \
-                     result['Power from grid to process']
-        grid_P_out_max = max(grid_P_out)
-        Grid_gen = result['Power from grid to electric boiler'].sum() + result['Power from grid to battery'].sum() \
-                   + result['Power from grid to electrolyser'].sum() + result['Power from grid to heat pump'].sum() \
-                   + result['Power from grid to process'].sum()
-        # calculate CO2 emissions from natural gas consumption
-        CO2_emissions = (result['Natural gas consumption GT [MW]'].sum() +
-                         result[
-                             'Natural gas consumption GB [MW]'].sum()) * EF_ng * time_step  # [MW]*[ton/MWh]*[h] = [ton]
-        # control: H_CP==H_dem?
-        control_H = sum(result['Heat demand core process'] - (result['Heat from electric boiler to core process']
-                                                              + result['Heat from CHP to core process']
-                                                              + result['TES to CP']
-                                                              + result['Heat from hydrogen boiler to core process']
-                                                              + result['Heat from heat pump to core process']))
-
-        print("control_H =", control_H)
-        # display total cost and installed capacities
-        print("Total cost = ", pm.value(m.objective))
-        print("HP capacity =", pm.value(m.HP_cap))
-        print("Battery capacity =", pm.value(m.bat_cap))
-        print("Electric boiler capacity =", pm.value(m.ElB_cap))
-        print("TES capacity =", pm.value(m.TES_cap))
-        print("electrolyser capacity =", pm.value(m.H2E_cap))
-        print("Hydrogen boiler capacity =", pm.value(m.H2B_cap))
-        print("Hydrogen storage capacity =", pm.value(m.H2S_cap))
-        # display grid connection use
-        print("Grid capacity: ", gr_connection, "Max. power flow from grid: ", grid_P_out_max)
-
-        # IF battery capacity is installed, how many hours does the battery charge and discharge simultaneously?
-        if pm.value(m.bat_cap) > 0:
-            battery_discharge_sum = result['Battery to electrolyser'] + \
-                                    result['Battery to electric boiler'] + \
-                                    result['Battery to heat pump'] + result['Battery to grid'] + \
-                                    result['Battery to process']
-            battery_charge_sum = result['Power from grid to battery'] + \
-                                 result['Power from GT to battery']
-
-            battery_hours_with_simultaneous_charging_and_discharging = pd.Series(index=battery_charge_sum.index)
-            for i in range(0, len(battery_charge_sum)):
-                if battery_charge_sum[i] > 0:
-                    if battery_discharge_sum[i] > 0:
-                        battery_hours_with_simultaneous_charging_and_discharging[i] = battery_charge_sum[i] + \
-                                                                                      battery_discharge_sum[i]
-            print("Number of times of simultaneous battery charging and discharging: ",
-                  len(battery_hours_with_simultaneous_charging_and_discharging[
-                          battery_hours_with_simultaneous_charging_and_discharging > 0]))
-
-        # IF TES capacity is installed, how many hours does the TES charge and discharge simultaneously?
-        if pm.value(m.TES_cap) > 0:
-            TES_discharge_sum = result['TES to CP']
-            TES_charge_sum = + result['Heat from CHP to TES'] + \
-                             result['Heat from electric boiler to TES']
-            TES_hours_with_simultaneous_charging_and_discharging = pd.Series(index=TES_charge_sum.index)
-            for i in range(0, len(TES_charge_sum)):
-                if TES_charge_sum[i] > 0:
-                    if TES_discharge_sum[i] > 0:
-                        TES_hours_with_simultaneous_charging_and_discharging[i] = TES_charge_sum[i] + \
-                                                                                  TES_discharge_sum[i]
-            print("Number of times of simultaneous TES charging and discharging: ",
-                  len(TES_hours_with_simultaneous_charging_and_discharging[
-                          TES_hours_with_simultaneous_charging_and_discharging > 0]))
-
-        # IF H2S capacity is installed, how many hours does the H2S charge and discharge simultaneously?
-        if pm.value(m.H2S_cap) > 0:
-            H2S_discharge_sum = result['H2S to H2B']
-            H2S_charge_sum = result['H2E to H2S']
-            H2S_hours_with_simultaneous_charging_and_discharging = pd.Series(index=H2S_charge_sum.index)
-            for i in range(0, len(H2S_charge_sum)):
-                if H2S_charge_sum[i] > 0:
-                    if H2S_discharge_sum[i] > 0:
-                        H2S_hours_with_simultaneous_charging_and_discharging[i] = H2S_charge_sum[i] + \
-                                                                                  H2S_discharge_sum[i]
-            print("Number of times of simultaneous H2S charging and discharging: ",
-                  len(H2S_hours_with_simultaneous_charging_and_discharging[
-                          H2S_hours_with_simultaneous_charging_and_discharging > 0]))
-
-        # Check if grid connection is simultaneously used in a bidirectional manner
-        hours_with_simultaneous_gridcon_use = pd.Series(index=grid_P_out.index)
-        for i in range(0, len(grid_P_out)):
-            if grid_P_out[i] > 0.00001:  # because using 0 led to rounding errors
-                if pm.value(m.P_GT_gr[i]) + pm.value(
-                        m.P_bat_gr[i]) > 0.00001:  # because using 0 led to rounding errors
-                    hours_with_simultaneous_gridcon_use[i] = grid_P_out[i] + pm.value(m.P_GT_gr[i]) + \
-                                                             pm.value(m.P_bat_gr[i])
-        print("Number of hours of simultaneous bidirectional grid connection use: ",
-              len(hours_with_simultaneous_gridcon_use[hours_with_simultaneous_gridcon_use > 0]))
-
-
-        # Add aggregated data to dictionary containing the results of all model runs
-        el_price_scenario_dict['new system'][amp]['results']['Optimal result'] = pm.value(m.objective)
-        el_price_scenario_dict['new system'][amp]['results']['CAPEX'] = \
-            pm.value(m.bat_cap) * c_bat * if_bat * disc_rate / (1 - (1 + disc_rate) ** -bat_lifetime) + \
-            pm.value(m.ElB_cap) * c_ElB * if_ElB * disc_rate / (1 - (1 + disc_rate) ** -ElB_lifetime) + \
-            pm.value(m.TES_cap) * c_TES_C * disc_rate / (1 - (1 + disc_rate) ** -TES_lifetime) + \
-            pm.value(m.H2E_cap) * c_H2E * disc_rate / (1 - (1 + disc_rate) ** -H2E_lifetime) + \
-            pm.value(m.H2B_cap) * c_H2B * if_H2B * disc_rate / (1 - (1 + disc_rate) ** -H2B_lifetime) + \
-            pm.value(m.H2S_cap) * c_H2S * if_H2S * disc_rate / (1 - (1 + disc_rate) ** -H2S_lifetime) + \
-            pm.value(m.HP_cap) * c_HP * if_HP * disc_rate / (1 - (1 + disc_rate) ** -HP_lifetime)
-        el_price_scenario_dict['new system'][amp]['results']['OPEX'] = \
-            el_price_scenario_dict['new system'][amp]['results']['Optimal result'] - \
-            el_price_scenario_dict['new system'][amp]['results']['CAPEX']
-        el_price_scenario_dict['new system'][amp]['results']['scope 1 emissions'] = CO2_emissions
-        el_price_scenario_dict['new system'][amp]['results']['required space'] = \
-            pm.value(m.bat_cap) * bat_spatialreq + pm.value(m.ElB_cap) * ElB_spatialreq + \
-            pm.value(m.TES_cap) * TES_spatialreq + pm.value(m.H2E_cap) * H2E_spatialreq + \
-            pm.value(m.H2B_cap) * H2B_spatialreq + pm.value(m.H2S_cap) * H2S_spatialreq + pm.value(
-                m.HP_cap) * HP_spatialreq
-        el_price_scenario_dict['new system'][amp]['results']['grid connection cap'] = gr_connection
-        el_price_scenario_dict['new system'][amp]['results']['discount rate'] = disc_rate
-        el_price_scenario_dict['new system'][amp]['results']['max. power flow from grid [MW]'] = grid_P_out_max
-        el_price_scenario_dict['new system'][amp]['results'][
-            'Simultaneous bidirectional use of grid connection [hours]'] \
-            = len(hours_with_simultaneous_gridcon_use[
-                      hours_with_simultaneous_gridcon_use > 0])
-        el_price_scenario_dict['new system'][amp]['results']['CHP heat gen to CP [MWh]'] = \
-            result['Heat from CHP to core process'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['CHP heat gen to TES [MWh]'] = \
-            result['Heat from CHP to TES'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['CHP excess heat gen [MWh]'] = \
-            result['Heat excess from CHP'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['GT electricity gen to HP [MWh]'] = \
-            result['Power from GT to heat pump'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['GT electricity gen to battery [MWh]'] = \
-            result['Power from GT to battery'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['GT electricity gen to ElB [MWh]'] = \
-            result['Power from GT to electric boiler'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['GT electricity gen to H2E [MWh]'] = \
-            result['Power from GT to electrolyser'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['GT excess electricity gen [MWh]'] = \
-            result['Power excess from GT'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['GT electricity gen to process [MWh]'] = \
-            result['Power from GT to process'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['GT electricity gen to grid [MWh]'] = \
-            result['Power from GT to grid'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['total natural gas consumption [MWh]'] = \
-            result['Natural gas consumption GT [MW]'].sum() * time_step + \
-            result['Natural gas consumption GB [MW]'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['total grid consumption [MWh]'] = Grid_gen * time_step
-        el_price_scenario_dict['new system'][amp]['results']['grid to battery [MWh]'] = \
-            result['Power from grid to battery'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['grid to electric boiler [MWh]'] = \
-            result['Power from grid to electric boiler'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['grid to electrolyser [MWh]'] = \
-            result['Power from grid to electrolyser'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['grid to HP [MWh]'] = \
-            result['Power from grid to heat pump'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['grid to process [MWh]'] = \
-            result['Power from grid to process'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['ElB gen to CP [MWh]'] = \
-            result['Heat from electric boiler to core process'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['ElB gen to TES [MWh]'] = \
-            result['Heat from electric boiler to TES'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['ElB size [MW]'] = pm.value(m.ElB_cap)
-        el_price_scenario_dict['new system'][amp]['results']['Battery size [MWh]'] = pm.value(m.bat_cap)
-        el_price_scenario_dict['new system'][amp]['results']['battery to ElB [MWh]'] = \
-            result['Battery to electric boiler'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['battery to electrolyser [MWh]'] = \
-            result['Battery to electrolyser'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['battery to HP [MWh]'] = \
-            result['Battery to heat pump'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['battery to process [MWh]'] = \
-            result['Battery to process'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['battery to grid [MWh]'] = \
-            result['Battery to grid'].sum() * time_step
-        if pm.value(m.bat_cap) > 0:
-            el_price_scenario_dict['new system'][amp]['results']['Simultaneous charging and discharging hours battery'] \
-                = len(battery_hours_with_simultaneous_charging_and_discharging[
-                          battery_hours_with_simultaneous_charging_and_discharging > 0])
-        el_price_scenario_dict['new system'][amp]['results']['TES size [MWh]'] = pm.value(m.TES_cap)
-        el_price_scenario_dict['new system'][amp]['results']['TES to CP [MWh]'] = result['TES to CP'].sum() * time_step
-        if pm.value(m.TES_cap) > 0:
-            el_price_scenario_dict['new system'][amp]['results']['Simultaneous charging and discharging hours TES'] \
-                = len(TES_hours_with_simultaneous_charging_and_discharging[
-                          TES_hours_with_simultaneous_charging_and_discharging > 0])
-        if pm.value(m.H2S_cap) > 0:
-            el_price_scenario_dict['new system'][amp]['results']['Simultaneous charging and discharging hours H2S'] \
-                = len(H2S_hours_with_simultaneous_charging_and_discharging[
-                          H2S_hours_with_simultaneous_charging_and_discharging > 0])
-        el_price_scenario_dict['new system'][amp]['results']['electrolyser size [MW]'] = pm.value(m.H2E_cap)
-        el_price_scenario_dict['new system'][amp]['results']['H2 from electrolyser to boiler [MWh]'] = \
-            result['H2E to H2B'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['H2 from electrolyser to storage [MWh]'] = \
-            result['H2E to H2S'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['Hydrogen boiler size [MW]'] = pm.value(m.H2B_cap)
-        el_price_scenario_dict['new system'][amp]['results']['Hydrogen boiler to CP [MWh]'] = \
-            result['Heat from hydrogen boiler to core process'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['Hydrogen storage size [MWh]'] = pm.value(m.H2S_cap)
-        el_price_scenario_dict['new system'][amp]['results']['H2 from storage to boiler [MWh]'] = \
-            result['H2S to H2B'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['Heat pump size [MW]'] = pm.value(m.HP_cap)
-        el_price_scenario_dict['new system'][amp]['results']['Heat from HP to CP [MWh]'] = \
-            result['Heat from heat pump to core process'].sum() * time_step
-        el_price_scenario_dict['new system'][amp]['results']['Heat from HP to TES [MWh]'] = \
-            result['Heat from heat pump to TES'].sum() * time_step
+        result = PI_energy_flows(m, prepared['index'], H_dem, P_dem)
+        phase_start = add_phase_time(timings, 'result extraction', phase_start)
+
+        # KPIs and diagnostics of the run
+        capacities = {name: pm.value(getattr(m, name)) for name in PI_capacities}
+        el_price_scenario_dict['new system'][amp]['results'].update(
+            PI_results(result, capacities, pm.value(m.objective), c, time_step))
+        if representative_periods is not None:
+            el_price_scenario_dict['new system'][amp]['results']['representative periods'] = len(periods)
+            el_price_scenario_dict['new system'][amp]['results']['representative period length [h]'] = period_hours
+            el_price_scenario_dict['new system'][amp]['results']['storages linked across periods'] = link_periods
+            el_price_scenario_dict['new system'][amp]['results']['objective on representative periods'] = \
+                pm.value(m_periods.objective)
+            el_price_scenario_dict['new system'][amp]['results']['solve time representative periods [s]'] = \
+                periods_solve_time
+            el_price_scenario_dict['new system'][amp]['results'].update(
+                {name + ' representative periods': value for name, value in periods_statistics.items()})
+            for name, error in zip(['electricity price', 'gas price', 'heat demand'], clustering_errors):
+                el_price_scenario_dict['new system'][amp]['results']['clustering error ' + name + ' [-]'] = error
+            el_price_scenario_dict['new system'][amp]['results']['cost error representative periods [-]'] = \
+                pm.value(m_periods.objective) / pm.value(m.objective) - 1
+            if rolling_dispatch:
+                el_price_scenario_dict['new system'][amp]['results']['dispatch window length [h]'] = \
+                    dispatch_window_hours
+                el_price_scenario_dict['new system'][amp]['results']['dispatch windows'] = dispatch['dispatch windows']
+        el_price_scenario_dict['new system'][amp]['results']['build time [s]'] = build_time
+        el_price_scenario_dict['new system'][amp]['results']['solve time [s]'] = solve_time
+        el_price_scenario_dict['new system'][amp]['results']['peak memory [MB]'] = peak_memory()
+        el_price_scenario_dict['new system'][amp]['results'].update(statistics)
+        el_price_scenario_dict['new system'][amp]['results']['run statistics of'] = \
+            'last lazy binaries iteration' if lazy else 'dispatch windows' if rolling_dispatch else 'single solve'
+        if benchmark_start is not None:
+            el_price_scenario_dict['new system'][amp]['results']['benchmark MIP start objective'] = cutoff
+        if lazy:
+            el_price_scenario_dict['new system'][amp]['results']['lazy binaries iterations'] = lazy_iterations
+            el_price_scenario_dict['new system'][amp]['results']['time steps with binaries'] = \
+                sum(len(steps) for steps in binary_steps.values())
         el_price_scenario_dict['new system'][amp]['energy flows'] = result
+        add_phase_time(timings, 'diagnostics', phase_start)
 
         # return the results
         return el_price_scenario_dict
 
 
+# ________________________________________ Rolling-horizon dispatch of the plug-in system ______________________________
+def dispatch_PI_rolling_horizon(H_dem, P_dem, price_el, price_NG, GT_min_load, c, time_step, capacities, window,
+                                overlap, index=None, linearize=False, threads=None, solver=None):
+    # dispatch of the plug-in system with given capacities ({'bat_cap': ..., 'ElB_cap': ..., 'TES_cap': ...,
+    # 'HP_cap': ..., 'H2E_cap': ..., 'H2B_cap': ..., 'H2S_cap': ...}), solved in consecutive windows of window time
+    # steps that overlap by overlap time steps. The first window - overlap time steps of every window are kept and the
+    # next window starts from the states of energy of the storages at its first time step, so every solve only holds
+    # one window. Returns the energy flows dataframe (same columns as optimisation_run_PI_CHP) and the cost of the
+    # dispatch with the statistics of the solves (see run_statistics: size of the first and largest window, nodes of
+    # all windows and the largest MIP gap). solver: solver settings (see default_solver_settings)
+    # A window that is not solved to optimality (e.g. infeasible or stopped by the time limit) raises an error
+    settings = solver_settings(solver)
+    if not 0 < overlap < window:
+        # the states of energy at the start of the next window are taken from the overlap
+        raise ValueError("The overlap of the dispatch windows must be at least one time step and smaller than the "
+                         "window length.")
+    H_dem, P_dem, price_el, price_NG = (np.asarray(a, dtype=float) for a in (H_dem, P_dem, price_el, price_NG))
+    n = len(H_dem)
+    index = pd.RangeIndex(n) if index is None else index  # index of the energy flows
+    values = {name: np.zeros(n) for name in PI_flow_columns.values()}
+    initial_soe = None  # the storages are empty at the start of the first window
+    start = 0
+    windows = 0
+    window_statistics = []
+    begin = time.time()
+    while start < n:
+        end = min(start + window, n)
+        keep = end - start if end == n else window - overlap
+        m = build_PI_model(H_dem[start:end], P_dem[start:end], price_el[start:end], price_NG[start:end], GT_min_load,
+                           c, time_step, linearize=linearize, initial_soe=initial_soe,
+                           bat_cap_max=capacities['bat_cap'])
+        for name, capacity in capacities.items():
+            getattr(m, name).fix(capacity)
+        opt = create_solver(settings)
+        configure_solver(opt, settings, threads=threads)
+        log_file = solver_log_file(opt)
+        results = opt.solve(m, tee=settings['tee'], logfile=log_file)
+        window_statistics.append(solver_statistics(opt, results, settings, log_file))
+        if results.solver.termination_condition != pm.TerminationCondition.optimal:
+            raise RuntimeError("The dispatch window starting at time step " + str(start) + " was not solved to "
+                               "optimality, solver status " + window_statistics[-1]['solver status'] + ".")
+        for name in values:
+            values[name][start:start + keep] = pm.value(getattr(m, name)[:])[:keep]
+        if end < n:
+            # small negative values of the solver would make the next window infeasible
+            initial_soe = {name: max(pm.value(getattr(m, name)[keep]), 0) for name in ('bat_soe', 'TES_soe', 'H2S_soe')}
+        start += keep
+        windows += 1
+        print("Dispatch window", windows, "solved, time steps", start, "of", n)
+
+    grid_in = sum(values[name] for name in ('P_gr_ElB', 'P_gr_HP', 'P_gr_bat', 'P_gr_H2E', 'P_gr_process'))
+    OPEX = time_step * (price_el @ (grid_in - values['P_GT_gr'] - values['P_bat_gr']) +
+                        price_NG @ (values['NG_GT_in'] + values['NG_GB_in']))
+    CAPEX = sum(annuity(c, name[:-len('_cap')]) * capacity for name, capacity in capacities.items())
+    cost = {'Optimal result': OPEX + CAPEX, 'CAPEX': CAPEX, 'OPEX': OPEX, 'dispatch windows': windows,
+            'solve time dispatch [s]': time.time() - begin}
+    cost.update(window_statistics[0])
+    nodes = [statistics['nodes'] for statistics in window_statistics]
+    cost['nodes'] = None if None in nodes else sum(nodes)
+    cost['MIP gap'] = max((statistics['MIP gap'] for statistics in window_statistics
+                           if statistics['MIP gap'] is not None), default=None)
+    return PI_energy_flows(values, index, H_dem, P_dem), cost
+
+
+# ________________________________________ Merit-order dispatch of the benchmark system ________________________________
+def dispatch_benchmark_CHP(H_dem, P_dem, price_el, price_NG, GT_min_load, c, time_step):
+    # optimal dispatch of the benchmark system for all time steps at once, without a solver. The benchmark system has
+    # no storage and no capacity decisions, so every time step is an independent problem in the gas intake of the GT:
+    # the boiler covers the heat the GT does not deliver, the grid covers the power the GT does not deliver (buying)
+    # or takes its surplus (selling, only one direction per time step). The cost is piecewise linear in the GT intake,
+    # so the optimum lies at one of its kinks or limits, which are evaluated for both grid directions.
+    # c: constants of the benchmark system ('GT_cap', 'eta_GT_el', 'eta_GT_th', 'eta_GB', 'gr_connection').
+    # Returns the values of the variables of the benchmark model ({name: values}) and the objective value
+    H, P, p_el, p_NG = (np.asarray(a, dtype=float)[:, None] for a in (H_dem, P_dem, price_el, price_NG))
+    eta_GT_el, eta_GT_th, eta_GB, gr_connection = c['eta_GT_el'], c['eta_GT_th'], c['eta_GB'], c['gr_connection']
+    GT_in_max = c['GT_cap'] / eta_GT_th
+    GT_in_min = GT_in_max * GT_min_load
+    GB_in_max = 0.2 * c['GT_cap'] / eta_GB
+    tolerance = 1e-9 * max(1, GT_in_max)
+
+    # candidate gas intakes of the GT: limits, power output equal to the demand (+/- grid connection) and heat output
+    # equal to the demand (with and without the full boiler)
+    NG_GT_in = np.clip(np.hstack([np.full_like(H, GT_in_min), np.full_like(H, GT_in_max), P / eta_GT_el,
+                                  (P + gr_connection) / eta_GT_el, (P - gr_connection) / eta_GT_el,
+                                  H / (eta_GB * eta_GT_th), (H / eta_GB - GB_in_max) / eta_GT_th]),
+                       GT_in_min, GT_in_max)
+    P_GT = eta_GT_el * NG_GT_in
+    # the boiler covers the remaining heat demand (or runs at full load at negative gas prices)
+    NG_GB_min = np.maximum(H / eta_GB - eta_GT_th * NG_GT_in, 0)
+    NG_GB_in = np.where(p_NG < 0, GB_in_max, NG_GB_min)
+    heat_feasible = NG_GB_min <= GB_in_max + tolerance
+    # selling: the GT covers the power demand and its surplus goes to the grid (up to the grid connection) if the
+    # price is positive
+    sell_P_GT_gr = np.where(p_el > 0, np.clip(P_GT - P, 0, gr_connection), 0)
+    sell_feasible = heat_feasible & (P_GT >= P - tolerance)
+    # buying: the grid covers the power the GT does not deliver, or as much as possible at negative prices
+    buy_P_gr = np.where(p_el < 0, np.minimum(P, gr_connection), np.maximum(P - P_GT, 0))
+    buy_feasible = heat_feasible & (buy_P_gr <= gr_connection + tolerance) & (P - buy_P_gr <= P_GT + tolerance)
+    gas_cost = p_NG * time_step * (NG_GT_in + NG_GB_in)
+    cost = np.hstack([np.where(sell_feasible, gas_cost - p_el * time_step * sell_P_GT_gr, np.inf),
+                      np.where(buy_feasible, gas_cost + p_el * time_step * buy_P_gr, np.inf)])
+    best = np.argmin(cost, axis=1)
+    if np.isinf(cost[np.arange(len(best)), best]).any():
+        raise ValueError("The benchmark system cannot cover the demand at time steps " +
+                         str(np.flatnonzero(np.isinf(cost.min(axis=1))).tolist()) + ".")
+
+    steps = np.arange(len(best))
+    candidate = best % NG_GT_in.shape[1]
+    buy = best >= NG_GT_in.shape[1]
+    values = {'NG_GT_in': NG_GT_in[steps, candidate], 'NG_GB_in': NG_GB_in[steps, candidate]}
+    P_gr_process = np.where(buy, buy_P_gr[steps, candidate], 0)
+    values['P_GT_gr'] = np.where(buy, 0, sell_P_GT_gr[steps, candidate])
+    values['P_GT_process'] = P[:, 0] - P_gr_process
+    values['P_GT_excess'] = eta_GT_el * values['NG_GT_in'] - values['P_GT_process'] - values['P_GT_gr']
+    values['H_CHP_process'] = H[:, 0]
+    values['H_CHP_excess'] = eta_GB * (eta_GT_th * values['NG_GT_in'] + values['NG_GB_in']) - H[:, 0]
+    values['P_gr_process'] = P_gr_process
+    values['b1'] = buy.astype(float)
+    objective = time_step * (p_el[:, 0] @ (P_gr_process - values['P_GT_gr']) +
+                             p_NG[:, 0] @ (values['NG_GT_in'] + values['NG_GB_in']))
+    return values, objective
+
+
 # ________________________________________ Optimisation with plug-in heat pump _________________________________________
+# columns of the energy flows dataframe of the benchmark system and the variables they are taken from
+benchmark_flow_columns = {
+    'Natural gas consumption GT [MW]': 'NG_GT_in',
+    'Natural gas consumption GB [MW]': 'NG_GB_in',
+    'Power from GT to process': 'P_GT_process',
+    'Power excess from GT': 'P_GT_excess',
+    'Power from GT to grid': 'P_GT_gr',
+    'Heat from CHP to process': 'H_CHP_process',
+    'Heat excess from CHP': 'H_CHP_excess',
+    'Power from grid to process': 'P_gr_process'}
+
+
 def optimisation_run_benchmark_CHP(heat_demand_orig, price_el_hourly, price_NG_use, amp_values, variability_values,
-                                   GT_min_load, hours):
+                                   GT_min_load, hours, threads=None, solver=None, build='rules', timings=None,
+                                   prepared=None):
+    # threads: maximum number of threads used by the solver (None: solver default)
+    # build='matrix' assembles the model as sparse matrix without Pyomo (build_benchmark_matrix, solve_matrix_model),
+    # build='merit_order' computes the optimal dispatch of all time steps without a solver (dispatch_benchmark_CHP);
+    # its results have the solver status 'closed form'
+    # solver: solver settings (see default_solver_settings), threads replaces the number of threads of the settings
+    # timings: dictionary in which the wall time of the phases of the run is recorded (see optimisation_run_PI_CHP)
+    # prepared: input arrays of prepare_inputs for the same inputs (see optimisation_run_PI_CHP)
+    settings = solver_settings(solver)
+    if build == 'matrix' and settings['solver'] not in matrix_solvers:
+        raise ValueError("The matrix model is only solved with " + " or ".join(matrix_solvers) + ".")
+    phase_start = time.time()
     print("Started optimisation of benchmark system.")
     # ------------------------------------- input DATA pre-treatment --------------------------------------------------------
     time_step = 0.5  # in hours
-
-    ## natural gas price data
-    # resample to get hourly prices (with constant price per day)
-    price_NG_use_hourly = price_NG_use.resample('{}H'.format(1)).ffill()
-    price_NG_use_half_hourly = price_NG_use_hourly.resample('30T').ffill()  # resample to get half-hourly prices
-
-    # electricity price data
-    el_row_NaN = price_el_hourly[price_el_hourly.isna().any(axis=1)]  # indicates row with NaN value
-    price_el_hourly.fillna(method='ffill', inplace=True)  # replace NaN values with previous non-NaN value
-    price_el_hourly.index = price_NG_use_hourly.index
-    price_el_half_hourly = price_el_hourly.resample('30T').ffill()  # resample to get half-hourly prices
-
-    # Uncomment following lines to create subsets for electricity price data
-    price_el_hourly_short = pd.DataFrame(price_el_hourly.iloc[0:7768])
-    price_el_half_hourly_short = pd.DataFrame(price_el_half_hourly.iloc[0:hours * 2])  # 8000 operational hours per year
-    # replace full data sets by short data sets (to avoid changing code below)
-    price_el_hourly = price_el_hourly_short
-    price_el_half_hourly = price_el_half_hourly_short
-
-    # manipulate ELECTRICITY price data to increase the amplitude of the price variation
-    # get average price of original price data
-    price_el_hourly_mean = price_el_hourly.mean()
-    price_el_half_hourly_mean = price_el_half_hourly.mean()
-
-    # sort them to plot price duration-curve
-    price_el_hourly_sorted = price_el_hourly['EP [EUR/MWh]'].sort_values(ascending=False)
-    price_el_hourly_sorted_df = pd.DataFrame(price_el_hourly_sorted)
-    price_el_half_hourly_sorted = price_el_half_hourly['EP [EUR/MWh]'].sort_values(ascending=False)
-    price_el_half_hourly_sorted_df = pd.DataFrame(price_el_half_hourly_sorted)
-
-    # generate new price profiles and sort their values from high to low to plot price duration curves
-    if len(amp_values) > 0:
-
-        for k in amp_values:
-            print("Current k is: ", k)
-            colname = ("amp " + "%.3f") % k
-            # add new price data as additional columns to dataframe
-            price_el_half_hourly[str(colname)] = price_el_half_hourly_mean.iloc[0] + \
-                                                 k * (price_el_half_hourly['EP [EUR/MWh]'] -
-                                                      price_el_half_hourly_mean.iloc[0])
-
-            # sort values from high to low and add new column to dataframe
-            price_el_half_hourly_sorted[str(colname)] = price_el_half_hourly[str(colname)].sort_values(ascending=False)
-            price_el_half_hourly_sorted_df[str(colname)] = price_el_half_hourly_sorted[str(colname)]
-            # remove the index
-            price_el_half_hourly_sorted_df = price_el_half_hourly_sorted_df.reset_index(drop=True)
-
-        price_el_half_hourly_mean_df = pd.DataFrame(price_el_half_hourly.mean())
-        # calculate new mean values
-        for k in amp_values:
-            print("Current k is: ", k)
-            colname = ("amp " + "%.3f") % k
-            # removing negative prices
-            price_el_half_hourly.loc[price_el_half_hourly[str(colname)] < 0, str(colname)] = 0
-            # calculate new mean values
-            price_el_half_hourly_mean_df[str(colname)] = price_el_half_hourly[str(colname)].mean()
-
-      # ----------------------------- Dictionaries to run optimisation for each process -------------------------------------
-    # --------------------------------(with non-optimised and optimised values) -------------------------------------------
-    # for electricity
-    price_el_hourly.rename(columns={'EP [EUR/MWh]': 'original'}, inplace=True)
-    price_el_half_hourly.rename(columns={'EP [EUR/MWh]': 'original'}, inplace=True)
+    # half-hourly demand and prices, with the amplified electricity prices (see prepare_inputs)
+    if prepared is None:
+        prepared = prepare_inputs(heat_demand_orig, price_el_hourly, price_NG_use, amp_values, hours, time_step)
+    H_dem, P_dem, price_NG = prepared['H_dem'], prepared['P_dem'], prepared['price_NG']
 
     # create respective dictionary
     looping_variable = variability_values
@@ -705,19 +1790,18 @@ def optimisation_run_benchmark_CHP(heat_demand_orig, price_el_hourly, price_NG_u
     # for amp in variability:
     for count, amp in enumerate(looping_variable):
         print("Current scenario is: ", amp)
-        H_dem = heat_demand_orig[0:hours * 2]
-        H_dem_max = heat_demand_orig[0:hours * 2].max().iloc[0]
-        P_dem = 0.1 * heat_demand_orig[0:hours * 2]
-        P_dem.rename(columns={'Heat demand [MW]': 'Power demand [MW]'}, inplace=True)
+        H_dem_max = H_dem.max()
+        price_el = prepared['price_el'][:, count]
 
         # ------------------ START OPTIMISATION --------------------------------------------------------------------
+        phase_start = add_phase_time(timings, 'input preparation', phase_start)
         # Definitions
 
         def heat_balance(m, time):
-            return float(H_dem.iloc[time]) == m.H_CHP_process[time]
+            return float(H_dem[time]) == m.H_CHP_process[time]
 
         def power_balance(m, time):
-            return float(P_dem.iloc[time]) == m.P_gr_process[time] + m.P_GT_process[time]
+            return float(P_dem[time]) == m.P_gr_process[time] + m.P_GT_process[time]
 
         def GT_ng_P_conversion(m, time):
             return m.NG_GT_in[time] * eta_GT_el == m.P_GT_excess[time] + m.P_GT_process[time] + m.P_GT_gr[time]
@@ -744,15 +1828,10 @@ def optimisation_run_benchmark_CHP(heat_demand_orig, price_el_hourly, price_NG_u
                         1 - m.b1[time])  # total power flow from grid to plant is limited to x MW
 
         def minimize_total_costs(m, time):
-            return sum(price_el_half_hourly.iloc[time, count] * time_step * (m.P_gr_process[time] - m.P_GT_gr[time])
-                       + (m.NG_GT_in[time] + m.NG_GB_in[time]) * time_step * price_NG_use_half_hourly.iloc[time, 0]
+            return sum(price_el[time] * time_step * (m.P_gr_process[time] - m.P_GT_gr[time])
+                       + (m.NG_GT_in[time] + m.NG_GB_in[time]) * time_step * price_NG[time]
                        for time in m.T)
 
-        m = pm.ConcreteModel()
-
-        # SETS
-        m.T = pm.RangeSet(0, hours * 2 - 1)
-
         # CONSTANTS
         disc_rate = 0.1  # 10%
         EF_ng = 0.2  # emission factor natural gas, tCO2/MWh(CH4)
@@ -761,57 +1840,80 @@ def optimisation_run_benchmark_CHP(heat_demand_orig, price_el_hourly, price_NG_u
         eta_GT_th = 0.6  # Thermal efficiency of GT [%]
         eta_GB = 0.82
         GT_cap = H_dem_max / eta_GB  # Thermal capacity (LPS) GT, [MW]
-
-        # VARIABLES
-        m.NG_GT_in = pm.Var(m.T, bounds=(0, None))  # natural gas intake of gas turbine, MWh
-        m.NG_GB_in = pm.Var(m.T, bounds=(0, None))  # natural gas intake of gas boiler, MWh
-        m.P_GT_process = pm.Var(m.T, bounds=(0, None))  # Power from CHP to process, MW
-        m.P_GT_excess = pm.Var(m.T, bounds=(0, None))  # Excess power from CHP, MW
-        m.P_GT_gr = pm.Var(m.T, bounds=(0, None))  # Power from CHP to grid, MW
-        m.H_CHP_process = pm.Var(m.T, bounds=(0, None))  # Heat generated from CHP (natural gas), MW
-        m.H_CHP_excess = pm.Var(m.T, bounds=(0, None))  # Excess heat from CHP, MW
-        m.P_gr_process = pm.Var(m.T, bounds=(0, None))  # power flow from grid to process, MW
-        m.b1 = pm.Var(m.T, within=pm.Binary)  # binary variable grid connection
-
-        # CONSTRAINTS
-        # balance supply and demand
-        m.heat_balance_constraint = pm.Constraint(m.T, rule=heat_balance)
-        m.power_balance_constraint = pm.Constraint(m.T, rule=power_balance)
-        # CHP constraints
-        m.CHP_ng_H_conversion_constraint = pm.Constraint(m.T, rule=CHP_ng_H_conversion)
-        m.GT_ng_P_conversion_constraint = pm.Constraint(m.T, rule=GT_ng_P_conversion)
-        m.GT_cap_constraint = pm.Constraint(m.T, rule=GT_cap_rule)
-        m.GB_cap_constraint = pm.Constraint(m.T, rule=GB_cap_rule)
-        m.GT_min_load_constraint = pm.Constraint(m.T, rule=GT_min_load_rule)
-
-        # grid constraint
-        m.max_grid_power_in_constraint = pm.Constraint(m.T, rule=max_grid_power_in)
-        m.max_grid_power_out_constraint = pm.Constraint(m.T, rule=max_grid_power_out)
-
-        # OBJECTIVE FUNCTION
-        m.objective = pm.Objective(rule=minimize_total_costs,
-                                   sense=pm.minimize,
-                                   doc='Define objective function')
-
-        # Solve optimization problem
-        opt = pm.SolverFactory('gurobi')
-        opt.options["MIPGap"] = 0.0005
-        results = opt.solve(m, tee=True)
+        c = {'GT_cap': GT_cap, 'eta_GT_el': eta_GT_el, 'eta_GT_th': eta_GT_th, 'eta_GB': eta_GB,
+             'gr_connection': gr_connection}
+
+        statistics = {}
+        if build in ['matrix', 'merit_order']:
+            inputs = (H_dem, P_dem, price_el, price_NG, GT_min_load, c, time_step)
+            if build == 'matrix':
+                model = build_benchmark_matrix(*inputs)
+                phase_start = add_phase_time(timings, 'model build', phase_start)
+                values, objective = solve_matrix_model(model, settings, threads=threads, statistics=statistics)
+            else:
+                phase_start = add_phase_time(timings, 'model build', phase_start)
+                values, objective = dispatch_benchmark_CHP(*inputs)
+                statistics = {'solver status': 'closed form'}
+            # the solution values take the place of the model components in the evaluation below
+            m = SimpleNamespace(objective=objective, **values)
+        else:
+            m = pm.ConcreteModel()
+
+            # SETS
+            m.T = pm.RangeSet(0, hours * 2 - 1)
+
+            # VARIABLES
+            m.NG_GT_in = pm.Var(m.T, bounds=(0, None))  # natural gas intake of gas turbine, MWh
+            m.NG_GB_in = pm.Var(m.T, bounds=(0, None))  # natural gas intake of gas boiler, MWh
+            m.P_GT_process = pm.Var(m.T, bounds=(0, None))  # Power from CHP to process, MW
+            m.P_GT_excess = pm.Var(m.T, bounds=(0, None))  # Excess power from CHP, MW
+            m.P_GT_gr = pm.Var(m.T, bounds=(0, None))  # Power from CHP to grid, MW
+            m.H_CHP_process = pm.Var(m.T, bounds=(0, None))  # Heat generated from CHP (natural gas), MW
+            m.H_CHP_excess = pm.Var(m.T, bounds=(0, None))  # Excess heat from CHP, MW
+            m.P_gr_process = pm.Var(m.T, bounds=(0, None))  # power flow from grid to process, MW
+            m.b1 = pm.Var(m.T, within=pm.Binary)  # binary variable grid connection
+
+            # CONSTRAINTS
+            # balance supply and demand
+            m.heat_balance_constraint = pm.Constraint(m.T, rule=heat_balance)
+            m.power_balance_constraint = pm.Constraint(m.T, rule=power_balance)
+            # CHP constraints
+            m.CHP_ng_H_conversion_constraint = pm.Constraint(m.T, rule=CHP_ng_H_conversion)
+            m.GT_ng_P_conversion_constraint = pm.Constraint(m.T, rule=GT_ng_P_conversion)
+            m.GT_cap_constraint = pm.Constraint(m.T, rule=GT_cap_rule)
+            m.GB_cap_constraint = pm.Constraint(m.T, rule=GB_cap_rule)
+            m.GT_min_load_constraint = pm.Constraint(m.T, rule=GT_min_load_rule)
+
+            # grid constraint
+            m.max_grid_power_in_constraint = pm.Constraint(m.T, rule=max_grid_power_in)
+            m.max_grid_power_out_constraint = pm.Constraint(m.T, rule=max_grid_power_out)
+
+            # OBJECTIVE FUNCTION
+            m.objective = pm.Objective(rule=minimize_total_costs,
+                                       sense=pm.minimize,
+                                       doc='Define objective function')
+
+            # Solve optimization problem
+            phase_start = add_phase_time(timings, 'model build', phase_start)
+            opt = create_solver(settings)
+            configure_solver(opt, settings, threads=threads)
+            start_time = time.time()
+            log_file = solver_log_file(opt)
+            results = opt.solve(m, tee=settings['tee'], logfile=log_file)
+            solve_time = time.time() - start_time
+            statistics = solver_statistics(opt, results, settings, log_file)
+            wall_time = solver_wall_time(results)
+            if timings is not None and wall_time is not None:
+                # the rest of the solve call is writing and transferring the model and loading the solution
+                timings['write and transfer'] = timings.get('write and transfer', 0) + solve_time - wall_time
+                phase_start += solve_time - wall_time
+        phase_start = add_phase_time(timings, 'solve', phase_start)
 
         # ------------------ OPTIMISATION END --------------------------------------------------------------------------
         # Todo: Change? stopped changing script here
         # Collect results
-        result = pd.DataFrame(index=price_NG_use_half_hourly.index[0:hours * 2])
-        result['Heat demand core process'] = list(H_dem['Heat demand [MW]'])
-        result['Power demand core process'] = list(P_dem['Power demand [MW]'])
-        result['Natural gas consumption GT [MW]'] = pm.value(m.NG_GT_in[:])
-        result['Natural gas consumption GB [MW]'] = pm.value(m.NG_GB_in[:])
-        result['Power from GT to process'] = pm.value(m.P_GT_process[:])
-        result['Power excess from GT'] = pm.value(m.P_GT_excess[:])
-        result['Power from GT to grid'] = pm.value(m.P_GT_gr[:])
-        result['Heat from CHP to process'] = pm.value(m.H_CHP_process[:])
-        result['Heat excess from CHP'] = pm.value(m.H_CHP_excess[:])
-        result['Power from grid to process'] = pm.value(m.P_gr_process[:])
+        result = energy_flows(m, benchmark_flow_columns, prepared['index'], H_dem, P_dem)
+        phase_start = add_phase_time(timings, 'result extraction', phase_start)
 
         Grid_gen = result['Power from grid to process'].sum()
         CO2_emissions = (result['Natural gas consumption GT [MW]'].sum() +
@@ -879,7 +1981,9 @@ def optimisation_run_benchmark_CHP(heat_demand_orig, price_el_hourly, price_NG_u
         el_price_scenario_dict['benchmark system'][amp]['results']['Heat pump size [MW]'] = 0
         el_price_scenario_dict['benchmark system'][amp]['results']['Heat from HP to CP [MWh]'] = 0
         el_price_scenario_dict['benchmark system'][amp]['results']['Heat from HP to TES [MWh]'] = 0
+        el_price_scenario_dict['benchmark system'][amp]['results'].update(statistics)
         el_price_scenario_dict['benchmark system'][amp]['energy flows'] = result
+        add_phase_time(timings, 'diagnostics', phase_start)
 
         return el_price_scenario_dict
 
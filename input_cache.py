@@ -0,0 +1,103 @@
+import hashlib
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Cache of the parsed input data: every sheet of the price workbook and every demand file is parsed once and stored
+# as numpy arrays (.npz) in a folder named after the source file and the hash of its content. If the source file
+# changes, its hash changes and the data is parsed again; the folder of the old version is removed.
+
+reporoot_dir = Path(__file__).resolve().parent
+default_cache_dir = reporoot_dir / 'input_data' / 'cache'
+file_hashes = {}  # hashes of the source files, keyed by path, modification time and size
+
+
+def file_hash(path):
+    # sha256 hash of the content of a file, computed once per file version and session
+    stat = os.stat(path)
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if key not in file_hashes:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b''):
+                sha.update(chunk)
+        file_hashes[key] = sha.hexdigest()
+    return file_hashes[key]
+
+
+def cache_folder(path, cache_dir=None):
+    # folder with the cached data of the current version of a source file
+    path = Path(path)
+    cache_dir = Path(default_cache_dir if cache_dir is None else cache_dir)
+    file_key = file_hash(path)[:16]
+    folder = cache_dir / (path.stem + '_' + file_key)
+    if not folder.is_dir():
+        # remove the cached data of older versions of the source file
+        for old_folder in cache_dir.glob(path.stem + '_*'):
+            if old_folder.is_dir() and len(old_folder.name) == len(folder.name):
+                shutil.rmtree(old_folder, ignore_errors=True)
+        folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+def save_arrays(filename, arrays):
+    # write to a temporary file first, so that parallel runs never read a partly written cache file
+    temporary_filename = filename.with_name(filename.name + '.' + str(os.getpid()) + '.tmp')
+    with open(temporary_filename, 'wb') as handle:
+        np.savez(handle, **arrays)
+    os.replace(temporary_filename, filename)
+
+
+def column_letter(position):
+    # excel column letter of a column position (0 -> 'A')
+    letters = ''
+    position += 1
+    while position > 0:
+        position, rest = divmod(position - 1, 26)
+        letters = chr(ord('A') + rest) + letters
+    return letters
+
+
+def load_price_data(workbook, sheet_name, columns, cache_dir=None):
+    # columns of a sheet of the price workbook (e.g. columns='F' or 'K,L') as dataframe with a datetime index. Gives
+    # the same data as pd.read_excel(workbook, sheet_name=sheet_name, header=0, index_col=0, usecols='A,' + columns)
+    # followed by the conversion of the index with pd.to_datetime. All numeric columns of a sheet are cached when
+    # the sheet is read for the first time.
+    filename = cache_folder(workbook, cache_dir) / (sheet_name + '.npz')
+    if not filename.is_file():
+        sheet = pd.read_excel(workbook, sheet_name=sheet_name, header=0, index_col=0)
+        arrays = {'index': pd.to_datetime(sheet.index, dayfirst=True, format='mixed').to_numpy(),
+                  'index name': np.array(sheet.index.name or '')}
+        for position, (header, values) in enumerate(sheet.items(), start=1):
+            if pd.api.types.is_numeric_dtype(values):
+                arrays['column ' + column_letter(position)] = values.to_numpy()
+                arrays['header ' + column_letter(position)] = np.array(str(header))
+        save_arrays(filename, arrays)
+    with np.load(filename) as arrays:
+        data = {}
+        for letter in columns.replace(' ', '').split(','):
+            if 'column ' + letter not in arrays:
+                raise ValueError("Column " + letter + " of sheet " + sheet_name + " does not contain numeric data.")
+            data[str(arrays['header ' + letter])] = arrays['column ' + letter]
+        index = pd.DatetimeIndex(arrays['index'], name=str(arrays['index name']) or None)
+    data = pd.DataFrame(data, index=index)
+    # drop the empty rows at the end of the sheet that only belong to other columns
+    last_row = np.flatnonzero(data.notna().any(axis=1).to_numpy() | index.notna())
+    return data.iloc[:last_row[-1] + 1] if len(last_row) > 0 else data.iloc[:0]
+
+
+def load_demand_data(csv_file, cache_dir=None):
+    # demand data file as dataframe, the same data as pd.read_csv(csv_file); the columns are cached as arrays
+    filename = cache_folder(csv_file, cache_dir) / 'demand.npz'
+    if not filename.is_file():
+        demand = pd.read_csv(csv_file)
+        arrays = {'headers': np.array([str(header) for header in demand.columns])}
+        for position, (header, values) in enumerate(demand.items()):
+            arrays['column ' + str(position)] = values.to_numpy() if pd.api.types.is_numeric_dtype(values) else \
+                values.to_numpy(dtype=str)
+        save_arrays(filename, arrays)
+    with np.load(filename) as arrays:
+        return pd.DataFrame({header: arrays['column ' + str(position)]
+                             for position, header in enumerate(arrays['headers'].tolist())})
@@ -0,0 +1,121 @@
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+from contextlib import closing
+from result_store import key_columns
+from result_export import scenario_runs
+
+# Catalog of the scalar results (KPIs, run statistics and timings) of the runs of all sweeps in one SQLite database:
+# every run is registered with its sweep, its scenario keys (the key columns of the result store) and the time of
+# registration, every sweep with its settings. The results are stored in long format (one row per run and parameter)
+# and indexed by parameter and value and by scenario, so the KPIs of all sweeps can be compared with one query
+# (query_kpis, or SQL on the view "run_kpis") without loading the result files of the sweeps.
+
+schema = '''
+CREATE TABLE IF NOT EXISTS sweeps (sweep TEXT PRIMARY KEY, settings TEXT, registered TEXT);
+CREATE TABLE IF NOT EXISTS runs (run INTEGER PRIMARY KEY, sweep TEXT NOT NULL REFERENCES sweeps (sweep),
+    HPtype TEXT, ELscenario TEXT, NGscenario TEXT, CAPEXscenario TEXT, system TEXT, amp TEXT, registered TEXT,
+    UNIQUE (sweep, HPtype, ELscenario, NGscenario, CAPEXscenario, system, amp));
+CREATE INDEX IF NOT EXISTS runs_scenario ON runs (HPtype, ELscenario, NGscenario, CAPEXscenario, system, amp);
+CREATE TABLE IF NOT EXISTS kpis (run INTEGER NOT NULL REFERENCES runs (run), parameter TEXT NOT NULL, value,
+    PRIMARY KEY (run, parameter)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS kpis_parameter ON kpis (parameter, value);
+CREATE VIEW IF NOT EXISTS run_kpis AS
+    SELECT runs.run, runs.sweep, HPtype, ELscenario, NGscenario, CAPEXscenario, system, amp, runs.registered,
+           parameter, value
+    FROM runs JOIN kpis ON kpis.run = runs.run;
+'''
+
+
+def connect(catalog_file):
+    # connection to the catalog, which is created if it does not exist (waits for other processes that write to it)
+    connection = sqlite3.connect(catalog_file, timeout=60)
+    connection.executescript(schema)
+    return connection
+
+
+def catalog_value(value):
+    # value of a result as stored in the catalog: numbers (also numpy numbers) and strings as they are, None and NaN as
+    # NULL, other objects as text
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+
+def register_results(catalog_file, sweep, runs, settings=None):
+    # register the results of runs of a sweep (list of (keys, results): the values of the key columns and
+    # {parameter: value}). A run with the same sweep and keys that was registered before is replaced. The settings of
+    # the sweep (a dictionary, stored as json) are stored when the first run of the sweep is registered.
+    registered = pd.Timestamp.now().isoformat()
+    with closing(connect(catalog_file)) as connection, connection:
+        connection.execute('INSERT OR IGNORE INTO sweeps VALUES (?, ?, ?)',
+                           (sweep, None if settings is None else json.dumps(settings, default=str), registered))
+        for keys, results in runs:
+            keys = [str(key) for key in keys]
+            row = connection.execute('SELECT run FROM runs WHERE sweep = ? AND ' +
+                                     ' AND '.join(column + ' = ?' for column in key_columns), [sweep] + keys).fetchone()
+            if row is not None:
+                connection.execute('DELETE FROM kpis WHERE run = ?', row)
+                connection.execute('DELETE FROM runs WHERE run = ?', row)
+            run = connection.execute('INSERT INTO runs (sweep, ' + ', '.join(key_columns) + ', registered) '
+                                     'VALUES (' + ', '.join('?' * (len(key_columns) + 2)) + ')',
+                                     [sweep] + keys + [registered]).lastrowid
+            connection.executemany('INSERT INTO kpis VALUES (?, ?, ?)',
+                                   [(run, parameter, catalog_value(value)) for parameter, value in results.items()])
+
+
+def register_runs(catalog_file, sweep, HPtype, ELscenario, NGscenario, CAPEXscenario, scenario_result, settings=None):
+    # register the results of one optimisation run as returned by optimisation_run_PI_CHP or
+    # optimisation_run_benchmark_CHP (see save_scenario_result); catalog_file None: no catalog
+    if catalog_file is None:
+        return
+    register_results(catalog_file, sweep, [
+        ([HPtype, ELscenario, NGscenario, '' if CAPEXscenario is None else CAPEXscenario, system, amp],
+         result['results']) for system, amp_dict in scenario_result.items() for amp, result in amp_dict.items()],
+                     settings)
+
+
+def register_scenario_dict(catalog_file, sweep, scenario_dict, settings=None):
+    # register all runs of a scenario_dict of Modelruns.py ({HPtype: {ELscenario: {NGscenario: {CAPEXscenario:
+    # {system: {amp: ...}}}}}}), e.g. loaded from the pickle file of an earlier sweep
+    register_results(catalog_file, sweep, [(keys, run['results']) for keys, run in scenario_runs(scenario_dict)],
+                     settings)
+
+
+def load_sweeps(catalog_file):
+    # registered sweeps with their settings (as dictionary), time of registration and number of runs
+    with closing(connect(catalog_file)) as connection:
+        sweeps = pd.read_sql_query('SELECT sweeps.sweep, settings, sweeps.registered, COUNT(run) AS runs FROM sweeps '
+                                   'LEFT JOIN runs ON runs.sweep = sweeps.sweep GROUP BY sweeps.sweep', connection)
+    sweeps['settings'] = [None if settings is None else json.loads(settings) for settings in sweeps['settings']]
+    return sweeps
+
+
+def query_kpis(catalog_file, parameters=None, sweeps=None, **keys):
+    # scalar results of the registered runs, one row per run with the sweep, the key columns, the time of registration
+    # and one column per parameter. Only the given parameters (default: all), sweeps (default: all) and runs with the
+    # given values of key columns (e.g. HPtype='PlugIn', CAPEXscenario='HighHP-LowRest') are selected.
+    unknown_columns = [column for column in keys if column not in key_columns]
+    if unknown_columns:
+        raise ValueError("Unknown key columns: " + ", ".join(unknown_columns) + " (key columns: " +
+                         ", ".join(key_columns) + ").")
+    conditions, values = [], []
+    for column, selection in [('parameter', parameters), ('sweep', sweeps)] + list(keys.items()):
+        if selection is not None:
+            selection = [selection] if isinstance(selection, str) else list(selection)
+            conditions.append(column + ' IN (' + ', '.join('?' * len(selection)) + ')')
+            values += selection
+    with closing(connect(catalog_file)) as connection:
+        table = pd.read_sql_query('SELECT * FROM run_kpis' + (' WHERE ' + ' AND '.join(conditions) if conditions
+                                                             else '') + ' ORDER BY run', connection, params=values)
+    run_columns = ['run', 'sweep'] + key_columns + ['registered']
+    table = table.pivot(index=run_columns, columns='parameter', values='value')
+    if parameters is not None:
+        table = table.reindex(columns=[parameters] if isinstance(parameters, str) else parameters)
+    table.columns.name = None
+    return table.infer_objects().reset_index()
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from result_store import key_columns, load_energy_flows, energy_flow_arrays
+
+# Export of the results to csv files (see Postprocessing.py): the scalar results of all runs are flattened into one
+# long-format table (one row per run and parameter) in a single pass, from which the results, run statistics and
+# aggregated energy flows are selected. The hourly energy flows of the runs are written (as csv files in chunks of time
+# steps or as compressed numpy archives) by several worker processes; runs in the result store are read by the worker
+# that writes them, so the energy flows of the whole sweep never have to be loaded (or sent to the workers) at once.
+
+# number of time steps of the hourly energy flows that are formatted and written at once
+default_chunk_rows = 2000
+
+
+def scenario_runs(scenario_dict, depth=len(key_columns)):
+    # keys and results ({'results': {...}, 'energy flows': ...}) of all runs in a nested results dictionary with depth
+    # levels of keys, e.g. scenario_dict of Modelruns.py ({HPtype: {ELscenario: {NGscenario: {CAPEXscenario:
+    # {system: {amp: ...}}}}}})
+    for key, value in scenario_dict.items():
+        if depth == 1:
+            yield (key,), value
+        else:
+            for keys, run in scenario_runs(value, depth - 1):
+                yield (key,) + keys, run
+
+
+def long_format(scenario_dict, columns=key_columns):
+    # scalar results of all runs of a nested results dictionary (with one level of keys per column) as long-format
+    # table: the key columns, 'parameter' and 'value', one row per run and parameter in the order of the runs
+    runs = list(scenario_runs(scenario_dict, len(columns)))
+    keys = np.empty((len(runs), len(columns)), dtype=object)
+    keys[:] = [run_keys for run_keys, _ in runs]
+    table = pd.DataFrame(np.repeat(keys, [len(run['results']) for _, run in runs], axis=0), columns=columns)
+    table['parameter'] = [parameter for _, run in runs for parameter in run['results']]
+    table['value'] = pd.Series([value for _, run in runs for value in run['results'].values()], dtype=object)
+    return table
+
+
+def select_parameters(table, parameters):
+    # rows of a long-format table (see long_format) with the given parameters, in the order of the table
+    return table[table['parameter'].isin(parameters)].reset_index(drop=True).infer_objects()
+
+
+def write_energy_flows(energy_flows, filename, chunk_rows=default_chunk_rows):
+    # write the energy flows of one run to a csv file, chunk_rows time steps at a time (compressed if filename ends
+    # with '.gz'), or, if filename ends with '.npz', to a compressed numpy archive with one array per column (as in the
+    # result store, see energy_flow_arrays), which is much faster to write and read than csv. energy_flows is a
+    # dataframe or (store_dir, keys) of a run in the result store, which is read here.
+    if isinstance(energy_flows, tuple):
+        energy_flows = load_energy_flows(*energy_flows)
+    if str(filename).endswith('.npz'):
+        np.savez_compressed(filename, **energy_flow_arrays(energy_flows))
+    else:
+        energy_flows.to_csv(filename, index=True, chunksize=chunk_rows)
+    return filename
+
+
+def export_energy_flows(exports, workers=1, chunk_rows=default_chunk_rows):
+    # write the energy flows of several runs ({filename: dataframe or (store_dir, keys)}, see write_energy_flows)
+    # with workers processes (1: one file after another in this process); yields the filenames in the given order
+    if workers == 1:
+        for filename, energy_flows in exports.items():
+            yield write_energy_flows(energy_flows, filename, chunk_rows)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(write_energy_flows, exports.values(), exports.keys(), [chunk_rows] * len(exports))
@@ -0,0 +1,270 @@
+import os
+import io
+import hashlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Result store of the scenario runs: the energy flows (time series) of every run are written to a compressed numpy
+# archive with one array per column ("energy_flows/<scenario id>.npz") and the scalar results of the runs of every
+# scenario (call of a model function) to a small table ("results/<scenario id>.csv"), which load_index combines to the
+# index of all runs. Saving a scenario therefore only writes its own files, and single scenarios, columns and time
+# windows can be read without loading the results of the other runs.
+# The manifest ("manifest.csv") records the scenarios whose results are completely stored, together with the hash of
+# their inputs and settings, so that an interrupted sweep can skip them when it is restarted. A scenario is appended to
+# the manifest when it is finished; its last entry counts.
+# Optionally, the energy flows are stored compact (see save_scenario_result): in single precision or quantised to
+# integer multiples of a step, without the columns that are zero in all time steps and with only the nonzero values of
+# columns that are mostly zero. The layout of the columns is stored with the data, so they are restored when loaded.
+
+# columns identifying a run in the index (CAPEXscenario is empty for the benchmark system)
+key_columns = ['HPtype', 'ELscenario', 'NGscenario', 'CAPEXscenario', 'system', 'amp']
+# columns identifying a scenario in the manifest
+manifest_columns = ['HPtype', 'ELscenario', 'NGscenario', 'CAPEXscenario']
+# maximum share of nonzero values of a column that is stored as sparse column (positions and values of the nonzeros)
+sparse_share = 0.1
+
+
+def scenario_id(keys):
+    # file name of a run, built from the values of the key columns
+    return '__'.join(str(key) for key in keys)
+
+
+def results_file(store_dir, keys):
+    # table of the scalar results of the runs of a scenario (keys: values of the manifest columns)
+    return Path(store_dir) / 'results' / (scenario_id(keys) + '.csv')
+
+
+def read_results(filename):
+    # scalar results in a table of the store, one row per run
+    results = pd.read_csv(filename, dtype={column: str for column in key_columns}, float_precision='round_trip')
+    results[key_columns] = results[key_columns].fillna('')
+    return results
+
+
+def replace_file(filename, write):
+    # write to a temporary file first, so that readers never see a partly written file
+    temporary_filename = Path(str(filename) + '.' + str(os.getpid()) + '.tmp')
+    with open(temporary_filename, 'wb') as handle:
+        write(handle)
+    os.replace(temporary_filename, filename)
+
+
+def compact_columns(energy_flows, compact):
+    # arrays of the energy flows in compact storage: compact='float32' stores the values in single precision, a number
+    # stores them rounded to integer multiples of this step (e.g. 1e-4 MW). Columns without nonzero values are not
+    # stored, columns with at most sparse_share nonzero values only with the positions and values of the nonzeros.
+    # The layout of every column ('dense', 'sparse' or 'zero') is stored with the data.
+    if compact != 'float32' and not (isinstance(compact, (int, float)) and compact > 0):
+        raise ValueError("compact must be None, 'float32' or a positive quantisation step, not " + str(compact) + ".")
+    arrays = {'compact': np.array(str(compact))}
+    layout = []
+    for position, column in enumerate(energy_flows):
+        values = energy_flows[column].to_numpy(dtype=float)
+        if compact == 'float32':
+            values = values.astype(np.float32)
+        else:
+            values = np.rint(values / compact)
+            values = values.astype(np.int32 if np.abs(values).max(initial=0) < 2 ** 31 else np.int64)
+        nonzero = np.flatnonzero(values)
+        if len(nonzero) == 0:
+            layout.append('zero')
+            continue
+        if len(nonzero) <= sparse_share * len(values):
+            layout.append('sparse')
+            arrays['positions ' + str(position)] = nonzero.astype(np.int32)
+            values = values[nonzero]
+        else:
+            layout.append('dense')
+        arrays['column ' + str(position)] = values
+    arrays['layout'] = np.array(layout)
+    return arrays
+
+
+def stored_column(arrays, position, first, last, sparse=False):
+    # values of the time steps first to last (excluded) of a stored column, in any layout (see compact_columns).
+    # Quantised values are converted back to float; sparse=True returns mostly zero columns as sparse arrays
+    compact = str(arrays['compact']) if 'compact' in arrays else 'None'
+    layout = str(arrays['layout'][position]) if 'layout' in arrays else 'dense'
+    if layout == 'dense':
+        values = arrays['column ' + str(position)][first:last]
+    else:
+        values = np.zeros(last - first, dtype=np.float32 if compact == 'float32' else float)
+        if layout == 'sparse':
+            positions = arrays['positions ' + str(position)]
+            selected = (positions >= first) & (positions < last)
+            values[positions[selected] - first] = arrays['column ' + str(position)][selected]
+    if compact not in ['None', 'float32']:
+        values = values * float(compact)
+    if sparse and layout != 'dense':
+        return pd.arrays.SparseArray(values, fill_value=0)
+    return values
+
+
+def energy_flow_arrays(energy_flows, compact=None):
+    # arrays of the energy flows of a run as stored: the time steps, the column names and one array per column
+    # (compact: None stores the values in double precision, otherwise see compact_columns)
+    arrays = {'index': energy_flows.index.to_numpy(), 'columns': np.array([str(c) for c in energy_flows])}
+    if compact is None:
+        for position, column in enumerate(energy_flows):
+            arrays['column ' + str(position)] = energy_flows[column].to_numpy()
+    else:
+        arrays.update(compact_columns(energy_flows, compact))
+    return arrays
+
+
+def save_scenario_result(store_dir, HPtype, ELscenario, NGscenario, CAPEXscenario, scenario_result, compact=None):
+    # store the results of one optimisation run as returned by optimisation_run_PI_CHP or
+    # optimisation_run_benchmark_CHP ({system: {amp: {'results': {...}, 'energy flows': dataframe}}})
+    # compact: None stores the energy flows in double precision, 'float32' or a quantisation step stores them compact
+    # (see compact_columns)
+    # The results of a previous run of the same scenario are replaced.
+    store_dir = Path(store_dir)
+    (store_dir / 'energy_flows').mkdir(parents=True, exist_ok=True)
+    (store_dir / 'results').mkdir(exist_ok=True)
+    scenario = scenario_keys(HPtype, ELscenario, NGscenario, CAPEXscenario)
+    rows = []
+    for system, amp_dict in scenario_result.items():
+        for amp, result in amp_dict.items():
+            keys = scenario + [system, amp]
+            arrays = energy_flow_arrays(result['energy flows'], compact)
+            replace_file(store_dir / 'energy_flows' / (scenario_id(keys) + '.npz'),
+                         lambda handle: np.savez_compressed(handle, **arrays))
+            rows.append(dict(zip(key_columns, keys), **result['results']))
+    results = pd.DataFrame(rows, columns=None if rows else key_columns)
+    replace_file(results_file(store_dir, scenario),
+                 lambda handle: results.to_csv(handle, index=False, float_format='%.17g'))
+
+
+def load_index(store_dir):
+    # scalar results of all stored runs, one row per run, in the order in which the scenarios were saved
+    files = sorted((Path(store_dir) / 'results').glob('*.csv'), key=lambda filename: (filename.stat().st_mtime_ns,
+                                                                                       filename.name))
+    if not files:
+        return pd.DataFrame(columns=key_columns)
+    order = {filename.stem: position for position, filename in enumerate(files)}
+    # the results files with the same columns (e.g. of all plug-in runs) are parsed together as one table
+    groups = {}
+    for filename in files:
+        header, _, rows = filename.read_text().partition('\n')
+        groups.setdefault(header, []).append(rows)
+    index = pd.concat([read_results(io.StringIO(header + '\n' + ''.join(rows))) for header, rows in groups.items()],
+                      ignore_index=True)
+    positions = [order[scenario_id(keys)] for keys in index[manifest_columns].to_numpy()]
+    return index.iloc[np.argsort(positions, kind='stable')].reset_index(drop=True)
+
+
+def load_scenario_rows(store_dir, keys):
+    # scalar results of the stored runs of one scenario (keys: values of the manifest columns), one row per run
+    filename = results_file(store_dir, keys)
+    if not filename.is_file():
+        return pd.DataFrame(columns=key_columns)
+    return read_results(filename)
+
+
+def load_energy_flows(store_dir, keys, columns=None, start=None, end=None, sparse=False):
+    # energy flows of one run (keys: values of the key columns, e.g. a row of load_index(store_dir)[key_columns]).
+    # Only the requested columns (default: all) and the time steps between start and end (both included, default:
+    # all) are read. Compact stored energy flows are restored (single precision values stay single precision);
+    # sparse=True keeps the columns that are stored sparse or zero as sparse columns, which saves memory.
+    if isinstance(keys, dict) or isinstance(keys, pd.Series):
+        keys = [keys[column] for column in key_columns]
+    filename = Path(store_dir) / 'energy_flows' / (scenario_id(keys) + '.npz')
+    with np.load(filename) as arrays:
+        index = pd.DatetimeIndex(arrays['index'])
+        first = 0 if start is None else index.searchsorted(pd.Timestamp(start), side='left')
+        last = len(index) if end is None else index.searchsorted(pd.Timestamp(end), side='right')
+        stored_columns = arrays['columns'].tolist()
+        columns = stored_columns if columns is None else [columns] if isinstance(columns, str) else columns
+        return pd.DataFrame({column: stored_column(arrays, stored_columns.index(column), first, last, sparse)
+                             for column in columns}, index=index[first:last])
+
+
+def input_hash(*inputs):
+    # hash of the inputs and settings of a run: dataframes and arrays by their values and labels, dictionaries by
+    # their items (in sorted order) and other objects (settings, numbers, strings, lists) by their representation
+    digest = hashlib.sha256()
+    for item in inputs:
+        if isinstance(item, (pd.DataFrame, pd.Series)):
+            digest.update(repr(list(item.columns) if isinstance(item, pd.DataFrame) else item.name).encode())
+            digest.update(pd.util.hash_pandas_object(item, index=True).to_numpy().tobytes())
+        elif isinstance(item, np.ndarray):
+            digest.update(repr((item.dtype.str, item.shape)).encode())
+            digest.update(np.ascontiguousarray(item).tobytes())
+        elif isinstance(item, dict):
+            digest.update(input_hash(*[element for key in sorted(item, key=str) for element in (key, item[key])])
+                          .encode())
+        else:
+            digest.update(repr(item).encode())
+        digest.update(b'|')  # separates the inputs
+    return digest.hexdigest()
+
+
+def load_manifest(store_dir):
+    # finished scenarios of the store with the hash of their inputs and settings, one row per scenario
+    filename = Path(store_dir) / 'manifest.csv'
+    if not filename.is_file():
+        return pd.DataFrame(columns=manifest_columns + ['input hash', 'finished'])
+    manifest = pd.read_csv(filename, dtype=str)
+    manifest[manifest_columns] = manifest[manifest_columns].fillna('')
+    return manifest
+
+
+def scenario_keys(HPtype, ELscenario, NGscenario, CAPEXscenario):
+    # values of the manifest columns of a scenario (CAPEXscenario is None for the benchmark system)
+    return [HPtype, ELscenario, NGscenario, '' if CAPEXscenario is None else CAPEXscenario]
+
+
+def scenario_finished(store_dir, HPtype, ELscenario, NGscenario, CAPEXscenario, scenario_hash):
+    # whether the results of a scenario are stored and were computed from inputs and settings with the same hash
+    keys = scenario_keys(HPtype, ELscenario, NGscenario, CAPEXscenario)
+    manifest = load_manifest(store_dir)
+    entry = manifest[(manifest[manifest_columns] == keys).all(axis=1)]
+    if len(entry) == 0 or entry['input hash'].iloc[-1] != scenario_hash:
+        return False
+    rows = load_scenario_rows(store_dir, keys)
+    return len(rows) > 0 and all((Path(store_dir) / 'energy_flows' / (scenario_id(row) + '.npz')).is_file()
+                                 for row in rows[key_columns].to_numpy().tolist())
+
+
+def record_finished_scenario(store_dir, HPtype, ELscenario, NGscenario, CAPEXscenario, scenario_hash):
+    # add a scenario to the manifest after all its results are stored (see save_scenario_result)
+    # (the manifest is only appended to, the last entry of a scenario counts)
+    filename = Path(store_dir) / 'manifest.csv'
+    row = pd.DataFrame([dict(zip(manifest_columns, scenario_keys(HPtype, ELscenario, NGscenario, CAPEXscenario)),
+                             **{'input hash': scenario_hash, 'finished': pd.Timestamp.now().isoformat()})])
+    row.to_csv(filename, mode='a', header=not filename.is_file(), index=False)
+
+
+def load_scenario_result(store_dir, HPtype, ELscenario, NGscenario, CAPEXscenario, energy_flows=True):
+    # results of one scenario from the store in the form returned by optimisation_run_PI_CHP and
+    # optimisation_run_benchmark_CHP ({system: {amp: {'results': {...}, 'energy flows': dataframe}}})
+    keys = scenario_keys(HPtype, ELscenario, NGscenario, CAPEXscenario)
+    scenario_result = {}
+    for row in load_scenario_rows(store_dir, keys).to_dict('records'):
+        run_keys = [row.pop(column) for column in key_columns]
+        results = {parameter: value for parameter, value in row.items() if not pd.isna(value)}
+        scenario_result.setdefault(run_keys[4], {})[run_keys[5]] = {
+            'results': results, 'energy flows': load_energy_flows(store_dir, run_keys) if energy_flows else {}}
+    return scenario_result
+
+
+def load_scenario_dict(store_dir, energy_flows=True):
+    # rebuild the nested dictionaries saved by Modelruns.py from the store: scenario_dict
+    # ({HPtype: {ELscenario: {NGscenario: {CAPEXscenario: {system: {amp: ...}}}}}}) of the plug-in runs and
+    # benchmark_scenario_dict ({ELscenario: {NGscenario: {system: {amp: ...}}}}) of the benchmark runs
+    index = load_index(store_dir)
+    scenario_dict = {}
+    benchmark_scenario_dict = {}
+    for row in index.to_dict('records'):
+        keys = [row.pop(column) for column in key_columns]
+        HPtype, ELscenario, NGscenario, CAPEXscenario, system, amp = keys
+        if HPtype == 'Benchmark':
+            run_dict = benchmark_scenario_dict.setdefault(ELscenario, {}).setdefault(NGscenario, {})
+        else:
+            run_dict = scenario_dict.setdefault(HPtype, {}).setdefault(ELscenario, {}).setdefault(
+                NGscenario, {}).setdefault(CAPEXscenario, {})
+        results = {parameter: value for parameter, value in row.items() if not pd.isna(value)}
+        run_dict.setdefault(system, {})[amp] = {
+            'results': results, 'energy flows': load_energy_flows(store_dir, keys) if energy_flows else {}}
+    return scenario_dict, benchmark_scenario_dict
@@ -0,0 +1,89 @@
+import inspect
+import os
+import pickle
+from pathlib import Path
+from input_cache import file_hash
+from result_store import input_hash, replace_file
+
+# Cache of the results of the optimisation runs (optimisation_run_PI_CHP, optimisation_run_benchmark_CHP): the results
+# of a run are stored in a pickle file named after the hash of its input data, settings and the model code, so a run
+# with the same inputs returns the stored results instead of solving the model again. Only runs that were solved to
+# optimality (or dispatched in merit order) are stored. The results of every run are marked with 'from cache', so the
+# build and solve times of a run loaded from the cache are recognised as those of the earlier run. If the cache
+# exceeds its maximum size, the least recently used results are removed.
+
+default_max_size_gb = 10
+# arguments that do not change the results of a run and are not part of the key: the number of threads, the
+# persistent model, the MIP start, the timings of the phases and the prepared inputs (which are computed from the
+# keyed input data)
+unkeyed_arguments = ['threads', 'persistent', 'benchmark_start', 'timings', 'prepared']
+# solver settings that do not change the results of a run
+unkeyed_solver_settings = ['threads', 'tee']
+# solver status of the results that are stored (every run records its status, see run_statistics)
+cached_status = ['optimal', 'closed form']
+
+
+def run_key(run, *args, **kwargs):
+    # hash of a run: the name and the source file of the model function (the model code and its constants), the
+    # input data (prices, demand, CAPEX data) and all other arguments and solver settings that change the results
+    arguments = inspect.signature(run).bind(*args, **kwargs)
+    arguments.apply_defaults()
+    arguments = {name: value for name, value in arguments.arguments.items() if name not in unkeyed_arguments}
+    if 'solver' in arguments:
+        arguments['solver'] = {setting: value for setting, value in (arguments['solver'] or {}).items()
+                               if setting not in unkeyed_solver_settings}
+    return input_hash(run.__name__, file_hash(inspect.getsourcefile(run)), arguments)
+
+
+def scenario_results(results):
+    # scalar results of all runs of the results of a model function ({system: {amp: {'results': {...}, ...}}})
+    return [result['results'] for amp_dict in results.values() for result in amp_dict.values()]
+
+
+def evict(cache_dir, max_size_gb):
+    # remove the least recently used results until the cache is not larger than max_size_gb
+    files = []
+    for filename in Path(cache_dir).glob('*.pickle'):
+        try:
+            stat = filename.stat()
+        except FileNotFoundError:
+            continue  # removed by another process
+        files.append((stat.st_mtime, stat.st_size, filename))
+    size = sum(file_size for _, file_size, _ in files)
+    for _, file_size, filename in sorted(files):
+        if size <= max_size_gb * 1e9:
+            break
+        filename.unlink(missing_ok=True)
+        size -= file_size
+
+
+def cached_run(run, *args, cache_dir=None, max_size_gb=default_max_size_gb, **kwargs):
+    # run(*args, **kwargs) with the results stored in cache_dir (None: the run is not cached). Only results whose
+    # solver status is optimal or closed form (merit-order dispatch of the benchmark) are stored; results with another
+    # or without a solver status are returned without being stored
+    if cache_dir is None:
+        return run(*args, **kwargs)
+    filename = Path(cache_dir) / (run_key(run, *args, **kwargs) + '.pickle')
+    if filename.is_file():
+        try:
+            with open(filename, 'rb') as handle:
+                results = pickle.load(handle)
+        except (EOFError, pickle.UnpicklingError):
+            filename.unlink(missing_ok=True)  # damaged file, the run is repeated
+        else:
+            os.utime(filename)  # most recently used
+            print("Loaded the results of " + run.__name__ + " from the run cache.")
+            for run_results in scenario_results(results):
+                run_results['from cache'] = True
+            return results
+    results = run(*args, **kwargs)
+    for run_results in scenario_results(results):
+        run_results['from cache'] = False
+    if any(run_results.get('solver status') not in cached_status for run_results in scenario_results(results)):
+        print("The results of " + run.__name__ + " are not stored in the run cache, their solver status is not optimal "
+              "or missing.")
+        return results
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    replace_file(filename, lambda handle: pickle.dump(results, handle, protocol=pickle.HIGHEST_PROTOCOL))
+    evict(cache_dir, max_size_gb)
+    return results
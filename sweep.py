@@ -0,0 +1,130 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functions import optimisation_run_PI_CHP, optimisation_run_benchmark_CHP, prepare_inputs, solver_settings
+from result_store import input_hash
+from run_cache import cached_run, default_max_size_gb
+
+# Parallel scenario sweep of Modelruns.py: the scenarios (HP integration, electricity price, gas price and CAPEX
+# scenario) are run by a pool of worker processes, each of which receives the input data of the sweep and the input
+# arrays prepared in the parent process once.
+# The hash of the inputs and settings of a scenario decides whether its stored results can be re-used (see
+# scenario_finished in result_store.py).
+
+sweep_inputs = {}  # input data of the sweep in a worker process, set once per worker by init_sweep_worker
+prepared_inputs = {}  # prepared input arrays of the runs in a worker process, by price scenario (see prepare_inputs)
+
+
+def init_sweep_worker(inputs, prepared):
+    # store the input data of the sweep and the prepared input arrays of its price scenarios in the worker process.
+    # The data is sent once per worker instead of once per scenario (with the fork start method the worker shares the
+    # memory of the parent) and is only read by the scenario runs; the prepared arrays are read-only.
+    sweep_inputs.update(inputs)
+    prepared_inputs.update(prepared)
+    if inputs['persistent_solver']:
+        sweep_inputs['persistent_PI_model'] = {}  # every worker keeps its own persistent model
+
+
+def run_sweep_scenario(scenario, benchmark_start=None):
+    # run one scenario (HP integration, electricity price, gas price and CAPEX scenario) in a worker process
+    # benchmark_start: benchmark results of the price scenario, used as MIP start of a PI scenario
+    HP_integration_scenario, el_price_scenario, gas_use_cost_scenario, capex_scenario = scenario
+    inputs = sweep_inputs
+    prepared = prepared_inputs[(el_price_scenario, gas_use_cost_scenario)]
+    if HP_integration_scenario == 'PlugIn':
+        result = cached_run(optimisation_run_PI_CHP, inputs['heat_demand_orig'],
+                            inputs['all_electricity_prices'][el_price_scenario],
+                            inputs['all_gas_prices'][gas_use_cost_scenario], inputs['amp_values'],
+                            inputs['variability_values'], inputs['GT_min_load'], inputs['hours'],
+                            inputs['all_capex_data']['PI'][capex_scenario], linearize=inputs['linearize'],
+                            persistent=inputs.get('persistent_PI_model'), threads=inputs['threads'],
+                            representative_periods=inputs.get('representative_periods'),
+                            period_hours=inputs.get('period_hours', 24),
+                            dispatch_window_hours=inputs.get('dispatch_window_hours'),
+                            dispatch_overlap_hours=inputs.get('dispatch_overlap_hours', 24),
+                            lazy_binaries=inputs.get('lazy_binaries', False),
+                            benchmark_start=benchmark_start,
+                            solver=inputs.get('solver_settings'),
+                            build='matrix' if inputs.get('matrix_model') else 'arrays', prepared=prepared,
+                            cache_dir=inputs.get('run_cache_dir'),
+                            max_size_gb=inputs.get('run_cache_size_gb', default_max_size_gb))
+    elif HP_integration_scenario == 'Benchmark':
+        result = cached_run(optimisation_run_benchmark_CHP, inputs['heat_demand_orig'],
+                            inputs['all_electricity_prices'][el_price_scenario],
+                            inputs['all_gas_prices'][gas_use_cost_scenario], inputs['amp_values'],
+                            inputs['variability_values'], inputs['GT_min_load'], inputs['hours'],
+                            threads=inputs['threads'], solver=inputs.get('solver_settings'),
+                            build=inputs.get('benchmark_build', 'rules'), prepared=prepared,
+                            cache_dir=inputs.get('run_cache_dir'),
+                            max_size_gb=inputs.get('run_cache_size_gb', default_max_size_gb))
+    else:
+        raise ValueError("Invalid HP integration scenario: " + HP_integration_scenario)
+    return scenario, result
+
+
+def scenario_input_hash(scenario, inputs):
+    # hash of the input data and settings of one scenario of the sweep (see run_scenarios_parallel): the demand, the
+    # prices and CAPEX data of the scenario and all model and solver settings except the number of threads, the
+    # solver log output and the run cache, which do not change the results. A scenario whose hash is in the manifest
+    # of the result store is not run again (see scenario_finished in result_store.py)
+    HP_integration_scenario, el_price_scenario, gas_use_cost_scenario, capex_scenario = scenario
+    settings = {name: value for name, value in inputs.items()
+                if name not in ['heat_demand_orig', 'all_electricity_prices', 'all_gas_prices', 'all_capex_data',
+                                'threads', 'persistent_PI_model', 'solver_settings', 'run_cache_dir',
+                                'run_cache_size_gb']}
+    settings['solver_settings'] = {setting: value for setting, value in
+                                   solver_settings(inputs.get('solver_settings')).items()
+                                   if setting not in ['threads', 'tee']}
+    return input_hash(scenario, inputs['heat_demand_orig'], inputs['all_electricity_prices'][el_price_scenario],
+                      inputs['all_gas_prices'][gas_use_cost_scenario],
+                      inputs['all_capex_data']['PI'][capex_scenario] if HP_integration_scenario == 'PlugIn' else None,
+                      settings)
+
+
+def sweep_threads(inputs, workers):
+    # solver threads per worker: the threads of the sweep (or of its solver settings) or, if neither is set, the cores
+    # divided between the workers. Workers times threads must not exceed the number of cores.
+    cores = os.cpu_count() or 1
+    threads = inputs['threads'] or solver_settings(inputs.get('solver_settings'))['threads'] or \
+        max(1, cores // workers)
+    if workers * threads > cores:
+        raise ValueError("The parallel sweep needs " + str(workers) + " workers x " + str(threads) + " solver threads, "
+                         "but only " + str(cores) + " cores are available.")
+    return threads
+
+
+def run_scenarios_parallel(scenarios, inputs, workers, benchmark_starts=None):
+    # run the scenarios on a pool of worker processes and yield (scenario, result) in the order the runs finish
+    # scenarios: tuples of HP integration ('PlugIn' or 'Benchmark'), electricity price, gas price and CAPEX scenario
+    # (None for the benchmark system)
+    # inputs: dictionary with the input data and settings of the sweep, see init_sweep_worker and run_sweep_scenario
+    # The inputs of every price scenario are prepared once in this process. With benchmark_mip_start, the benchmark
+    # scenarios run first and their results are passed to the PI runs of the same price scenario as MIP start;
+    # benchmark_starts: benchmark results that are already available (e.g. loaded from the result store), by price
+    # scenario
+    inputs = dict(inputs, threads=sweep_threads(inputs, workers))
+    prepared = {(el_price_scenario, gas_use_cost_scenario): prepare_inputs(
+        inputs['heat_demand_orig'], inputs['all_electricity_prices'][el_price_scenario],
+        inputs['all_gas_prices'][gas_use_cost_scenario], inputs['amp_values'], inputs['hours'])
+        for el_price_scenario, gas_use_cost_scenario in {scenario[1:3] for scenario in scenarios}}
+    benchmark_starts = dict(benchmark_starts or {})
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_sweep_worker,
+                             initargs=(inputs, prepared)) as executor:
+        if inputs.get('benchmark_mip_start'):
+            # the benchmark of every price scenario of the PI runs is solved once, also if it is not in scenarios
+            benchmark_scenarios = [scenario for scenario in scenarios if scenario[0] == 'Benchmark'] + \
+                                  [('Benchmark',) + price_scenario + (None,) for price_scenario in
+                                   sorted({scenario[1:3] for scenario in scenarios if scenario[0] == 'PlugIn'})
+                                   if price_scenario not in benchmark_starts and
+                                   ('Benchmark',) + price_scenario + (None,) not in scenarios]
+            futures = [executor.submit(run_sweep_scenario, scenario) for scenario in benchmark_scenarios]
+            for future in as_completed(futures):
+                scenario, result = future.result()
+                benchmark_starts[scenario[1:3]] = result
+                if scenario in scenarios:
+                    yield scenario, result
+            scenarios = [scenario for scenario in scenarios if scenario[0] != 'Benchmark']
+        futures = [executor.submit(run_sweep_scenario, scenario,
+                                   benchmark_starts.get(scenario[1:3]) if inputs.get('benchmark_mip_start') else None)
+                   for scenario in scenarios]
+        for future in as_completed(futures):
+            yield future.result()